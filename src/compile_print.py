@@ -0,0 +1,66 @@
+#!/bin/python
+
+import logging
+import os
+import sys
+import time
+import argparse
+
+from print_file import setup_env, print_status
+
+
+def setup_logging(args):
+    peachy_logger = logging.getLogger('peachy')
+    logging_level = getattr(logging, args.loglevel.upper(), "INFO")
+    if not isinstance(logging_level, int):
+        raise ValueError('Invalid log level: %s' % args.loglevel)
+    peachy_logger.propagate = False
+    consoleHandler = logging.StreamHandler()
+    consoleHandler.setFormatter(logging.Formatter('%(levelname)s: %(asctime)s %(module)s - %(message)s'))
+    peachy_logger.addHandler(consoleHandler)
+    peachy_logger.setLevel(logging_level)
+
+
+def compile_file(a_file, folder):
+    from peachyprinter import PrinterAPI
+    api = PrinterAPI()
+    api.load_printer()
+    start = time.time()
+    api.get_print_api().compile_gcode(a_file, folder)
+    print("Compiled {} to {} in {:.2f} s".format(a_file, folder, time.time() - start))
+
+
+def print_compiled(folder):
+    from peachyprinter import PrinterAPI
+    api = PrinterAPI()
+    api.load_printer()
+    print_api = api.get_print_api()
+    print_api.print_compiled(folder)
+    running = True
+    while running:
+        status = print_api.get_status()
+        if status['status'] in ['Complete', 'Cancelled', 'Failed']:
+            running = False
+        time.sleep(0.05)
+        print_status(status)
+    print_api.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Render a gcode file ahead of time for the current printer calibration, or print a compiled folder")
+    parser.add_argument('-l', '--log',      dest='loglevel', action='store',      required=False, default="WARNING", help="Enter the loglevel [DEBUG|INFO|WARNING|ERROR] default: WARNING")
+    parser.add_argument('-f', '--file',     dest='file',     action='store',      required=False, default=None,      help='Specify a gcode file to compile')
+    parser.add_argument('-o', '--output',   dest='folder',   action='store',      required=True,  default=None,      help='Folder for the compiled print')
+    parser.add_argument('-p', '--print',    dest='print_it', action='store_true', required=False,                    help='Print the compiled folder instead of compiling')
+    args, unknown = parser.parse_known_args()
+
+    path = os.path.dirname(os.path.realpath(__file__))
+    setup_env(path)
+    setup_logging(args)
+
+    if args.print_it:
+        print_compiled(args.folder)
+    elif args.file:
+        compile_file(args.file, args.folder)
+    else:
+        parser.error("A gcode file is required when compiling")
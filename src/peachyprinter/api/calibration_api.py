@@ -10,6 +10,7 @@ from peachyprinter.infrastructure.transformer import TuningTransformer, Homogeno
 from peachyprinter.infrastructure.layer_generators import *
 from peachyprinter.infrastructure.machine import *
 from peachyprinter.infrastructure.layer_control import LayerWriter, LayerProcessing
+from peachyprinter.infrastructure.event_bus import EventBus
 
 logger = logging.getLogger('peachy')
 
@@ -50,7 +51,8 @@ class CalibrationAPI(object):
         self._current_generator = self._point_generator
 
         self._state = MachineState()
-        self._status = MachineStatus()
+        self._events = EventBus()
+        self._status = MachineStatus(self._events)
 
         self._communicator = UsbPacketCommunicator(self._configuration.circut.calibration_queue_length)
         self._communicator.start()
@@ -269,10 +271,20 @@ class CalibrationAPI(object):
         for pattern in self._test_patterns.values():
             pattern.set_radius(self.get_largest_object_radius())
 
+    def subscribe(self, callback, event_types=None):
+        '''Calls callback on its own thread with each event that is an instance of one of event_types,
+        or every event when None, see PrintAPI.subscribe. Returns the subscription to pass to unsubscribe.'''
+
+        return self._events.subscribe(callback, event_types)
+
+    def unsubscribe(self, subscription):
+        self._events.unsubscribe(subscription)
+
     def close(self):
         '''Must be called before shutting down applications'''
 
         self._controller.close()
+        self._events.close()
 
     def _update_generator(self, generator):
         self._current_generator = generator
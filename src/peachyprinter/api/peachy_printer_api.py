@@ -21,8 +21,8 @@ class PrinterAPI(object):
     def current_printer(self):
         return self._configuration_api.current_printer()
 
-    def get_print_api(self, start_height=0.0):
-        return PrintAPI(self._configuration_api.get_current_config(), start_height=start_height)
+    def get_print_api(self, start_height=0.0, capture_file=None, drip_log_file=None, checkpoint_file=None, shared_status_file=None):
+        return PrintAPI(self._configuration_api.get_current_config(), start_height=start_height, capture_file=capture_file, drip_log_file=drip_log_file, checkpoint_file=checkpoint_file, shared_status_file=shared_status_file)
 
     def get_print_queue_api(self):
         return PrintQueueAPI(self._configuration_api.get_current_config())
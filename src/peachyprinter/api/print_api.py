@@ -1,6 +1,8 @@
 import logging
 logger = logging.getLogger('peachy')
 import time
+import threading
+from functools import partial
 from os import path, listdir
 
 from peachyprinter.infrastructure.file import FileWriter
@@ -17,35 +19,125 @@ from peachyprinter.infrastructure.layer_generators import SubLayerGenerator, Shu
 from peachyprinter.infrastructure.commander import SerialCommander, NullCommander
 from peachyprinter.infrastructure.notification import EmailNotificationService, EmailGateway
 from peachyprinter.infrastructure.layer_control import LayerWriter, LayerProcessing
+from peachyprinter.infrastructure.layer_scheduler import LayerRenderer, PreRenderingLayerGenerator, RenderedLayerWriter, LayerScheduler, SKIP
+from peachyprinter.infrastructure.pipeline import PipelineStage
+from peachyprinter.infrastructure.process_renderer import ProcessRenderingLayerGenerator
+from peachyprinter.infrastructure.compiled_print import FrameRecorder, CompiledPrintWriter, CompiledPrint, CompiledLayerGenerator, CompiledLayerWriter, configuration_fingerprint
+from peachyprinter.infrastructure.drip_log import DripLogWriter
+from peachyprinter.infrastructure.checkpoint import PrintCheckpoint, ResumeLayerGenerator, load_checkpoint, verify_checkpoint
+from peachyprinter.infrastructure.event_bus import EventBus, StateChanged, LayerCompleted, LayerSkipped, PrintError, TransportStats
+from peachyprinter.infrastructure.shared_status import SharedStatusWriter
 from peachyprinter.infrastructure.machine import *
 from peachyprinter.infrastructure.communicator import MissingPrinterException
 from peachyprinter.infrastructure.messages import PrinterStatusMessage
 
 
+def _transformer(configuration):
+    return HomogenousTransformer(
+        configuration.calibration.max_deflection,
+        configuration.calibration.height,
+        configuration.calibration.lower_points,
+        configuration.calibration.upper_points,
+        )
+
+
+def _layer_writer(configuration, laser_control, disseminator, path_to_points, state, force_source_speed):
+    if force_source_speed:
+        override_draw_speed = None
+        override_move_speed = None
+    else:
+        override_draw_speed = configuration.cure_rate.draw_speed if configuration.cure_rate.use_draw_speed else None
+        override_move_speed = configuration.cure_rate.move_speed if configuration.cure_rate.use_draw_speed else None
+
+    post_fire_delay_speed = None
+    slew_delay_speed = None
+    if configuration.options.post_fire_delay:
+        post_fire_delay_speed = configuration.options.laser_thickness_mm / (float(configuration.options.post_fire_delay) / 1000.0)
+    if configuration.options.slew_delay:
+        slew_delay_speed = configuration.options.laser_thickness_mm / (float(configuration.options.slew_delay) / 1000.0)
+
+    if configuration.options.wait_after_move_milliseconds > 0:
+        wait_speed = configuration.options.laser_thickness_mm / (float(configuration.options.wait_after_move_milliseconds) / 1000.0)
+    else:
+        wait_speed = None
+
+    return LayerWriter(
+        disseminator,
+        path_to_points,
+        laser_control,
+        state,
+        move_distance_to_ignore=configuration.options.laser_thickness_mm,
+        override_draw_speed=override_draw_speed,
+        override_move_speed=override_move_speed,
+        wait_speed=wait_speed,
+        post_fire_delay_speed=post_fire_delay_speed,
+        slew_delay_speed=slew_delay_speed
+        )
+
+
+class LayerRendererFactory(object):
+    '''Builds a LayerRenderer for a configuration, it holds only the configuration so it can be sent to a render process'''
+
+    def __init__(self, configuration, force_source_speed=False):
+        self._configuration = configuration
+        self._force_source_speed = force_source_speed
+
+    def __call__(self, laser_control=None):
+        if laser_control is None:
+            laser_control = LaserControl(self._configuration.cure_rate.override_laser_power_amount)
+        recorder = FrameRecorder()
+        disseminator = MicroDisseminator(laser_control, recorder, self._configuration.circut.data_rate)
+        path_to_points = PathToPoints(
+            disseminator.samples_per_second,
+            _transformer(self._configuration),
+            self._configuration.options.laser_thickness_mm
+            )
+        writer = _layer_writer(self._configuration, laser_control, disseminator, path_to_points, MachineState(), self._force_source_speed)
+        return LayerRenderer(writer, recorder)
+
+
 class PrintQueueAPI(object):
+    '''Prints each gcode file in a folder in turn. status_call_back is called with each LayerCompleted,
+    LayerSkipped, PrintError and StateChanged event of the current print'''
+
     def __init__(self, configuration, status_call_back=None):
         self._configuration = configuration
+        self._status_call_back = status_call_back
         self._files = []
         self._api = None
+        self._worker = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
         self._configuration.options.print_queue_delay
 
-    def _call_back(self, status):
-        if status['status'] == "Complete":
-            if self._api:
-                self._api.close()
-            logger.info('Print Complete proceeding to next file')
-            if len(self._files) > 0:
-                logger.info('Waiting %s seconds before proceeding to next file' % self._configuration.options.print_queue_delay)
-                time.sleep(self._configuration.options.print_queue_delay)
+    def _event(self, api, event):
+        if api is not self._api:
+            return
+        if self._status_call_back:
+            self._status_call_back(event)
+        if isinstance(event, StateChanged) and event.status == "Complete":
+            self._worker = threading.Thread(target=self._print_complete, args=(api,), name='PrintQueue')
+            self._worker.start()
+
+    def _print_complete(self, api):
+        api.close()
+        logger.info('Print Complete proceeding to next file')
+        if not self._files:
+            logger.info('Print Queue Complete')
+            return
+        logger.info('Waiting %s seconds before proceeding to next file' % self._configuration.options.print_queue_delay)
+        if self._closed.wait(self._configuration.options.print_queue_delay):
+            return
+        with self._lock:
+            if self._files and not self._closed.is_set():
                 logger.info('Proceeding to next file')
                 self._print_next()
-            else:
-                logger.info('Print Queue Complete')
 
     def _print_next(self):
         afile = self._files.pop(0)
         logger.info("Printing Next File: %s" % afile)
-        self._api = PrintAPI(self._configuration, self._call_back)
+        self._api = PrintAPI(self._configuration)
+        self._api.subscribe(partial(self._event, self._api), [StateChanged, LayerCompleted, LayerSkipped, PrintError])
         self._api.print_gcode(afile)
 
     def print_folder(self, folder):
@@ -63,7 +155,11 @@ class PrintQueueAPI(object):
         return all_files
 
     def close(self):
-        self._files = []
+        with self._lock:
+            self._files = []
+            self._closed.set()
+        if self._worker:
+            self._worker.join()
         if self._api:
             self._api.close()
 
@@ -79,15 +175,31 @@ class PrintAPI(object):
             time.sleep(1)
         print_api.close()
     '''
-    def __init__(self, configuration, start_height=0.0):
+    PIPELINE_QUEUE_SIZE = 4
+    PIPELINE_SEND_QUEUE_SIZE = 1000
+
+    def __init__(self, configuration, start_height=0.0, capture_file=None, drip_log_file=None, checkpoint_file=None, shared_status_file=None):
         logger.info('Print API Startup')
         self._configuration = configuration
         logger.info('Printer Name: %s' % self._configuration.name)
         self._controller = None
         self._zaxis = None
         self._start_height = start_height
+        self._capture_file = capture_file
+        self._drip_log_file = drip_log_file
+        self._drip_log = None
+        self._checkpoint_file = checkpoint_file
+        self._checkpoint = None
+        self._resume_after = None
+        self._stages = []
+        self._send_queue_size = 0
+        self._paused = False
+        self._paused_drips_per_second = None
         self._current_file_name = None
         self._current_file = None
+        self._events = EventBus()
+        self._transport_relay = None
+        self._shared_status = SharedStatusWriter(shared_status_file) if shared_status_file else None
         if self._configuration.email.on:
             self._email_gateway = EmailGateway(self._configuration.email.host, self._configuration.email.port, self._configuration.email.username, self._configuration.email.password)
             self._notification_service = EmailNotificationService(self._email_gateway, self._configuration.email.sender, self._configuration.email.recipient)
@@ -100,15 +212,57 @@ class PrintAPI(object):
 
         return self._configuration
 
-    def print_gcode(self, file_name, print_sub_layers=True, dry_run=False, force_source_speed=False):
-        '''Take a gcode file and starts the printing it with current settings.'''
+    def print_gcode(self, file_name, print_sub_layers=True, dry_run=False, force_source_speed=False, late_layer_policy=None, pipelined=False, render_process=False):
+        '''Take a gcode file and starts the printing it with current settings.
+        late_layer_policy of 'skip', 'partial' or 'speed_scale' renders layers ahead of the z axis,
+        pipelined runs each print stage on its own thread and render_process renders in a separate process, see print_layers'''
 
         self._current_file_name = file_name
-        self._current_file = open(file_name, 'r')
+        self._current_file = open(file_name, 'rb')
         gcode_reader = GCodeReader(self._current_file, scale=self._configuration.options.scaling_factor, start_height=self._start_height)
-        gcode_layer_generator = gcode_reader.get_layers()
-        layer_generator = gcode_layer_generator
-        self.print_layers(layer_generator, print_sub_layers, dry_run, force_source_speed=force_source_speed)
+        layer_generator = gcode_reader.get_layers()
+        if self._checkpoint_file:
+            self._checkpoint = PrintCheckpoint(self._checkpoint_file, file_name, layer_generator, configuration_fingerprint(self._configuration))
+        self.print_layers(layer_generator, print_sub_layers, dry_run, force_source_speed=force_source_speed, late_layer_policy=late_layer_policy, pipelined=pipelined, render_process=render_process)
+
+    def resume_from_checkpoint(self, checkpoint_file=None, print_sub_layers=True, dry_run=False, force_source_speed=False, late_layer_policy=None, pipelined=False, render_process=False):
+        '''Continues a gcode print from the layer after the last one recorded in checkpoint_file (by default the
+        checkpoint_file this api was created with) by seeking straight to it in the gcode file.
+        The z axis starts at the height of that layer. Raises an exception if the gcode file or the
+        configuration have changed since the checkpoint. Further layers are recorded to the same checkpoint.'''
+
+        checkpoint_file = checkpoint_file if checkpoint_file else self._checkpoint_file
+        checkpoint = load_checkpoint(checkpoint_file)
+        verify_checkpoint(checkpoint, self._configuration)
+        logger.info("Resuming after layer %s at %smm" % (checkpoint['layer'], checkpoint['z']))
+        self._checkpoint_file = checkpoint_file
+        self._start_height = checkpoint['z']
+        self._resume_after = checkpoint['z']
+        self._current_file_name = checkpoint['file']['name']
+        self._current_file = open(self._current_file_name, 'rb')
+        gcode_reader = GCodeReader(self._current_file, scale=self._configuration.options.scaling_factor)
+        gcode_layer_generator = gcode_reader.get_layers(position=checkpoint['position'])
+        self._checkpoint = PrintCheckpoint(checkpoint_file, self._current_file_name, gcode_layer_generator, checkpoint['configuration'], first_layer=checkpoint['layer'])
+        self.print_layers(gcode_layer_generator, print_sub_layers, dry_run, force_source_speed=force_source_speed, late_layer_policy=late_layer_policy, pipelined=pipelined, render_process=render_process)
+
+    def subscribe(self, callback, event_types=None):
+        '''Calls callback with each print event that is an instance of one of event_types, or with every
+        event when None. The event types are in peachyprinter.infrastructure.event_bus:
+            LayerStarted, LayerCompleted, LayerSkipped, Drip, PrintError, StateChanged and TransportStats
+        Callbacks are made on a thread for the subscription so never hold up the print, while a callback
+        is slow Drip and TransportStats events waiting for it are replaced by the latest.
+        Returns the subscription to pass to unsubscribe.'''
+
+        if self._transport_relay is None:
+            self._transport_relay = self._events.subscribe(self._publish_transport_stats, [LayerCompleted])
+        return self._events.subscribe(callback, event_types)
+
+    def unsubscribe(self, subscription):
+        self._events.unsubscribe(subscription)
+
+    def _publish_transport_stats(self, event):
+        if self._send_queue_size and hasattr(self._communicator, 'transport_stats'):
+            self._events.publish(TransportStats(self._communicator.transport_stats()))
 
     def subscribe_to_status(self, callback):
         '''Allows a subscription to printer safety status messages'''
@@ -148,8 +302,13 @@ class PrintAPI(object):
         if dry_run:
             self._communicator = NullCommunicator()
         else:
-            self._communicator = UsbPacketCommunicator(self._configuration.circut.print_queue_length)
+            if self._send_queue_size:
+                self._communicator = UsbPacketCommunicator(self._configuration.circut.print_queue_length, send_queue_size=self._send_queue_size)
+            else:
+                self._communicator = UsbPacketCommunicator(self._configuration.circut.print_queue_length)
             self._communicator.start()
+            if self._capture_file:
+                self._communicator.start_capture(self._capture_file)
         return self._communicator
 
     def _get_digital_disseminator(self, dry_run):
@@ -160,9 +319,118 @@ class PrintAPI(object):
                 self._configuration.circut.data_rate
                 )
 
-    def print_layers(self, layer_generator, print_sub_layers=True, dry_run=False, force_source_speed=False):
-        '''Takes a layer_generator object and starts the printing it with current settings.'''
+    def print_layers(self, layer_generator, print_sub_layers=True, dry_run=False, force_source_speed=False, late_layer_policy=None, pipelined=False, render_process=False):
+        '''Takes a layer_generator object and starts the printing it with current settings.
+        When late_layer_policy is set layers are rendered ahead of time and started as soon as their
+        height is reached, layers that are late are then skipped ('skip'), partly printed ('partial')
+        or printed faster ('speed_scale').
+        When pipelined is set generating, augmenting, rendering and transmitting layers each run on their
+        own thread joined by bounded queues so a stall in one is absorbed by the others, see get_pipeline_stats.
+        Layers late by the time they are rendered are skipped unless late_layer_policy says otherwise.
+        When render_process is set layers are rendered in a separate process into shared memory, keeping
+        rendering off this process's interpreter lock, it cannot be combined with late_layer_policy.'''
+
+        if render_process and late_layer_policy:
+            raise Exception("render_process cannot be combined with a late_layer_policy")
+        if pipelined:
+            layer_generator = self._add_stage(PipelineStage('generate', layer_generator, queue_size=self.PIPELINE_QUEUE_SIZE))
+        layer_generator = self._augment_layers(layer_generator, print_sub_layers)
+        if self._resume_after is not None:
+            layer_generator = ResumeLayerGenerator(layer_generator, self._resume_after)
+        if pipelined:
+            layer_generator = self._add_stage(PipelineStage('augment', layer_generator, queue_size=self.PIPELINE_QUEUE_SIZE))
+            if not render_process:
+                late_layer_policy = late_layer_policy if late_layer_policy else SKIP
+            self._send_queue_size = max(self.PIPELINE_SEND_QUEUE_SIZE, self._configuration.circut.data_rate / 2)
+        if render_process:
+            self._print_in_process(layer_generator, dry_run, force_source_speed)
+            return
+        if late_layer_policy:
+            self._print_scheduled(layer_generator, dry_run, force_source_speed, late_layer_policy)
+            return
+
+        self.laser_control = LaserControl(self._configuration.cure_rate.override_laser_power_amount)
+
+        transformer = self._get_transformer()
+
+        state = MachineState()
+        self._status = MachineStatus(self._events, self._shared_status)
+
+        self._zaxis = self._get_zaxis(dry_run)
+
+        disseminator = self._get_digital_disseminator(dry_run)
+
+        path_to_points = PathToPoints(
+            disseminator.samples_per_second,
+            transformer,
+            self._configuration.options.laser_thickness_mm
+            )
+
+        self._writer = self._get_layer_writer(disseminator, path_to_points, state, force_source_speed)
+        self._start(layer_generator, state, dry_run)
+
+    def _print_scheduled(self, layer_generator, dry_run, force_source_speed, late_layer_policy):
+        self.laser_control = LaserControl(self._configuration.cure_rate.override_laser_power_amount)
+        renderer = LayerRendererFactory(self._configuration, force_source_speed)(self.laser_control)
+        layer_generator = self._add_stage(PreRenderingLayerGenerator(layer_generator, renderer))
+
+        state = MachineState()
+        self._status = MachineStatus(self._events, self._shared_status)
+        self._zaxis = self._get_zaxis(dry_run)
+        self._writer = RenderedLayerWriter(layer_generator, self._get_communicator(dry_run), self._configuration.circut.data_rate)
+        self._start(layer_generator, state, dry_run, late_layer_policy=late_layer_policy)
+
+    def _print_in_process(self, layer_generator, dry_run, force_source_speed):
+        layer_generator = self._add_stage(ProcessRenderingLayerGenerator(layer_generator, LayerRendererFactory(self._configuration, force_source_speed)))
 
+        state = MachineState()
+        self._status = MachineStatus(self._events, self._shared_status)
+        self._zaxis = self._get_zaxis(dry_run)
+        self._writer = CompiledLayerWriter(layer_generator, self._get_communicator(dry_run), self._configuration.circut.data_rate)
+        self._start(layer_generator, state, dry_run)
+
+    def _add_stage(self, stage):
+        self._stages.append(stage)
+        return stage
+
+    def compile_gcode(self, file_name, folder, print_sub_layers=True, force_source_speed=False):
+        '''Renders a gcode file ahead of time into folder for use with print_compiled.
+        The compiled print is only valid for the calibration and settings it was compiled with.'''
+
+        if not self._configuration.circut.data_rate:
+            logger.error("Printer data rate unknown, cannot compile")
+            raise Exception("Printer data rate unknown, load the printer before compiling")
+        with open(file_name, 'r') as gcode_file:
+            gcode_reader = GCodeReader(gcode_file, scale=self._configuration.options.scaling_factor)
+            layer_generator = self._augment_layers(gcode_reader.get_layers(), print_sub_layers)
+            self.laser_control = LaserControl(self._configuration.cure_rate.override_laser_power_amount)
+            renderer = LayerRendererFactory(self._configuration, force_source_speed)(self.laser_control)
+            compiled = CompiledPrintWriter(
+                folder,
+                configuration_fingerprint(self._configuration),
+                source=path.basename(file_name),
+                data_rate=self._configuration.circut.data_rate
+                )
+            try:
+                for layer in layer_generator:
+                    rendered = renderer.render(layer)
+                    compiled.add_layer(rendered.z, ''.join(rendered.frames), rendered.axis, rendered.end)
+            finally:
+                compiled.close()
+
+    def print_compiled(self, folder, dry_run=False):
+        '''Prints a folder created by compile_gcode, raises an exception if the configuration has changed since it was compiled.'''
+
+        compiled_print = CompiledPrint(folder)
+        compiled_print.verify(self._configuration)
+        self._current_file_name = compiled_print.source
+        state = MachineState()
+        self._status = MachineStatus(self._events, self._shared_status)
+        self._zaxis = self._get_zaxis(dry_run)
+        self._writer = CompiledLayerWriter(compiled_print, self._get_communicator(dry_run), self._configuration.circut.data_rate)
+        self._start(CompiledLayerGenerator(compiled_print, self._start_height), state, dry_run)
+
+    def _augment_layers(self, layer_generator, print_sub_layers):
         logger.info("Shuffled: %s" % self._configuration.options.use_shufflelayers)
         logger.info("Sublayered: %s" % self._configuration.options.use_sublayers)
         logger.info("Overlapped: %s" % self._configuration.options.use_overlap)
@@ -173,73 +441,35 @@ class PrintAPI(object):
             layer_generator = ShuffleGenerator(layer_generator, self._configuration.options.shuffle_layers_amount)
         if self._configuration.options.use_overlap:
             layer_generator = OverLapGenerator(layer_generator, self._configuration.options.overlap_amount)
+        return layer_generator
+
+    def _get_transformer(self):
+        return _transformer(self._configuration)
+
+    def _get_layer_writer(self, disseminator, path_to_points, state, force_source_speed):
+        return _layer_writer(self._configuration, self.laser_control, disseminator, path_to_points, state, force_source_speed)
 
+    def _start(self, layer_generator, state, dry_run, late_layer_policy=None):
         if self._configuration.serial.on:
             self._commander = SerialCommander(self._configuration.serial.port)
         else:
             self._commander = NullCommander()
 
-        self.laser_control = LaserControl(self._configuration.cure_rate.override_laser_power_amount)
-
-        transformer = HomogenousTransformer(
-            self._configuration.calibration.max_deflection,
-            self._configuration.calibration.height,
-            self._configuration.calibration.lower_points,
-            self._configuration.calibration.upper_points,
-            )
-
-        state = MachineState()
-        self._status = MachineStatus()
-
         if dry_run:
             abort_on_error = False
         else:
             abort_on_error = True
 
-        self._zaxis = self._get_zaxis(dry_run)
-
-        disseminator = self._get_digital_disseminator(dry_run)
-
-        path_to_points = PathToPoints(
-            disseminator.samples_per_second,
-            transformer,
-            self._configuration.options.laser_thickness_mm
-            )
-
-        if force_source_speed:
-            override_draw_speed = None
-            override_move_speed = None
-        else:
-            override_draw_speed = self._configuration.cure_rate.draw_speed if self._configuration.cure_rate.use_draw_speed else None
-            override_move_speed = self._configuration.cure_rate.move_speed if self._configuration.cure_rate.use_draw_speed else None
-
         pre_layer_delay = self._configuration.options.pre_layer_delay if self._configuration.options.pre_layer_delay else 0.0
-        post_fire_delay_speed = None
-        slew_delay_speed = None
-        if self._configuration.options.post_fire_delay:
-            post_fire_delay_speed = self._configuration.options.laser_thickness_mm / (float(self._configuration.options.post_fire_delay) / 1000.0)
-        if self._configuration.options.slew_delay:
-            slew_delay_speed = self._configuration.options.laser_thickness_mm / (float(self._configuration.options.slew_delay) / 1000.0)
-
-        if self._configuration.options.wait_after_move_milliseconds > 0:
-            wait_speed = self._configuration.options.laser_thickness_mm / (float(self._configuration.options.wait_after_move_milliseconds) / 1000.0)
-        else:
-            wait_speed = None
 
-        self._writer = LayerWriter(
-            disseminator,
-            path_to_points,
-            self.laser_control,
-            state,
-            move_distance_to_ignore=self._configuration.options.laser_thickness_mm,
-            override_draw_speed=override_draw_speed,
-            override_move_speed=override_move_speed,
-            wait_speed=wait_speed,
-            post_fire_delay_speed=post_fire_delay_speed,
-            slew_delay_speed=slew_delay_speed
-            )
+        if late_layer_policy:
+            processing = partial(LayerScheduler, policy=late_layer_policy)
+        else:
+            processing = LayerProcessing
+        if self._checkpoint:
+            processing = partial(processing, checkpoint=self._checkpoint)
 
-        self._layer_processing = LayerProcessing(
+        self._layer_processing = processing(
             self._writer,
             state,
             self._status,
@@ -256,7 +486,11 @@ class PrintAPI(object):
             )
 
         if self._zaxis:
-            self._zaxis.set_call_back(self._status.drip_call_back)
+            if self._drip_log_file:
+                self._drip_log = DripLogWriter(self._drip_log_file)
+                self._zaxis.set_call_back(self._logged_drip_call_back)
+            else:
+                self._zaxis.set_call_back(self._status.drip_call_back)
             self._zaxis.start()
 
         self._controller = Controller(
@@ -265,16 +499,21 @@ class PrintAPI(object):
             layer_generator,
             self._status,
             abort_on_error=abort_on_error,
+            stages=self._stages,
             )
 
         self._controller.start()
 
+    def _logged_drip_call_back(self, drips, height, drips_per_second, drip_history=[]):
+        self._status.drip_call_back(drips, height, drips_per_second, drip_history)
+        self._drip_log.record(drips, self._status.current_layer)
+
     def get_status(self):
         '''Returns a status dictionary of the print containing: 
                 start_time
                 elapsed_time
                 current_layer
-                status ->  ['Complete', 'Cancelled', 'Failed', 'Starting', 'Running']
+                status ->  ['Complete', 'Cancelled', 'Failed', 'Starting', 'Running', 'Paused']
                 errors
                 waiting_for_drips
                 height
@@ -283,10 +522,106 @@ class PrintAPI(object):
                 model_height
                 skipped_layers
                 drip_histor
+                scheduling_errors  seconds late each of the newest 500 scheduled layers started
+                axis          bounds of every layer, get_layer_stats returns a window of them as an array
+                axis_extents  bounds of everything drawn so far
         '''
 
         return self._controller.get_status()
 
+    def get_status_since(self, sequence=None):
+        '''Returns only the parts of get_status that changed since the sequence returned by an earlier call,
+        along with the sequence to pass next time. errors, axis, scheduling_errors and drip_history contain
+        just the entries added since, so polling stays cheap however long the print. With no sequence
+        everything is returned.'''
+
+        return self._controller.get_status_since(sequence)
+
+    def pause(self):
+        '''Pauses the print with the laser off, for example to top up resin. Layers already rendered and
+        frames queued for the printer are kept so resume continues within milliseconds.
+        The emulated dripper stops dripping while paused.'''
+
+        if not self._controller:
+            logger.warning('Not printing, nothing to pause')
+            return
+        if self._paused:
+            return
+        self._paused = True
+        if getattr(self._zaxis, 'set_drips_per_second', False):
+            self._paused_drips_per_second = self._zaxis.get_drips_per_second()
+            self._zaxis.set_drips_per_second(0)
+        self._controller.pause()
+        if hasattr(self, '_communicator'):
+            self._communicator.pause()
+
+    def resume(self):
+        '''Continues a paused print from where it stopped'''
+
+        if not self._controller or not self._paused:
+            return
+        self._paused = False
+        if self._paused_drips_per_second is not None:
+            self._zaxis.set_drips_per_second(self._paused_drips_per_second)
+            self._paused_drips_per_second = None
+        if hasattr(self, '_communicator'):
+            self._communicator.resume()
+        self._controller.resume()
+
+    def get_pipeline_stats(self):
+        '''Returns a list with a dictionary for each print stage containing:
+                name
+                items
+                busy_time
+                waiting_time  (for the stage before)
+                blocked_time  (by the stage after)
+                utilization   (fraction of time busy)
+                queue_depth
+                queue_size
+            when printing to a printer the last is the transmit stage which has the keys of transport_stats
+        '''
+
+        stats = self._controller.stage_stats()
+        if self._send_queue_size and hasattr(self._communicator, 'transport_stats'):
+            transmit = self._communicator.transport_stats()
+            transmit['name'] = 'transmit'
+            stats.append(transmit)
+        return stats
+
+    def get_layer_stats(self, start=None, end=None):
+        '''Returns a copy of the statistics of layers start to end, indexed as a list is, as a numpy structured
+        array with the fields: sequence, z, min_x, max_x, min_y, max_y, start, duration and samples.
+        Bounds and z are nan for layers that drew nothing.'''
+
+        return self._status.layer_stats.view(start, end).copy()
+
+    def get_layer_summary(self, count=None, percentiles=(50, 90, 99)):
+        '''Returns a dictionary summarizing the newest count layers, or all of them, containing:
+                layers    number of layers printed
+                extents   min_x, max_x, min_y and max_y drawn over the whole print
+                duration  seconds layers took by percentile
+                samples   samples layers took by percentile
+        '''
+
+        layer_stats = self._status.layer_stats
+        return {
+            'layers': len(layer_stats),
+            'extents': layer_stats.extents(),
+            'duration': dict((percent, layer_stats.percentile('duration', percent, count)) for percent in percentiles),
+            'samples': dict((percent, layer_stats.percentile('samples', percent, count)) for percent in percentiles),
+        }
+
+    def get_abort_stats(self):
+        '''Returns a dictionary describing how quickly layers stopped when aborted:
+                count       aborts that stopped a layer
+                last        seconds the last abort took
+                max         longest abort in seconds
+                limit       max_abort_latency the writer streams for
+                over_limit  aborts that took longer than the limit
+        '''
+
+        return self._controller.abort_stats()
+
     def can_set_drips_per_second(self):
         '''When using an emulated dripper this returns if the use can cahnge the drip rate manually via software'''
 
@@ -327,8 +662,15 @@ class PrintAPI(object):
             self._controller.close()
         else:
             logger.warning('Stopped before printing')
+        if self._drip_log:
+            self._drip_log.close()
+        if self._checkpoint:
+            self._checkpoint.close()
         if self._current_file:
             self._current_file.close()
             logger.info("File Closed")
         if self._notification_service:
             self._notification_service.send_message("Print Complete", "%s is complete" % self._current_file_name)
+        self._events.close()
+        if self._shared_status:
+            self._shared_status.close()
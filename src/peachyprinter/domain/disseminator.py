@@ -2,6 +2,15 @@ class Disseminator(object):
     def process(self, data):
         raise NotImplementedError()
 
+    def hold(self, point, count):
+        self.process([point] * count)
+
+    def dwell(self, point, duration):
+        self.hold(point, int(self.samples_per_second * duration))
+
+    def discard_pending(self):
+        pass
+
     def next_layer(self, height):
         raise NotImplementedError()
 
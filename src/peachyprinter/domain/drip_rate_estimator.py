@@ -0,0 +1,78 @@
+import math
+
+
+class DripRateEstimator(object):
+    '''Models the drip rate and its trend from drip arrival times.
+
+    Implementations provide _reset, _update(elapsed, count), rate (drips per second),
+    trend (drips per second per second) and confidence (0.0 to 1.0).
+    '''
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.drips = 0
+        self.last_time = None
+        self._pending = 0
+        self._reset()
+
+    def add_drips(self, timestamp, count=1):
+        self.drips += count
+        if self.last_time is None:
+            self.last_time = timestamp
+            return
+        elapsed = timestamp - self.last_time
+        if elapsed <= 0:
+            self._pending += count
+            return
+        self._update(elapsed, count + self._pending)
+        self._pending = 0
+        self.last_time = timestamp
+
+    def _reset(self):
+        raise NotImplementedError()
+
+    def _update(self, elapsed, count):
+        raise NotImplementedError()
+
+    @property
+    def rate(self):
+        raise NotImplementedError()
+
+    @property
+    def trend(self):
+        raise NotImplementedError()
+
+    @property
+    def confidence(self):
+        raise NotImplementedError()
+
+    def predicted_drips(self, at_time):
+        '''Drip count expected at at_time, the rate is never extrapolated below zero'''
+        if self.last_time is None:
+            return float(self.drips)
+        rate = max(0.0, self.rate)
+        trend = self.trend
+        elapsed = max(0.0, at_time - self.last_time)
+        if trend < 0:
+            elapsed = min(elapsed, rate / -trend)
+        return self.drips + rate * elapsed + 0.5 * trend * elapsed * elapsed
+
+    def predicted_time_of_drips(self, drips):
+        '''Time the drip count is expected to be reached or None if it is not expected to be'''
+        remaining = drips - self.drips
+        if remaining <= 0:
+            return self.last_time
+        if self.last_time is None:
+            return None
+        rate = max(0.0, self.rate)
+        trend = self.trend
+        if abs(trend) < 1e-9:
+            if rate <= 0:
+                return None
+            return self.last_time + remaining / rate
+        discriminant = rate * rate + 2.0 * trend * remaining
+        if discriminant < 0:
+            return None
+        return self.last_time + (math.sqrt(discriminant) - rate) / trend
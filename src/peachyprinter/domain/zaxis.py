@@ -1,7 +1,11 @@
+import threading
+from peachyprinter.infrastructure.clock import monotonic
+
 
 class ZAxis(object):
     def __init__(self, starting_height):
         self._starting_height = starting_height
+        self._height_condition = threading.Condition()
 
     def current_z_location_mm():
         raise NotImplementedError('current_z_location_mm unimplmented')
@@ -17,3 +21,44 @@ class ZAxis(object):
  
     def start(self):
         pass
+
+    def predicted_height(self, at_time):
+        '''Height expected at at_time, by default the current height'''
+        return self.current_z_location_mm()
+
+    def predicted_time_to_height(self, height_mm):
+        '''Seconds until height_mm is expected to be reached, None when unknown'''
+        if self.current_z_location_mm() >= height_mm:
+            return 0.0
+        return self._seconds_to_height(height_mm)
+
+    @property
+    def prediction_confidence(self):
+        '''How much predictions can be trusted from 0.0 to 1.0'''
+        return 0.0
+
+    def wait_for_height(self, height_mm, timeout):
+        '''Blocks until the height is reached or timeout seconds pass, returns True if the height was reached.
+
+        On python 2 a timed Condition.wait polls in steps growing to 50 ms, so a wake after _height_changed
+        can lag by up to min(timeout, 50 ms). Callers that need to start on time pass short timeouts.
+        '''
+        deadline = monotonic() + timeout
+        with self._height_condition:
+            while self.current_z_location_mm() < height_mm:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return False
+                expected = self._seconds_to_height(height_mm)
+                if expected is not None:
+                    remaining = min(remaining, max(expected, 0.001))
+                self._height_condition.wait(remaining)
+        return True
+
+    def _seconds_to_height(self, height_mm):
+        '''Override when the time a height will be reached is known, otherwise waits rely on _height_changed'''
+        return None
+
+    def _height_changed(self):
+        with self._height_condition:
+            self._height_condition.notify_all()
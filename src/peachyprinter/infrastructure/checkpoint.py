@@ -0,0 +1,113 @@
+import os
+import json
+import logging
+import threading
+from peachyprinter.domain.layer_generator import LayerGenerator
+from peachyprinter.infrastructure.compiled_print import configuration_fingerprint
+
+logger = logging.getLogger('peachy')
+
+
+def file_identity(file_name):
+    '''Enough about a file to tell if it has changed since'''
+    stats = os.stat(file_name)
+    return {'name': os.path.abspath(file_name), 'size': stats.st_size, 'modified': stats.st_mtime}
+
+
+def write_checkpoint(file_name, checkpoint):
+    '''Replaces file_name so a crash leaves either the previous or the new checkpoint'''
+    temp_file = file_name + '.tmp'
+    with open(temp_file, 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    if os.name == 'nt' and os.path.exists(file_name):
+        os.remove(file_name)
+    os.rename(temp_file, file_name)
+
+
+def load_checkpoint(file_name):
+    if not os.path.isfile(file_name):
+        logger.error("Checkpoint not found: %s" % file_name)
+        raise Exception("Checkpoint not found: %s" % file_name)
+    with open(file_name, 'r') as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def verify_checkpoint(checkpoint, configuration):
+    '''Raises an exception when the gcode file or the settings have changed since the checkpoint'''
+    if checkpoint['configuration'] != configuration_fingerprint(configuration):
+        logger.error("Configuration changed since the checkpoint")
+        raise Exception("The printer configuration has changed since the checkpoint, it cannot be resumed")
+    source_file = checkpoint['file']['name']
+    if not os.path.isfile(source_file) or file_identity(source_file) != checkpoint['file']:
+        logger.error("File changed since the checkpoint: %s" % source_file)
+        raise Exception("%s has changed since the checkpoint, it cannot be resumed" % source_file)
+
+
+class PrintCheckpoint(object):
+    '''Records where a gcode print is up to after each layer.
+
+    source is the GCodeToLayerGenerator reading file_name, first_layer the layers printed before a resume.
+    Checkpoints are written by a background thread so the disk never holds up the print, when writes
+    fall behind only the newest checkpoint is written. close writes any checkpoint still waiting.
+    '''
+
+    def __init__(self, checkpoint_file, file_name, source, fingerprint, first_layer=0):
+        self._checkpoint_file = checkpoint_file
+        self._file = file_identity(file_name)
+        self._source = source
+        self._fingerprint = fingerprint
+        self._first_layer = first_layer
+        self._pending = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._writer = threading.Thread(target=self._write_pending, name='CheckpointWriter')
+        self._writer.daemon = True
+        self._writer.start()
+
+    def record(self, layer_index, z, drips):
+        checkpoint = {
+            'file': self._file,
+            'layer': self._first_layer + layer_index,
+            'z': z,
+            'drips': drips,
+            'configuration': self._fingerprint,
+            'position': self._source.source_position(z),
+            }
+        with self._condition:
+            self._pending = checkpoint
+            self._condition.notify()
+
+    def _write_pending(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                checkpoint, self._pending = self._pending, None
+            try:
+                write_checkpoint(self._checkpoint_file, checkpoint)
+            except Exception as ex:
+                logger.error("Recording checkpoint failed: %s" % ex)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._writer.join()
+
+
+class ResumeLayerGenerator(LayerGenerator):
+    '''Skips the layers at or below the height printed before a checkpoint'''
+
+    def __init__(self, layer_generator, z):
+        self._layer_generator = layer_generator
+        self._z = z
+
+    def next(self):
+        layer = self._layer_generator.next()
+        while layer.z <= self._z:
+            layer = self._layer_generator.next()
+        return layer
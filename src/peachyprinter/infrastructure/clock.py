@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import logging
+logger = logging.getLogger('peachy')
+
+
+class _timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+
+def _clock_gettime(clock_id):
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    clock_gettime = libc.clock_gettime
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(_timespec)]
+    clock_gettime.restype = ctypes.c_int
+    spec = _timespec()
+
+    def _monotonic():
+        if clock_gettime(clock_id, ctypes.byref(spec)) != 0:
+            raise OSError(ctypes.get_errno(), 'clock_gettime failed')
+        return spec.tv_sec + spec.tv_nsec * 1e-9
+    _monotonic()
+    return _monotonic
+
+
+def _performance_counter():
+    kernel32 = ctypes.windll.kernel32
+    frequency = ctypes.c_int64()
+    kernel32.QueryPerformanceFrequency(ctypes.byref(frequency))
+    counter = ctypes.c_int64()
+
+    def _monotonic():
+        kernel32.QueryPerformanceCounter(ctypes.byref(counter))
+        return counter.value / float(frequency.value)
+    return _monotonic
+
+
+def _load_monotonic():
+    if hasattr(time, 'monotonic'):
+        return time.monotonic
+    try:
+        if os.name == 'nt':
+            return _performance_counter()
+        if sys.platform == 'darwin':
+            return _clock_gettime(6)
+        return _clock_gettime(1)
+    except Exception as ex:
+        logger.warning("Monotonic clock unavailable falling back to wall clock: %s" % ex)
+        return time.time
+
+monotonic = _load_monotonic()
@@ -1,14 +1,25 @@
 import logging
 import time
-from messages import ProtoBuffableMessage
+import ctypes
+from messages import ProtoBuffableMessage, MoveMessage, HoldMessage
 import Queue as queue
 from Queue import Empty
 from threading import Lock
+from peachyprinter.infrastructure.frame_cache import FrameCache
+from peachyprinter.infrastructure.message_dispatcher import MessageDispatcher
+from peachyprinter.infrastructure.transport_stats import TransportStats
+from peachyprinter.infrastructure.send_queue import SendQueue
+from peachyprinter.infrastructure.trace import TraceWriter, OUTGOING, INCOMING
 from peachyprinter.infrastructure.peachyusb import PeachyUSB, PeachyUSBException
 
 logger = logging.getLogger('peachy')
 
 
+def frame_message(message):
+    data = chr(message.TYPE_ID) + message.get_bytes()
+    return chr(len(data)) + data
+
+
 class Communicator(object):
     def send(self, message):
         raise NotImplementedError()
@@ -16,20 +27,46 @@ class Communicator(object):
     def register_handler(self, message_type, handler):
         raise NotImplementedError()
 
+    @property
+    def dwell_supported(self):
+        '''True when DwellMessages can be sent, otherwise dwells must be sent as held samples'''
+        return False
+
+    def discard_pending(self):
+        '''Drops messages that have been sent but not yet written to the printer'''
+        pass
+
+    def pause(self):
+        '''Stops writing messages to the printer with the laser off, keeping those not yet written'''
+        pass
+
+    def resume(self):
+        pass
+
 
 class MissingPrinterException(Exception):
     pass
 
 
 class UsbPacketCommunicator(Communicator):
-    def __init__(self, queue_size):
+    def __init__(self, queue_size, hold_supported=None, dwell_supported=None, frame_cache_size=4096, dispatch_queue_size=256, send_queue_size=0):
+        '''dispatch_queue_size above 0 runs handlers on a MessageDispatcher thread, which drops all but drip and
+        printer status messages once that many are waiting, 0 runs handlers on the usb read callback'''
         self._handlers = {}
+        self._dispatch = (None,) * 256
         self._device = None
-        self.sent_bytes = 0
-        self.last_sent_time = time.time()
-        self.send_time = 0
         self._detached = False
         self._queue_size = queue_size
+        self._hold_supported = hold_supported
+        self._dwell_supported = dwell_supported
+        self._frame_cache = FrameCache(frame_cache_size)
+        self._dispatch_queue_size = dispatch_queue_size
+        self._dispatcher = MessageDispatcher(dispatch_queue_size) if dispatch_queue_size else None
+        self._transport_stats = TransportStats()
+        self._send_queue_size = send_queue_size
+        self._sender = None
+        self._discards = 0
+        self._trace = None
         self._handler_lock = Lock()
         logger.info("Starting Usb Communications. Queue: {0:d}".format(self._queue_size))
 
@@ -44,57 +81,184 @@ class UsbPacketCommunicator(Communicator):
                 raise MissingPrinterException()
         except PeachyUSBException:
             raise MissingPrinterException()
+        if self._dispatcher and not self._dispatcher.is_alive():
+            self._dispatcher.start()
+        if self._send_queue_size and not self._sender:
+            self._sender = SendQueue(self._write, self._transport_stats, self._send_queue_size, self._laser_off_frame)
+            self._sender.start()
 
     def close(self):
+        if self._sender:
+            self._sender.close()
+            self._sender = None
         dev = self._device
         self._device = None
+        if dev:
+            dev.close()
         del dev
+        if self._dispatcher and self._dispatcher.is_alive():
+            self._dispatcher.close()
+            self._dispatcher = MessageDispatcher(self._dispatch_queue_size)
+        self.stop_capture()
+
+    def start_capture(self, file_name):
+        logger.info("Capturing usb traffic to: {}".format(file_name))
+        self.stop_capture()
+        self._trace = TraceWriter(file_name)
+
+    def stop_capture(self):
+        trace = self._trace
+        self._trace = None
+        if trace:
+            trace.close()
+            logger.info("Capture complete {} messages recorded".format(trace.records))
 
     def _process(self, data, length):
-        data = data[:length]
-        message_type_id = ord(data[0])
-        with self._handler_lock:
-            for (message, handlers) in self._handlers.items():
-                if message.TYPE_ID == message_type_id:
-                    for handler in handlers:
-                        handler(message.from_bytes(data[1:]))
+        if not length:
+            return
+        view = memoryview(ctypes.cast(data, ctypes.POINTER(ctypes.c_char * length)).contents)
+        trace = self._trace
+        if trace:
+            trace.write(INCOMING, view.tobytes())
+        entry = self._dispatch[ord(view[0])]
+        if entry is None:
+            return
+        message_type, handlers = entry
+        if self._dispatcher:
+            self._dispatcher.submit(message_type, view[1:].tobytes(), handlers)
+        else:
+            message = message_type.from_bytes(view[1:])
+            for handler in handlers:
+                handler(message)
+
+    def dispatch_stats(self):
+        if self._dispatcher:
+            return self._dispatcher.stats()
+        return None
+
+    @property
+    def hold_supported(self):
+        '''Unless set when created this is whether the connected device advertises hold support,
+        holds are otherwise sent as repeated moves'''
+        if self._hold_supported is not None:
+            return self._hold_supported
+        return getattr(self._device, 'hold_supported', False)
+
+    @property
+    def dwell_supported(self):
+        '''Unless set when created this is whether the connected device advertises dwell support'''
+        if self._dwell_supported is not None:
+            return self._dwell_supported
+        return getattr(self._device, 'dwell_supported', False)
 
     def send(self, message):
         if self._detached:
             raise MissingPrinterException(self._detached)
+        if self._sender and self._sender.error:
+            self._detached = self._sender.error
+            raise MissingPrinterException(self._detached)
         self._send(message)
 
+    def send_frame(self, frame):
+        '''Sends an already framed message such as those in a compiled print'''
+        if ord(frame[1]) == HoldMessage.TYPE_ID and not self.hold_supported:
+            self.send(HoldMessage.from_bytes(frame[2:]))
+            return
+        if self._detached:
+            raise MissingPrinterException(self._detached)
+        if self._sender and self._sender.error:
+            self._detached = self._sender.error
+            raise MissingPrinterException(self._detached)
+        if not self._device:
+            return
+        if self._sender:
+            self._sender.put(frame, 1)
+        else:
+            self._write(frame, 1)
+
     def _send(self, message):
         if not self._device:
             return
-        try:
-            if message.TYPE_ID != 99:
-                per_start_time = time.time()
-                data = chr(message.TYPE_ID) + message.get_bytes()
-                data = chr(len(data)) + data
-                self._device.write(data)
-                per_end_time = time.time() - per_start_time
-                self.send_time = self.send_time + per_end_time
-                self.sent_bytes += len(data)
-                if self.sent_bytes > 100000:
-                    seconds = time.time() - self.last_sent_time
-                    real_time_per_byte = (seconds * 1000.0) / (self.sent_bytes / 1024)
-                    cpu_time_per_byte = (self.send_time * 1000.0) / (self.sent_bytes / 1024)
-                    bps = self.sent_bytes / seconds
-                    self.last_sent_time = time.time()
-                    self.send_time = 0
-                    self.sent_bytes = 0
-                    logger.info("Real Time   : %.2f uspKB" % real_time_per_byte)
-                    logger.info("CPU Time    : %.2f uspKB" % cpu_time_per_byte)
-                    logger.info("Bytes       : %.2f bps" % bps)
-            else:
-                time.sleep(1.0 / 2000.0)
+        if message.TYPE_ID == 99:
+            time.sleep(1.0 / 2000.0)
+            return
+        repeats = 1
+        if message.TYPE_ID == HoldMessage.TYPE_ID and not self.hold_supported:
+            repeats = message.count
+            message = message.move_message()
+        data = self._frame(message)
+        if self._sender:
+            self._sender.put(data, repeats)
+        else:
+            self._write(data, repeats)
 
+    def _write(self, data, repeats):
+        device = self._device
+        if not device:
+            return
+        start_time = time.time()
+        trace = self._trace
+        discards = self._discards
+        try:
+            for repeat in xrange(repeats):
+                if self._discards != discards:
+                    break
+                device.write(data)
+                if trace:
+                    trace.write(OUTGOING, data)
         except (PeachyUSBException), e:
             if e.value == -1 or e.value == -4:
                 logger.error("Printer missing or detached")
                 self._detached = e
                 raise MissingPrinterException(e)
+        self._transport_stats.record_write(len(data) * repeats, repeats, time.time() - start_time)
+
+    def pause(self):
+        if self._sender:
+            self._sender.pause()
+
+    def resume(self):
+        if self._sender:
+            self._sender.resume()
+
+    def _laser_off_frame(self, frame):
+        '''The frame for a laser off move to where frame leaves the mirrors'''
+        message_type = {MoveMessage.TYPE_ID: MoveMessage, HoldMessage.TYPE_ID: HoldMessage}.get(ord(frame[1]))
+        if not message_type:
+            return None
+        message = message_type.from_bytes(frame[2:])
+        return self._frame(MoveMessage(message.x_pos, message.y_pos, 0))
+
+    def discard_pending(self):
+        self._discards += 1
+        if self._sender:
+            dropped = self._sender.discard()
+            if dropped:
+                logger.info("Discarded %d queued frames" % dropped)
+
+    def transport_stats(self):
+        stats = self._transport_stats.stats()
+        if self._sender:
+            stats['queue_depth'] = self._sender.depth
+            stats['queue_size'] = self._sender.size
+        else:
+            stats['queue_depth'] = 0
+            stats['queue_size'] = 0
+        return stats
+
+    def _frame(self, message):
+        key = message.cache_key
+        if key is not None:
+            frame = self._frame_cache.get(key)
+            if frame is not None:
+                return frame
+        frame = frame_message(message)
+        if key is not None:
+            self._frame_cache.put(key, frame)
+        return frame
+
+    def frame_cache_stats(self):
+        return self._frame_cache.stats()
 
     def register_handler(self, message_type, handler):
         logger.info("Registering handler for: {}".format(message_type.__name__))
@@ -102,15 +266,19 @@ class UsbPacketCommunicator(Communicator):
             logger.error("ProtoBuffableMessage required for message type")
             raise Exception("ProtoBuffableMessage required for message type")
         with self._handler_lock:
-            if message_type in self._handlers:
-                self._handlers[message_type].append(handler)
-            else:
-                self._handlers[message_type] = [handler]
+            handlers = self._handlers.get(message_type, ()) + (handler,)
+            self._handlers[message_type] = handlers
+            dispatch = list(self._dispatch)
+            dispatch[message_type.TYPE_ID] = (message_type, handlers)
+            self._dispatch = tuple(dispatch)
 
 
 class NullCommunicator(Communicator):
     def send(self, message):
         pass
 
+    def send_frame(self, frame):
+        pass
+
     def register_handler(self, message_type, handler):
         pass
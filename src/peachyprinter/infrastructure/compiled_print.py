@@ -0,0 +1,321 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from threading import Lock, Event
+from peachyprinter.domain.layer_generator import LayerGenerator
+from peachyprinter.infrastructure.communicator import Communicator, frame_message
+from peachyprinter.infrastructure.frame_cache import FrameCache
+from peachyprinter.infrastructure.messages import MoveMessage, HoldMessage
+from peachyprinter.infrastructure.layer_control import AbortLatency, MAX_ABORT_LATENCY
+from peachyprinter.infrastructure.clock import monotonic
+
+logger = logging.getLogger('peachy')
+
+COMPILED_VERSION = 1
+INDEX_FILE = 'index.json'
+DATA_FILE = 'layers.bin'
+
+
+def configuration_fingerprint(configuration):
+    '''Hash of every setting that changes the rendered sample stream'''
+    settings = {
+        'calibration': configuration.calibration.toDict(),
+        'options': configuration.options.toDict(),
+        'cure_rate': configuration.cure_rate.toDict(),
+        'data_rate': configuration.circut.data_rate,
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True)).hexdigest()
+
+
+class FrameRecorder(Communicator):
+    '''Communicator that keeps the framed bytes instead of sending them'''
+
+    def __init__(self, frame_cache_size=4096):
+        self._frames = []
+        self._samples = []
+        self._frame_cache = FrameCache(frame_cache_size)
+        self.position = None
+
+    def send(self, message):
+        key = message.cache_key
+        frame = self._frame_cache.get(key) if key is not None else None
+        if frame is None:
+            frame = frame_message(message)
+            if key is not None:
+                self._frame_cache.put(key, frame)
+        self._frames.append(frame)
+        if message.TYPE_ID == HoldMessage.TYPE_ID:
+            self._samples.append(message.count)
+        else:
+            self._samples.append(1)
+        if message.TYPE_ID in (MoveMessage.TYPE_ID, HoldMessage.TYPE_ID):
+            self.position = (message.x_pos, message.y_pos)
+
+    def take(self):
+        '''Returns the bytes recorded since the last take'''
+        return ''.join(self.take_frames()[0])
+
+    def take_frames(self):
+        '''Returns the frames recorded since the last take and the samples each one plays'''
+        frames, samples = self._frames, self._samples
+        self._frames = []
+        self._samples = []
+        return frames, samples
+
+    def register_handler(self, message_type, handler):
+        pass
+
+    def close(self):
+        pass
+
+
+class CompiledPrintWriter(object):
+    '''Writes rendered layers to a single data file with a json index of per layer offsets'''
+
+    def __init__(self, folder, fingerprint, source=None, data_rate=None):
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        self._folder = folder
+        self._index = {
+            'version': COMPILED_VERSION,
+            'fingerprint': fingerprint,
+            'source': source,
+            'data_rate': data_rate,
+            'layers': [],
+        }
+        self._data_file = open(os.path.join(folder, DATA_FILE), 'wb')
+        self._offset = 0
+
+    def add_layer(self, z, data, axis, end):
+        self._data_file.write(data)
+        self._index['layers'].append({
+            'z': z,
+            'offset': self._offset,
+            'length': len(data),
+            'axis': axis,
+            'end': end,
+        })
+        self._offset += len(data)
+
+    def close(self):
+        self._data_file.close()
+        temp_index = os.path.join(self._folder, INDEX_FILE + '.tmp')
+        with open(temp_index, 'w') as index_file:
+            json.dump(self._index, index_file, indent=2)
+        if os.path.exists(os.path.join(self._folder, INDEX_FILE)):
+            os.remove(os.path.join(self._folder, INDEX_FILE))
+        os.rename(temp_index, os.path.join(self._folder, INDEX_FILE))
+        logger.info("Compiled {} layers ({} bytes) to {}".format(len(self._index['layers']), self._offset, self._folder))
+
+
+class CompiledLayer(object):
+    def __init__(self, index, z, offset, length, axis, end):
+        self.index = index
+        self.z = z
+        self.offset = offset
+        self.length = length
+        self.axis = axis
+        self.end = end
+        self.commands = []
+
+    def __str__(self):
+        return "CompiledLayer[Index:%d,Z:%f,Bytes:%d]" % (self.index, self.z, self.length)
+
+
+class CompiledPrint(object):
+    '''Read access to a folder written by CompiledPrintWriter'''
+
+    def __init__(self, folder):
+        self._folder = folder
+        index_path = os.path.join(folder, INDEX_FILE)
+        if not os.path.isfile(index_path):
+            raise Exception("No compiled print found in: %s" % folder)
+        with open(index_path, 'r') as index_file:
+            index = json.load(index_file)
+        if index['version'] != COMPILED_VERSION:
+            raise Exception("Unsupported compiled print version: %s" % index['version'])
+        self.fingerprint = str(index['fingerprint'])
+        self.source = index['source']
+        self.data_rate = index['data_rate']
+        self.layers = [
+            CompiledLayer(number, layer['z'], layer['offset'], layer['length'], layer['axis'], layer['end'])
+            for (number, layer) in enumerate(index['layers'])
+            ]
+        self._data_file = open(os.path.join(folder, DATA_FILE), 'rb')
+        self._lock = Lock()
+
+    def verify(self, configuration):
+        fingerprint = configuration_fingerprint(configuration)
+        if fingerprint != self.fingerprint:
+            logger.error("Compiled print does not match current configuration")
+            raise Exception("Compiled print was made with a different calibration or configuration, recompile it")
+
+    def read(self, layer):
+        with self._lock:
+            self._data_file.seek(layer.offset)
+            return self._data_file.read(layer.length)
+
+    def close(self):
+        self._data_file.close()
+
+
+class CompiledLayerGenerator(LayerGenerator):
+    def __init__(self, compiled_print, start_height=0.0):
+        self._layers = [layer for layer in compiled_print.layers if layer.z >= start_height]
+
+    def next(self):
+        if not self._layers:
+            raise StopIteration()
+        return self._layers.pop(0)
+
+
+class CompiledLayerWriter(object):
+    '''Stand in for LayerWriter that streams pre-rendered layers.
+
+    Frames are written one at a time, with holds longer than half of max_abort_latency split, so
+    abort_current_command takes effect within max_abort_latency. Holds are expanded by the
+    communicator when the firmware lacks hold support.
+    '''
+
+    def __init__(self, compiled_print, communicator, data_rate, wait_interval=0.01, max_abort_latency=MAX_ABORT_LATENCY):
+        self._compiled_print = compiled_print
+        self._communicator = communicator
+        self._data_rate = data_rate
+        self._wait_interval = wait_interval
+        self._abort_samples = max(1, int(data_rate * max_abort_latency / 2.0))
+        self._abort_latency = AbortLatency(max_abort_latency)
+        self.samples_written = 0
+        self._position = None
+        self._aborts = 0
+        self._abort_requested = None
+        self._shutting_down = False
+        self._shutdown = False
+        self._lock = Lock()
+        self._resumed = Event()
+        self._resumed.set()
+        self._pause_poll = max_abort_latency / 2.0
+
+    def process_layer(self, layer):
+        if self._shutting_down or self._shutdown:
+            raise Exception("LayerWriter already shutdown")
+        with self._lock:
+            self._stream(self._frames(self._compiled_print.read(layer)))
+            if layer.end:
+                self._position = layer.end
+        return layer.axis
+
+    def _stream(self, frames):
+        aborts = self._aborts
+        previous = None
+        for frame in frames:
+            if not self._resumed.is_set():
+                self._wait_while_paused(aborts, previous)
+            if self._shutting_down:
+                break
+            if self._aborted(aborts):
+                break
+            if ord(frame[1]) == HoldMessage.TYPE_ID:
+                if not self._send_hold_frame(frame, aborts):
+                    break
+            else:
+                self._communicator.send_frame(frame)
+                self.samples_written += 1
+            previous = frame
+
+    def _aborted(self, aborts):
+        if self._aborts == aborts:
+            return False
+        logger.info("Aborting Current Command")
+        self._abort_latency.record(monotonic() - self._abort_requested)
+        return True
+
+    def _send_hold_frame(self, frame, aborts):
+        '''Sends a hold in parts no longer than the abort latency allows, returns False if stopped part way'''
+        hold = HoldMessage.from_bytes(frame[2:])
+        if hold.count <= self._abort_samples:
+            self._communicator.send_frame(frame)
+            self.samples_written += hold.count
+            return True
+        remaining = hold.count
+        while remaining > 0:
+            if not self._resumed.is_set():
+                self._wait_while_paused(aborts, frame)
+            if self._shutting_down or self._aborted(aborts):
+                return False
+            count = min(remaining, self._abort_samples)
+            self._communicator.send(HoldMessage(hold.x_pos, hold.y_pos, hold.laser_power, count))
+            self.samples_written += count
+            remaining -= count
+        return True
+
+    def pause(self):
+        '''Stops streaming at the next frame with the laser off until resumed'''
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def _wait_while_paused(self, aborts, frame):
+        logger.info("Paused")
+        message_type = {MoveMessage.TYPE_ID: MoveMessage, HoldMessage.TYPE_ID: HoldMessage}.get(ord(frame[1])) if frame else None
+        if message_type:
+            message = message_type.from_bytes(frame[2:])
+            self._communicator.send(MoveMessage(message.x_pos, message.y_pos, 0))
+        while not self._resumed.wait(self._pause_poll):
+            if self._shutting_down or self._aborts != aborts:
+                return
+        logger.info("Resumed")
+
+    def _frames(self, data):
+        '''Splits data into frames, slicing copies each frame so data may be reused once it is sent'''
+        index = 0
+        end = len(data)
+        while index < end:
+            length = ord(data[index]) + 1
+            yield data[index:index + length]
+            index += length
+
+    def abort_current_command(self):
+        '''Stops the layer being streamed and drops frames queued for the printer'''
+        self._abort_requested = monotonic()
+        self._aborts += 1
+        self._communicator.discard_pending()
+
+    def abort_stats(self):
+        return self._abort_latency.stats()
+
+    def wait_till_time(self, wait_time):
+        '''Holds the laser off at the current position until wait_time one wait_interval slice at a time,
+        sleeping only what is left of a slice once its hold is written as LayerWriter does'''
+        aborts = self._aborts
+        while not (self._shutting_down or self._aborts != aborts):
+            start = time.time()
+            duration = min(wait_time - start, self._wait_interval)
+            if duration <= 0:
+                return
+            self.hold(duration)
+            time.sleep(max(0.0, start + duration - time.time()))
+
+    def hold(self, duration):
+        if self._shutting_down or not self._position:
+            return
+        samples = int(self._data_rate * duration)
+        if samples > 0:
+            self._send_hold(samples)
+
+    def _send_hold(self, samples):
+        x, y = self._position
+        self._communicator.send(HoldMessage(x, y, 0, samples))
+
+    def terminate(self):
+        self._shutting_down = True
+        with self._lock:
+            self._shutdown = True
+            try:
+                self._communicator.close()
+                self._compiled_print.close()
+                logger.info("Layer writer shutdown correctly")
+            except Exception as ex:
+                logger.error(ex)
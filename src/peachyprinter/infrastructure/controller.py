@@ -6,14 +6,19 @@ import traceback
 from peachyprinter.domain.commands import *
 from peachyprinter.infrastructure.machine import MachineError
 from peachyprinter.infrastructure.communicator import MissingPrinterException
+from peachyprinter.infrastructure.clock import monotonic
+from peachyprinter.infrastructure.pipeline import StageStats, take_upstream_wait
 
 class Controller(threading.Thread,):
+    '''Prints layers from layer_generator. When the layers come through PipelineStages
+    (e.g. generate, augment, render) pass them as stages so they are reported and closed with the print.'''
     def __init__(self,
                  layer_writer,
                  layer_processer,
                  layer_generator,
                  status,
                  abort_on_error=True,
+                 stages=[],
                  ):
         threading.Thread.__init__(self)
 
@@ -28,6 +33,8 @@ class Controller(threading.Thread,):
         self._layer_processing = layer_processer
         self._writer = layer_writer
         self._status = status
+        self._stages = list(stages)
+        self._print_stats = StageStats('print')
         self._next_layer_generator = None
         self._run_lock = threading.Lock()
         self._generator_lock = threading.Lock()
@@ -44,6 +51,7 @@ class Controller(threading.Thread,):
                 self._status.set_aborted()
             self._writer.terminate()
             self._layer_processing.terminate()
+            self._close_stages()
             logger.info('Controller Shutdown')
 
     def change_generator(self, layer_generator):
@@ -52,23 +60,56 @@ class Controller(threading.Thread,):
             self._layer_processing.abort_current_command()
             self._layer_generator = layer_generator
 
+    def pause(self):
+        '''Holds printing with the laser off, layers already rendered by stages are kept'''
+        logger.info('Controller pause requested')
+        self._layer_processing.pause()
+        self._status.set_paused(True)
+
+    def resume(self):
+        logger.info('Controller resume requested')
+        self._status.set_paused(False)
+        self._layer_processing.resume()
+
     def get_status(self):
         return self._status.status()
 
+    def get_status_since(self, sequence=None):
+        return self._status.status_since(sequence)
+
+    def stage_stats(self):
+        '''Utilization and queueing of each pipeline stage ending with this controllers print stage'''
+        return [stage.stats() for stage in self._stages] + [self._print_stats.stats()]
+
+    def abort_stats(self):
+        '''How quickly the writer stopped when layers were aborted'''
+        return self._writer.abort_stats()
+
+    def _close_stages(self):
+        for stage in self._stages:
+            stage.close()
+
     def close(self):
         logger.info('Controller shutdown requested')
         self._shutting_down = True
         self._layer_processing.abort_current_command()
+        self._close_stages()
         self._run_lock.acquire()
         self._run_lock.release()
 
     def _process_layers(self):
+        take_upstream_wait()
         while not self._shutting_down:
             try:
+                start = monotonic()
                 with self._generator_lock:
                     layer = self._layer_generator.next()
                 self._layer_processing.process(layer)
+                waiting = take_upstream_wait()
+                self._print_stats.record(monotonic() - start - waiting, waiting)
             except StopIteration:
+                if self._shutting_down:
+                    return
                 logger.info('Layers Complete')
                 self._complete = True
                 return
@@ -0,0 +1,114 @@
+import numpy
+
+
+class DripHistory(object):
+    '''Fixed size ring of drip timestamps with rolling interval statistics.
+
+    The ring has one slot more than capacity and every timestamp is written twice, at slot and
+    slot + slots, so the newest entries are always a contiguous slice and view() can return them
+    without copying. Views are read only. The spare slot keeps a view intact through the next single
+    append, later appends overwrite its oldest entries so copy a view if it needs to be kept longer.
+    '''
+
+    def __init__(self, capacity=500):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self._capacity = capacity
+        self._slots = capacity + 1
+        self._buffer = numpy.zeros(self._slots * 2, dtype=numpy.float64)
+        self.clear()
+
+    def clear(self):
+        self._next = 0
+        self._length = 0
+        self._total = 0
+        self._interval_sum = 0.0
+        self._interval_square_sum = 0.0
+        self._since_recalculated = 0
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def total(self):
+        '''Number of drips ever appended, including ones no longer held'''
+        return self._total
+
+    def __len__(self):
+        return self._length
+
+    def append(self, timestamp, count=1):
+        for i in xrange(count):
+            self._append(timestamp)
+
+    def _append(self, timestamp):
+        end = self._next + self._slots
+        if self._length:
+            interval = timestamp - self._buffer[end - 1]
+            self._interval_sum += interval
+            self._interval_square_sum += interval * interval
+        if self._length == self._capacity:
+            oldest = end - self._capacity
+            dropped = self._buffer[oldest + 1] - self._buffer[oldest]
+            self._interval_sum -= dropped
+            self._interval_square_sum -= dropped * dropped
+        else:
+            self._length += 1
+        self._buffer[self._next] = timestamp
+        self._buffer[end] = timestamp
+        self._next = (self._next + 1) % self._slots
+        self._total += 1
+        self._since_recalculated += 1
+        if self._since_recalculated >= self._capacity:
+            self._recalculate()
+
+    def _recalculate(self):
+        '''Resums the intervals so floating point error from the running sums cannot build up'''
+        intervals = numpy.diff(self.view())
+        self._interval_sum = float(intervals.sum())
+        self._interval_square_sum = float(numpy.dot(intervals, intervals))
+        self._since_recalculated = 0
+
+    def view(self, count=None):
+        '''Read only array of the newest count timestamps, oldest first'''
+        if count is None or count > self._length:
+            count = self._length
+        end = self._next + self._slots
+        view = self._buffer[end - count:end]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def last(self):
+        if not self._length:
+            return None
+        return self._buffer[self._next + self._slots - 1]
+
+    @property
+    def last_interval(self):
+        if self._length < 2:
+            return None
+        end = self._next + self._slots
+        return self._buffer[end - 1] - self._buffer[end - 2]
+
+    @property
+    def interval_mean(self):
+        if self._length < 2:
+            return None
+        return self._interval_sum / (self._length - 1)
+
+    @property
+    def interval_variance(self):
+        if self._length < 2:
+            return None
+        mean = self.interval_mean
+        return max(0.0, self._interval_square_sum / (self._length - 1) - mean * mean)
+
+    @property
+    def rate(self):
+        '''Drips per second over the whole history'''
+        mean = self.interval_mean
+        if not mean or mean <= 0:
+            return 0.0
+        return 1.0 / mean
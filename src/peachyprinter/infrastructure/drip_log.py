@@ -0,0 +1,96 @@
+import time
+import struct
+import threading
+import logging
+import Queue as queue
+import numpy
+from peachyprinter.infrastructure.clock import monotonic
+
+logger = logging.getLogger('peachy')
+
+DRIP_LOG_MAGIC = 'PEACHYDL'
+DRIP_LOG_VERSION = 1
+
+_header = struct.Struct('<8sBd')
+_record = struct.Struct('<IdI')
+
+DRIP_LOG_DTYPE = numpy.dtype([('drips', '<u4'), ('time', '<f8'), ('layer', '<u4')])
+
+
+class DripLogWriter(threading.Thread):
+    '''Appends drip records to a binary file from a background thread.
+
+    File layout: an 8 byte magic, a version byte and the wall clock start time (float64),
+    then one record per change in drip count of drips (uint32), monotonic seconds since
+    start (float64) and the layer being printed (uint32).
+    '''
+
+    def __init__(self, file_name, buffer_size=65536):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._file = open(file_name, 'wb', buffer_size)
+        self._file.write(_header.pack(DRIP_LOG_MAGIC, DRIP_LOG_VERSION, time.time()))
+        self._start = monotonic()
+        self._records = queue.Queue()
+        self._last_drips = None
+        self.records = 0
+        self.start()
+
+    def record(self, drips, layer):
+        '''Safe to call from drip call backs, repeated drip counts are ignored'''
+        drips = int(drips)
+        if drips == self._last_drips:
+            return
+        self._last_drips = drips
+        self._records.put((drips, monotonic() - self._start, layer))
+
+    def run(self):
+        running = True
+        while running:
+            batch = [self._records.get()]
+            while True:
+                try:
+                    batch.append(self._records.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                running = False
+            self._file.write(''.join(_record.pack(*item) for item in batch))
+            self.records += len(batch)
+        self._file.close()
+
+    def close(self):
+        if self.is_alive():
+            self._records.put(None)
+            self.join()
+            logger.info("Drip log complete {} drips recorded".format(self.records))
+
+
+def load_drip_log(file_name):
+    '''Returns the wall clock start time and a structured array with drips, time and layer fields'''
+    with open(file_name, 'rb') as log_file:
+        magic, version, start_time = _header.unpack(log_file.read(_header.size))
+        if magic != DRIP_LOG_MAGIC:
+            raise Exception("%s is not a drip log" % file_name)
+        if version != DRIP_LOG_VERSION:
+            raise Exception("Unsupported drip log version: %s" % version)
+        data = log_file.read()
+    whole_records = len(data) // DRIP_LOG_DTYPE.itemsize
+    return start_time, numpy.frombuffer(data, dtype=DRIP_LOG_DTYPE, count=whole_records)
+
+
+def load_drip_logs(file_names):
+    '''Loads many drip logs into one structured array with an extra print field holding the index
+    of the file each record came from'''
+    logs = [load_drip_log(file_name)[1] for file_name in file_names]
+    dtype = numpy.dtype(DRIP_LOG_DTYPE.descr + [('print', '<u4')])
+    combined = numpy.empty(sum(len(log) for log in logs), dtype=dtype)
+    offset = 0
+    for index, log in enumerate(logs):
+        section = combined[offset:offset + len(log)]
+        for field in DRIP_LOG_DTYPE.names:
+            section[field] = log[field]
+        section['print'] = index
+        offset += len(log)
+    return combined
@@ -0,0 +1,104 @@
+import math
+import numpy
+from peachyprinter.domain.drip_rate_estimator import DripRateEstimator
+
+
+class EWMADripRateEstimator(DripRateEstimator):
+    '''Holt double exponential smoothing of the rate between drips.
+
+    Confidence comes from the smoothed variance of the rate prediction error relative to the rate.
+    '''
+
+    def __init__(self, rate_smoothing=0.3, trend_smoothing=0.1, minimum_samples=3):
+        self._rate_smoothing = rate_smoothing
+        self._trend_smoothing = trend_smoothing
+        self._minimum_samples = minimum_samples
+        super(EWMADripRateEstimator, self).__init__()
+
+    def _reset(self):
+        self._rate = 0.0
+        self._trend = 0.0
+        self._variance = 0.0
+        self._samples = 0
+
+    def _update(self, elapsed, count):
+        observed = count / elapsed
+        self._samples += 1
+        if self._samples == 1:
+            self._rate = observed
+            return
+        previous = self._rate
+        predicted = previous + self._trend * elapsed
+        error = observed - predicted
+        self._rate = self._rate_smoothing * observed + (1.0 - self._rate_smoothing) * predicted
+        self._trend = self._trend_smoothing * (self._rate - previous) / elapsed + (1.0 - self._trend_smoothing) * self._trend
+        self._variance = (1.0 - self._rate_smoothing) * (self._variance + self._rate_smoothing * error * error)
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def trend(self):
+        return self._trend
+
+    @property
+    def confidence(self):
+        if self._samples < self._minimum_samples or self._rate <= 0:
+            return 0.0
+        return 1.0 / (1.0 + math.sqrt(self._variance) / self._rate)
+
+
+class KalmanDripRateEstimator(DripRateEstimator):
+    '''Constant acceleration Kalman filter over the drip count.
+
+    State is drips, rate and trend. jerk_noise is the variance of unmodelled changes in trend
+    and count_noise the variance of a drip count reading, drips arrive whole so about 1/12.
+    '''
+
+    def __init__(self, jerk_noise=0.05, count_noise=1.0 / 12.0, initial_rate_variance=100.0, initial_trend_variance=1.0):
+        self._jerk_noise = jerk_noise
+        self._count_noise = count_noise
+        self._initial_rate_variance = initial_rate_variance
+        self._initial_trend_variance = initial_trend_variance
+        super(KalmanDripRateEstimator, self).__init__()
+
+    def _reset(self):
+        self._count = 0
+        self._state = numpy.zeros(3)
+        self._covariance = numpy.diag([0.0, self._initial_rate_variance, self._initial_trend_variance])
+
+    def _update(self, elapsed, count):
+        dt = elapsed
+        transition = numpy.array([
+            [1.0, dt, dt * dt / 2.0],
+            [0.0, 1.0, dt],
+            [0.0, 0.0, 1.0]])
+        noise = self._jerk_noise * numpy.array([
+            [dt ** 5 / 20.0, dt ** 4 / 8.0, dt ** 3 / 6.0],
+            [dt ** 4 / 8.0, dt ** 3 / 3.0, dt ** 2 / 2.0],
+            [dt ** 3 / 6.0, dt ** 2 / 2.0, dt]])
+        state = transition.dot(self._state)
+        covariance = transition.dot(self._covariance).dot(transition.T) + noise
+
+        self._count += count
+        innovation = self._count - state[0]
+        innovation_variance = covariance[0, 0] + self._count_noise
+        gain = covariance[:, 0] / innovation_variance
+        self._state = state + gain * innovation
+        self._covariance = covariance - numpy.outer(gain, covariance[0, :])
+
+    @property
+    def rate(self):
+        return float(self._state[1])
+
+    @property
+    def trend(self):
+        return float(self._state[2])
+
+    @property
+    def confidence(self):
+        rate = self.rate
+        if rate <= 0:
+            return 0.0
+        return 1.0 / (1.0 + math.sqrt(max(0.0, self._covariance[1, 1])) / rate)
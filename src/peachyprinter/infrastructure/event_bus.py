@@ -0,0 +1,173 @@
+import time
+import logging
+import threading
+import collections
+
+logger = logging.getLogger('peachy')
+
+
+class Event(object):
+    '''Something that happened during a print. Events that coalesce replace an undelivered event
+    of the same type as only the latest matters.'''
+    coalesce = False
+
+    def __init__(self):
+        self.time = time.time()
+
+    def __str__(self):
+        return "%s%s" % (self.__class__.__name__, dict((key, value) for key, value in self.__dict__.items() if key != 'time'))
+
+
+class LayerStarted(Event):
+    def __init__(self, layer, z):
+        Event.__init__(self)
+        self.layer = layer
+        self.z = z
+
+
+class LayerCompleted(Event):
+    def __init__(self, layer, z, duration, samples):
+        Event.__init__(self)
+        self.layer = layer
+        self.z = z
+        self.duration = duration
+        self.samples = samples
+
+
+class LayerSkipped(Event):
+    def __init__(self, layer, z):
+        Event.__init__(self)
+        self.layer = layer
+        self.z = z
+
+
+class Drip(Event):
+    coalesce = True
+
+    def __init__(self, drips, height, drips_per_second):
+        Event.__init__(self)
+        self.drips = drips
+        self.height = height
+        self.drips_per_second = drips_per_second
+
+
+class PrintError(Event):
+    def __init__(self, message, layer):
+        Event.__init__(self)
+        self.message = message
+        self.layer = layer
+
+
+class StateChanged(Event):
+    '''status is one of the get_status statuses e.g. Running, Paused, Complete'''
+
+    def __init__(self, status):
+        Event.__init__(self)
+        self.status = status
+
+
+class TransportStats(Event):
+    coalesce = True
+
+    def __init__(self, stats):
+        Event.__init__(self)
+        self.stats = stats
+
+
+class Subscription(object):
+    '''Delivers events to callback on its own thread so a slow subscriber holds up neither the print
+    nor other subscribers. Past max_pending undelivered events the oldest are dropped.'''
+
+    def __init__(self, callback, event_types=None, max_pending=1000):
+        self._callback = callback
+        self._event_types = tuple(event_types) if event_types else None
+        self._max_pending = max_pending
+        self._pending = collections.deque()
+        self._coalescing = {}
+        self._condition = threading.Condition()
+        self._running = True
+        self.coalesced = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._deliver, name='EventDelivery')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def wants(self, event):
+        return self._event_types is None or isinstance(event, self._event_types)
+
+    def put(self, event):
+        with self._condition:
+            if not self._running:
+                return
+            event_type = type(event)
+            if event.coalesce and event_type in self._coalescing:
+                self._coalescing[event_type][0] = event
+                self.coalesced += 1
+                return
+            if len(self._pending) >= self._max_pending:
+                self._forget(self._pending.popleft())
+                self.dropped += 1
+            slot = [event]
+            self._pending.append(slot)
+            if event.coalesce:
+                self._coalescing[event_type] = slot
+            self._condition.notify()
+
+    def _forget(self, slot):
+        event_type = type(slot[0])
+        if self._coalescing.get(event_type) is slot:
+            del self._coalescing[event_type]
+
+    def _deliver(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                slot = self._pending.popleft()
+                self._forget(slot)
+            try:
+                self._callback(slot[0])
+            except Exception as ex:
+                logger.error("Event subscriber failed on %s: %s" % (slot[0], ex))
+
+    def close(self, timeout=1.0):
+        '''Stops once the events already published are delivered, waiting up to timeout for them'''
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+
+class EventBus(object):
+    '''In process publish and subscribe, publishing only queues the event for each subscriber'''
+
+    def __init__(self):
+        self._subscriptions = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, event_types=None, max_pending=1000):
+        '''Calls callback with each published event that is an instance of one of event_types, or every event'''
+        subscription = Subscription(callback, event_types, max_pending)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = [item for item in self._subscriptions if item is not subscription]
+        subscription.close()
+
+    def publish(self, event):
+        for subscription in self._subscriptions:
+            if subscription.wants(event):
+                subscription.put(event)
+
+    def close(self):
+        with self._lock:
+            subscriptions = self._subscriptions
+            self._subscriptions = []
+        for subscription in subscriptions:
+            subscription.close()
@@ -0,0 +1,59 @@
+import logging
+from collections import OrderedDict
+from threading import Lock
+logger = logging.getLogger('peachy')
+
+
+class FrameCache(object):
+    '''Least recently used cache of fully framed message bytes keyed by message content'''
+
+    def __init__(self, capacity=4096):
+        self._capacity = capacity
+        self._frames = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, key):
+        with self._lock:
+            frame = self._frames.pop(key, None)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames[key] = frame
+            self.hits += 1
+            return frame
+
+    def put(self, key, frame):
+        if self._capacity <= 0:
+            return
+        with self._lock:
+            self._frames.pop(key, None)
+            self._frames[key] = frame
+            if len(self._frames) > self._capacity:
+                self._frames.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / float(lookups)
+
+    def stats(self):
+        return {
+            'size': len(self._frames),
+            'capacity': self._capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.hits = 0
+            self.misses = 0
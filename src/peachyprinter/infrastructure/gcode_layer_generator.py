@@ -1,9 +1,13 @@
 import collections
+import threading
 from peachyprinter.domain.commands import *
 from peachyprinter.domain.layer_generator import LayerGenerator
 import logging
 logger = logging.getLogger('peachy')
 
+# Layer positions kept for source_position, far more than the layers read ahead of printing
+MAX_POSITIONS = 1000
+
 
 class GCodeReader(object):
     def __init__(self, file_object, scale=1.0, start_height=None):
@@ -17,22 +21,37 @@ class GCodeReader(object):
             pass
         return layers.errors
 
-    def get_layers(self):
+    def get_layers(self, position=None):
+        if position:
+            return GCodeToLayerGenerator(self.file_object, scale=self.scale, start_height=self._start_height, position=position)
         return GCodeToLayerGenerator(self.file_object, scale=self.scale, start_height=self._start_height)
 
 
 class GCodeToLayerGenerator(LayerGenerator):
-    def __init__(self, file_object, scale=1.0, start_height=None):
+    '''Layers from a gcode file. The file position and reader state of each layer are kept so a print can
+    be resumed from a source_position by seeking to it instead of reading the file from the start.
+
+    Lines below start_height are only scanned for the reader state, no commands are made for them.'''
+
+    def __init__(self, file_object, scale=1.0, start_height=None, position=None):
         super(GCodeToLayerGenerator, self).__init__()
         self.errors = []
         self._start_height = start_height
         self.warning = []
         self._file_object = file_object
         self._line_number = 0
+        self._offset = 0
         self._current_z = 0.0
         self._gcode_command_reader = GCodeCommandReader(scale=scale)
         self._command_queue = collections.deque()
         self._file_complete = False
+        self._marks = collections.deque(maxlen=MAX_POSITIONS)
+        self._marks_lock = threading.Lock()
+        self._seeking = bool(start_height)
+        if position:
+            self._seek(position)
+        state = self._gcode_command_reader.state()
+        self._mark(state['z'], self._offset, self._line_number, state)
 
     def __iter__(self):
         return self
@@ -41,25 +60,80 @@ class GCodeToLayerGenerator(LayerGenerator):
         return self.next()
 
     def next(self):
+        if self._seeking:
+            self._seek_height()
         layer = self._get_layer(None)
         while layer.z < self._start_height:
             layer = self._get_layer(None)
         return layer
 
+    def source_position(self, z):
+        '''Where to start reading the file to get every layer above z, layers from there at or below z
+        need to be skipped. Earlier positions are forgotten.'''
+        with self._marks_lock:
+            while len(self._marks) > 1 and self._marks[1][0] <= z:
+                self._marks.popleft()
+            mark_z, offset, line_number, state = self._marks[0]
+        return {'z': mark_z, 'offset': offset, 'line': line_number, 'state': state}
+
+    def _seek(self, position):
+        self._file_object.seek(position['offset'])
+        self._offset = position['offset']
+        self._line_number = position['line']
+        self._gcode_command_reader.set_state(position['state'])
+
+    def _mark(self, z, offset, line_number, state):
+        with self._marks_lock:
+            self._marks.append((z, offset, line_number, state))
+
+    def _seek_height(self):
+        self._seeking = False
+        reader = self._gcode_command_reader
+        while True:
+            try:
+                gcode_line = self._file_object.next()
+            except StopIteration:
+                self._file_complete = True
+                return
+            offset, line_number = self._offset, self._line_number
+            self._offset += len(gcode_line)
+            self._line_number += 1
+            state = reader.state() if 'Z' in gcode_line else None
+            try:
+                z = reader.scan(gcode_line.strip())
+            except Exception as ex:
+                self._error(ex)
+                continue
+            if z is not None and z >= self._start_height:
+                reader.set_state(state)
+                self._queue_commands(gcode_line, offset, line_number, state)
+                return
+
     def _populate_buffer(self):
         try:
             gcode_line = self._file_object.next()
+            offset, line_number = self._offset, self._line_number
+            self._offset += len(gcode_line)
             self._line_number += 1
-            try:
-                commands = self._gcode_command_reader.to_command(gcode_line.strip())
-                for command in commands:
-                    self._command_queue.append(command)
-            except Exception as ex:
-                logger.error("Error %s: %s" % (self._line_number, ex.message))
-                self.errors.append("Error %s: %s" % (self._line_number, ex.message))
+            state = self._gcode_command_reader.state() if 'Z' in gcode_line else None
+            self._queue_commands(gcode_line, offset, line_number, state)
         except StopIteration:
             self._file_complete = True
 
+    def _queue_commands(self, gcode_line, offset, line_number, state):
+        try:
+            commands = self._gcode_command_reader.to_command(gcode_line.strip())
+            for command in commands:
+                if state and type(command) == VerticalMove:
+                    self._mark(command.end, offset, line_number, state)
+                self._command_queue.append(command)
+        except Exception as ex:
+            self._error(ex)
+
+    def _error(self, ex):
+        logger.error("Error %s: %s" % (self._line_number, ex.message))
+        self.errors.append("Error %s: %s" % (self._line_number, ex.message))
+
     def _clean_up_unneed_moves(self, layer):
         if (type(layer.commands[-1]) == LateralMove):
             layer.commands = layer.commands[:-1]
@@ -101,9 +175,31 @@ class GCodeCommandReader(object):
         self._current_z_pos = 0.0
         self._layer_height = None
         self._units = 'mm'
+        self._unscanned = None
         self.scale = scale
 
+    def state(self):
+        '''Everything the reader remembers between lines'''
+        self._scan_unscanned()
+        return {
+            'units': self._units,
+            'mm_per_s': self._mm_per_s,
+            'xy': list(self._current_xy),
+            'z': self._current_z_pos,
+            'layer_height': self._layer_height,
+            }
+
+    def set_state(self, state):
+        self._unscanned = None
+        self._units = state['units']
+        self._mm_per_s = state['mm_per_s']
+        self._current_xy = list(state['xy'])
+        self._current_z_pos = state['z']
+        self._layer_height = state['layer_height']
+
     def to_command(self, gcode):
+        if self._unscanned:
+            self._scan_unscanned()
         if self._can_ignore(gcode):
             return []
         commands = gcode.split(' ')
@@ -112,6 +208,62 @@ class GCodeCommandReader(object):
         logger.error('Unsupported Command: %s' % (gcode))
         raise Exception('Unsupported Command: %s' % (gcode))
 
+    def scan(self, gcode):
+        '''Changes the state as to_command would but only makes commands for vertical draws.
+        Returns the height of the highest layer the line starts or None when it starts none.
+
+        Only the last of a run of lines that just move in x and y changes the state, so they are
+        left unparsed until another line or the state is needed.'''
+        if gcode.startswith(self._LATERAL_PREFIXES) and 'Z' not in gcode and 'F' not in gcode and ' X' in gcode and ' Y' in gcode:
+            self._unscanned = gcode
+            return None
+        self._scan_unscanned()
+        return self._scan(gcode)
+
+    def _scan_unscanned(self):
+        if self._unscanned:
+            gcode, self._unscanned = self._unscanned, None
+            self._scan(gcode)
+
+    def _scan(self, gcode):
+        if self._can_ignore(gcode):
+            return None
+        details = gcode.split(' ')
+        if details[0] not in self._DRAW_COMMANDS:
+            self.to_command(gcode)
+            return None
+        x_mm = None
+        y_mm = None
+        z_mm = None
+        write = False
+        for detail in details[1:]:
+            detail_type = detail[0]
+            if detail_type == 'X':
+                x_mm = self._to_mm(float(detail[1:])) * self.scale
+            elif detail_type == 'Y':
+                y_mm = self._to_mm(float(detail[1:])) * self.scale
+            elif detail_type == 'Z':
+                z_mm = self._to_mm(float(detail[1:])) * self.scale
+            elif detail_type == 'F':
+                self._mm_per_s = self._to_mm_per_second(float(detail[1:]))
+            elif detail_type == 'E':
+                write = float(detail[1:]) > 0.0
+
+        if not self._mm_per_s:
+            logger.error("Feed Rate Never Specified")
+            raise Exception("Feed Rate Never Specified")
+        if z_mm is None:
+            if x_mm is not None and y_mm is not None:
+                self._current_xy = [x_mm, y_mm]
+            return None
+        if write:
+            return max(command.end for command in self.to_command(gcode) if type(command) == VerticalMove)
+        self._zaxis_change(z_mm)
+        if x_mm is not None or y_mm is not None:
+            self._current_xy = [x_mm, y_mm]
+        self._current_z_pos = z_mm
+        return z_mm
+
     def _command_draw(self, line):
         command_details = line.split(' ')
         x_mm = None
@@ -226,6 +378,9 @@ class GCodeCommandReader(object):
         'G20': _units_inches
     }
 
+    _DRAW_COMMANDS = ['G0', 'G1', 'G01']
+    _LATERAL_PREFIXES = ('G0 ', 'G1 ', 'G01 ')
+
     _IGNORABLE_PREFIXES = [
     ';', # Comment
     'M', # Miscilanious / Machine Specific
@@ -3,7 +3,42 @@ import logging
 logger = logging.getLogger('peachy')
 from peachyprinter.domain.commands import *
 from peachyprinter.infrastructure.commander import NullCommander
-from threading import Lock
+from peachyprinter.infrastructure.clock import monotonic
+from threading import Lock, Event
+
+MAX_ABORT_LATENCY = 0.02
+
+
+class AbortedCommand(Exception):
+    pass
+
+
+class AbortLatency(object):
+    '''Time from an abort being requested until the writer has stopped, warns when over limit'''
+
+    def __init__(self, limit=MAX_ABORT_LATENCY):
+        self.limit = limit
+        self.count = 0
+        self.last = None
+        self.max = 0.0
+        self.over_limit = 0
+
+    def record(self, latency):
+        self.count += 1
+        self.last = latency
+        self.max = max(self.max, latency)
+        if latency > self.limit:
+            self.over_limit += 1
+            logger.warning("Abort took %.1f ms, limit is %.1f ms" % (latency * 1000.0, self.limit * 1000.0))
+
+    def stats(self):
+        return {
+            'count': self.count,
+            'last': self.last,
+            'max': self.max,
+            'limit': self.limit,
+            'over_limit': self.over_limit,
+        }
 
 
 class LayerWriter():
@@ -19,6 +54,7 @@ class LayerWriter():
                  wait_speed=None,
                  post_fire_delay_speed=None,
                  slew_delay_speed=None,
+                 max_abort_latency=MAX_ABORT_LATENCY,
                  ):
         self._post_fire_delay_speed = post_fire_delay_speed
         self._slew_delay_speed = slew_delay_speed
@@ -33,10 +69,17 @@ class LayerWriter():
         self._after_move_wait_speed = wait_speed
         logger.info("Wait Speed: %s" % self._after_move_wait_speed)
 
-        self._abort_current_command = False
+        self._aborts = 0
+        self._aborts_taken = 0
+        self._abort_latency = AbortLatency(max_abort_latency)
+        self.samples_written = 0
+        self._max_abort_latency = max_abort_latency
         self._shutting_down = False
         self._shutdown = False
         self._lock = Lock()
+        self._stop_waiting = Event()
+        self._resumed = Event()
+        self._resumed.set()
 
     def _almost_equal(self, a, b):
         return (a == b or (abs(a - b) <= self._move_distance_to_ignore))
@@ -55,9 +98,11 @@ class LayerWriter():
                 # logger.info("Processing command: %s" % command)
                 if self._shutting_down:
                     break
-                if self._abort_current_command:
+                if not self._resumed.is_set():
+                    self._wait_while_paused(self._path_to_points.point(self._state.xyz))
+                if self._abort_pending():
                     logger.info("Aborting Current Command")
-                    self._abort_current_command = False
+                    self._take_abort()
                     break
                 if type(command) == LateralDraw:
                     if layer_height is None:
@@ -76,10 +121,15 @@ class LayerWriter():
                     max_x = x if x > max_x else max_x
                     min_y = y if y < min_y else min_y
                     max_y = y if y > max_y else max_y
-                    if not self._same_posisition(self._state.xy, command.start):
-                        self._move_lateral(
-                            command.start, layer.z, command.speed)
-                    self._draw_lateral(command.end, layer.z, command.speed)
+                    try:
+                        if not self._same_posisition(self._state.xy, command.start):
+                            self._move_lateral(
+                                command.start, layer.z, command.speed)
+                        self._draw_lateral(command.end, layer.z, command.speed)
+                    except AbortedCommand:
+                        logger.info("Aborting Current Command")
+                        self._take_abort()
+                        break
         return [[min_x, max_x], [min_y, max_y], layer_height]
 
     def _move_lateral(self, (to_x, to_y), to_z, speed):
@@ -112,23 +162,88 @@ class LayerWriter():
         to_xyz = [to_x, to_y, to_z]
         path = self._path_to_points.process(self._state.xyz, to_xyz, speed)
         if self._disseminator:
-            self._disseminator.process(path)
+            chunk = max(1, int(self._path_to_points.samples_per_second * self._max_abort_latency / 2.0))
+            if len(path) <= chunk:
+                self._disseminator.process(path)
+                self.samples_written += len(path)
+            else:
+                for start in xrange(0, len(path), chunk):
+                    if start and not self._resumed.is_set():
+                        self._wait_while_paused(path[start - 1])
+                    if self._abort_pending() or self._shutting_down:
+                        raise AbortedCommand()
+                    samples = path[start:start + chunk]
+                    self._disseminator.process(samples)
+                    self.samples_written += len(samples)
         self._state.set_state(to_xyz, speed)
 
     def abort_current_command(self):
-        self._abort_current_command = True
+        '''Stops the current layer, samples are sent in chunks so this returns within max_abort_latency.
+        Between layers the abort stays pending, ending any wait_till_time and stopping the next layer.'''
+        requested = monotonic()
+        self._aborts += 1
+        self._stop_waiting.set()
         with self._lock:
+            if self._disseminator:
+                self._disseminator.discard_pending()
+            self._abort_latency.record(monotonic() - requested)
             self._state.set_state((0.0, 0.0, self._state.z), self._state.speed)
 
+    def _abort_pending(self):
+        return self._aborts != self._aborts_taken
+
+    def _take_abort(self):
+        self._aborts_taken = self._aborts
+        if not self._shutting_down:
+            self._stop_waiting.clear()
+
+    def abort_stats(self):
+        return self._abort_latency.stats()
+
+    def pause(self):
+        '''Stops writing at the next chunk with the laser off until resumed'''
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def _wait_while_paused(self, point):
+        logger.info("Paused")
+        laser_was_on = self._laser_control.laser_is_on()
+        self._laser_control.set_laser_off()
+        if self._disseminator:
+            self._disseminator.dwell(point, self._max_abort_latency)
+        while not self._resumed.wait(self._max_abort_latency / 2.0):
+            if self._abort_pending() or self._shutting_down:
+                return
+        if laser_was_on:
+            self._laser_control.set_laser_on()
+        logger.info("Resumed")
+
     def wait_till_time(self, wait_time):
-        while time.time() <= wait_time:
-            if self._shutting_down:
+        '''Dwells at the current position until wait_time, one max_abort_latency slice at a time so
+        terminate and abort_current_command are not held up by a long queued dwell. Only what is left of
+        a slice once its dwell is written is slept, as holds expanded on the host take most of it to write.'''
+        while not (self._shutting_down or self._abort_pending()):
+            start = time.time()
+            duration = min(wait_time - start, self._max_abort_latency)
+            if duration <= 0:
+                return
+            self.hold(duration)
+            if self._stop_waiting.wait(max(0.0, start + duration - time.time())):
                 return
-            self._move_lateral(
-                self._state.xy, self._state.z, self._state.speed)
+
+    def hold(self, duration):
+        '''Keeps the current position with the laser off for duration seconds'''
+        if self._shutting_down:
+            return
+        self._laser_control.set_laser_off()
+        if self._disseminator and duration > 0:
+            self._disseminator.dwell(self._path_to_points.point(self._state.xyz), duration)
 
     def terminate(self):
         self._shutting_down = True
+        self._stop_waiting.set()
         with self._lock:
             self._shutdown = True
             try:
@@ -154,9 +269,13 @@ class LayerProcessing():
                  print_ended_command=None,
                  print_start_command=None,
                  dripper_on_command=None,
-                 dripper_off_command=None
+                 dripper_off_command=None,
+                 hold_slice=0.02,
+                 checkpoint=None,
                  ):
         self._writer = writer
+        self._checkpoint = checkpoint
+        self._hold_slice = hold_slice
         self._layer_count = 0
         self._state = state
         self._status = status
@@ -171,6 +290,8 @@ class LayerProcessing():
         self._dripper_on_command = dripper_on_command
         self._dripper_off_command = dripper_off_command
         self._abort_current_command = False
+        self._resumed = Event()
+        self._resumed.set()
 
         self._shutting_down = False
         self._shutdown = False
@@ -184,22 +305,47 @@ class LayerProcessing():
                 self._commander.send_command(self._print_start_command)
             self._layer_count += 1
             ahead_by = 0
-            self._status.add_layer()
             self._status.set_model_height(layer.z)
+            self._status.add_layer()
             if self._zaxis:
                 self._zaxis.move_to(layer.z + self._max_lead_distance / 2.0)
                 self._wait_till(layer.z)
                 ahead_by = self._zaxis.current_z_location_mm() - layer.z
-            if self._should_process(ahead_by):
+            if self._abort_current_command:
+                return
+            write_options = self._plan_layer(layer, ahead_by)
+            if write_options is None:
+                logger.warning('Dripping too fast, Skipping layer')
+                self._status.skipped_layer()
+            else:
                 self._commander.send_command(self._layer_start_command)
                 if self._pre_layer_delay:
                     self._writer.wait_till_time(
                         time.time() + self._pre_layer_delay)
-                self._status.add_axis_data(self._writer.process_layer(layer))
+                self._write_layer(layer, **write_options)
                 self._commander.send_command(self._layer_ended_command)
-            else:
-                logger.warning('Dripping too fast, Skipping layer')
-                self._status.skipped_layer()
+            self._record_checkpoint(layer)
+
+    def _plan_layer(self, layer, ahead_by):
+        '''The keyword arguments to write the layer with or None to skip it'''
+        if self._should_process(ahead_by):
+            return {}
+        return None
+
+    def _write_layer(self, layer, **kwargs):
+        samples = self._writer.samples_written
+        start = time.time()
+        began = monotonic()
+        axis = self._writer.process_layer(layer, **kwargs)
+        self._status.add_axis_data(axis, start, monotonic() - began, self._writer.samples_written - samples)
+
+    def _record_checkpoint(self, layer):
+        if not self._checkpoint or self._abort_current_command:
+            return
+        try:
+            self._checkpoint.record(self._layer_count, layer.z, self._status.drips)
+        except Exception as ex:
+            logger.error("Recording checkpoint failed: %s" % ex)
 
     def abort_current_command(self):
         self._abort_current_command = True
@@ -208,6 +354,20 @@ class LayerProcessing():
             self._state.set_state((0.0, 0.0, self._state.z), self._state.speed)
         self._abort_current_command = False
 
+    def pause(self):
+        '''Pauses the writer with the laser off and stops the dripper if it was waiting for drips,
+        a wait for drips sends nothing until resumed'''
+        self._resumed.clear()
+        self._writer.pause()
+        if self._status.waiting_for_drips:
+            self._commander.send_command(self._dripper_off_command)
+
+    def resume(self):
+        if self._status.waiting_for_drips:
+            self._commander.send_command(self._dripper_on_command)
+        self._writer.resume()
+        self._resumed.set()
+
     def _should_process(self, ahead_by_distance):
         if not ahead_by_distance:
             return True
@@ -221,10 +381,15 @@ class LayerProcessing():
         while self._zaxis.current_z_location_mm() < height:
             if self._shutting_down or self._abort_current_command:
                 return
+            if not self._resumed.is_set():
+                self._resumed.wait(self._hold_slice)
+                continue
             if not self._status.waiting_for_drips:
                 self._commander.send_command(self._dripper_on_command)
             self._status.set_waiting_for_drips()
-            self._writer.wait_till_time(time.time() + (0.1))
+            # One slice is queued per wait so the layer starts at most hold_slice after the height is reached
+            self._writer.hold(self._hold_slice)
+            self._zaxis.wait_for_height(height, self._hold_slice)
         if self._status.waiting_for_drips:
             self._commander.send_command(self._dripper_off_command)
         self._status.set_not_waiting_for_drips()
@@ -0,0 +1,176 @@
+import time
+import logging
+from peachyprinter.infrastructure.communicator import frame_message
+from peachyprinter.infrastructure.compiled_print import CompiledLayerWriter
+from peachyprinter.infrastructure.layer_control import LayerProcessing
+from peachyprinter.infrastructure.messages import MoveMessage, HoldMessage
+from peachyprinter.infrastructure.pipeline import PipelineStage
+
+logger = logging.getLogger('peachy')
+
+SKIP = 'skip'
+PARTIAL = 'partial'
+SPEED_SCALE = 'speed_scale'
+POLICIES = [SKIP, PARTIAL, SPEED_SCALE]
+
+
+class RenderedLayer(object):
+    def __init__(self, z, frames, samples, axis, end):
+        self.z = z
+        self.frames = frames
+        self.samples = samples
+        self.axis = axis
+        self.end = end
+        self.commands = []
+
+    @property
+    def sample_count(self):
+        return sum(self.samples)
+
+    def __str__(self):
+        return "RenderedLayer[Z:%f,Frames:%d,Samples:%d]" % (self.z, len(self.frames), self.sample_count)
+
+
+class LayerRenderer(object):
+    '''Renders layers ahead of time with a LayerWriter whose disseminator sends to a FrameRecorder'''
+
+    def __init__(self, writer, recorder):
+        self._writer = writer
+        self._recorder = recorder
+
+    def render(self, layer):
+        axis = self._writer.process_layer(layer)
+        frames, samples = self._recorder.take_frames()
+        return RenderedLayer(layer.z, frames, samples, axis, self._recorder.position)
+
+    def abort(self):
+        '''Stops rendering the current layer'''
+        self._writer.abort_current_command()
+
+
+class PreRenderingLayerGenerator(PipelineStage):
+    '''Renders up to lookahead layers from layer_generator on a background thread'''
+
+    def __init__(self, layer_generator, renderer, lookahead=3):
+        self._renderer = renderer
+        PipelineStage.__init__(self, 'render', layer_generator, renderer.render, lookahead)
+
+    def read(self, layer):
+        return layer.frames
+
+    def close(self):
+        PipelineStage.close(self)
+        self._renderer.abort()
+
+
+class RenderedLayerWriter(CompiledLayerWriter):
+    '''Streams RenderedLayers, optionally faster or only in part when running late'''
+
+    def process_layer(self, layer, speed_scale=1.0, fraction=1.0):
+        if self._shutting_down or self._shutdown:
+            raise Exception("LayerWriter already shutdown")
+        with self._lock:
+            frames = layer.frames
+            if fraction < 1.0:
+                frames = self._partial(frames, layer.samples, fraction)
+            if speed_scale > 1.0:
+                frames = self._scaled(frames, layer.samples, speed_scale)
+            self._stream(frames)
+            if layer.end:
+                self._position = layer.end
+        return layer.axis
+
+    def duration(self, layer):
+        return layer.sample_count / float(self._data_rate)
+
+    def _partial(self, frames, samples, fraction):
+        budget = sum(samples) * fraction
+        played = 0
+        for index in xrange(len(frames)):
+            if played >= budget:
+                return frames[:index]
+            played += samples[index]
+        return frames
+
+    def _scaled(self, frames, samples, speed_scale):
+        '''Drops samples evenly so the frames play speed_scale times faster'''
+        credit = 0.0
+        for frame, count in zip(frames, samples):
+            credit += count / speed_scale
+            keep = int(credit)
+            if keep == 0:
+                continue
+            credit -= keep
+            if keep == count:
+                yield frame
+            else:
+                hold = HoldMessage.from_bytes(frame[2:])
+                if keep == 1:
+                    yield frame_message(hold.move_message())
+                else:
+                    yield frame_message(HoldMessage(hold.x_pos, hold.y_pos, hold.laser_power, keep))
+
+
+class LayerScheduler(LayerProcessing):
+    '''LayerProcessing for pre-rendered layers that handles late layers with a policy instead of
+    always skipping them.
+
+    skip        skips late layers as LayerProcessing does
+    partial     plays as much of a late layer as fits in the time one layer takes to drip
+    speed_scale plays late layers up to max_speed_scale times faster and partially beyond that
+    '''
+
+    def __init__(self, writer, state, status, policy=SKIP, max_speed_scale=2.0, **kwargs):
+        if policy not in POLICIES:
+            raise Exception("Unknown late layer policy: %s" % policy)
+        LayerProcessing.__init__(self, writer, state, status, **kwargs)
+        self._policy = policy
+        self._max_speed_scale = max_speed_scale
+        self._previous_z = None
+
+    def _plan_layer(self, layer, ahead_by):
+        speed_scale, fraction = self._schedule(layer, ahead_by)
+        self._previous_z = layer.z
+        if fraction <= 0.0:
+            return None
+        self._status.add_scheduling_error(self._scheduling_error(ahead_by))
+        return {'speed_scale': speed_scale, 'fraction': fraction}
+
+    def _rate(self):
+        '''Height change in mm per second predicted by the z axis'''
+        if not self._zaxis:
+            return 0.0
+        now = time.time()
+        return self._zaxis.predicted_height(now + 1.0) - self._zaxis.predicted_height(now)
+
+    def _scheduling_error(self, ahead_by):
+        '''Seconds the layer starts after its height was reached'''
+        rate = self._rate()
+        if ahead_by <= 0 or rate <= 0:
+            return 0.0
+        return ahead_by / rate
+
+    def _schedule(self, layer, ahead_by):
+        if self._should_process(ahead_by):
+            return 1.0, 1.0
+        if self._policy == SKIP:
+            return 1.0, 0.0
+        duration = self._writer.duration(layer)
+        allowed = self._allowed_time(layer)
+        if allowed is None or duration <= allowed:
+            return 1.0, 1.0
+        if self._policy == PARTIAL:
+            logger.info("Late by %s mm, printing %.0f%% of layer" % (ahead_by, 100.0 * allowed / duration))
+            return 1.0, allowed / duration
+        speed_scale = min(self._max_speed_scale, duration / allowed)
+        fraction = min(1.0, allowed * speed_scale / duration)
+        logger.info("Late by %s mm, printing layer %.2f times faster" % (ahead_by, speed_scale))
+        return speed_scale, fraction
+
+    def _allowed_time(self, layer):
+        if self._previous_z is None or layer.z <= self._previous_z:
+            return None
+        rate = self._rate()
+        if rate <= 0:
+            return None
+        return (layer.z - self._previous_z) / rate
@@ -0,0 +1,103 @@
+import numpy
+
+LAYER_STATS_DTYPE = numpy.dtype([
+    ('sequence', numpy.int64),
+    ('z', numpy.float64),
+    ('min_x', numpy.float64),
+    ('max_x', numpy.float64),
+    ('min_y', numpy.float64),
+    ('max_y', numpy.float64),
+    ('start', numpy.float64),
+    ('duration', numpy.float64),
+    ('samples', numpy.int64),
+])
+
+BOUNDS = ['min_x', 'max_x', 'min_y', 'max_y']
+
+
+def _value(value):
+    return numpy.nan if value is None else value
+
+
+def _optional(value):
+    return None if numpy.isnan(value) else float(value)
+
+
+class LayerStats(object):
+    '''Growable structured array with a row per printed layer: the bounds drawn, z, when it started,
+    how long it took and the samples written. Bounds and z of layers that drew nothing are nan.
+
+    Views are read only and are only valid until the next append, copy them if they need to be kept.
+    '''
+
+    def __init__(self, capacity=1024):
+        self._rows = numpy.zeros(capacity, dtype=LAYER_STATS_DTYPE)
+        self._length = 0
+        self._extents = dict.fromkeys(BOUNDS)
+        self._axis = []
+
+    def __len__(self):
+        return self._length
+
+    def append(self, axis, start=numpy.nan, duration=numpy.nan, samples=0, sequence=0):
+        '''Adds a layer from the [[min_x, max_x], [min_y, max_y], z] a writer returns'''
+        if self._length == len(self._rows):
+            self._grow()
+        (min_x, max_x), (min_y, max_y), z = axis
+        self._rows[self._length] = (sequence, _value(z), _value(min_x), _value(max_x), _value(min_y), _value(max_y), start, duration, samples)
+        self._length += 1
+        self._extend(min_x, max_x, min_y, max_y)
+
+    def _grow(self):
+        rows = numpy.zeros(len(self._rows) * 2, dtype=LAYER_STATS_DTYPE)
+        rows[:self._length] = self._rows[:self._length]
+        self._rows = rows
+
+    def _extend(self, min_x, max_x, min_y, max_y):
+        if min_x is None:
+            return
+        extents = self._extents
+        if extents['min_x'] is None:
+            extents.update(min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y)
+            return
+        extents['min_x'] = min(extents['min_x'], min_x)
+        extents['max_x'] = max(extents['max_x'], max_x)
+        extents['min_y'] = min(extents['min_y'], min_y)
+        extents['max_y'] = max(extents['max_y'], max_y)
+
+    def view(self, start=None, end=None):
+        '''Read only rows of layers start to end, indexed as a list is'''
+        rows = self._rows[:self._length][start:end]
+        rows.flags.writeable = False
+        return rows
+
+    def since(self, sequence):
+        '''Read only rows of layers appended with a sequence after sequence'''
+        recorded = self._rows[:self._length]
+        return self.view(int(numpy.searchsorted(recorded['sequence'], sequence, side='right')))
+
+    def extents(self):
+        '''Bounds of everything drawn so far, None until something is'''
+        return dict(self._extents)
+
+    def percentile(self, field, percent, count=None):
+        '''Percentile of a field over the newest count layers, None when there are no values'''
+        values = self.view(-count if count else None)[field]
+        values = values[~numpy.isnan(values)] if values.dtype.kind == 'f' else values
+        if not len(values):
+            return None
+        return float(numpy.percentile(values, percent))
+
+    def all_axis(self):
+        '''Every row as axis lists. Only rows appended since the last call are converted, the list is
+        shared between calls and grows as layers are added so do not change it.'''
+        if len(self._axis) < self._length:
+            self._axis.extend(self.axis(self.view(len(self._axis))))
+        return self._axis
+
+    def axis(self, rows):
+        '''Rows as the [[min_x, max_x], [min_y, max_y], z] lists writers return'''
+        return [
+            [[_optional(row['min_x']), _optional(row['max_x'])], [_optional(row['min_y']), _optional(row['max_y'])], _optional(row['z'])]
+            for row in rows
+            ]
@@ -1,4 +1,14 @@
 import datetime
+import time
+import bisect
+import collections
+import threading
+from peachyprinter.infrastructure.layer_stats import LayerStats
+from peachyprinter.infrastructure.event_bus import LayerStarted, LayerCompleted, LayerSkipped, Drip, PrintError, StateChanged
+
+# New drip times kept for status_since, as many as the drip history of the z axes
+DRIP_TIMES_KEPT = 500
+SCHEDULING_ERRORS_KEPT = 500
 
 
 class MachineState(object):
@@ -27,7 +37,13 @@ class MachineError(object):
 
 
 class MachineStatus(object):
-    def __init__(self):
+    '''Progress of a print. status() is a full snapshot, status_since(sequence) only what changed since an
+    earlier call so polling costs the same however long the print has run.
+
+    Given an EventBus the changes are also published to it as they happen, given a SharedStatusWriter
+    the scalar fields are kept current in it for other processes.'''
+
+    def __init__(self, events=None, shared_status=None):
         self._current_layer = 0
         self._laser_state = False
         self._waiting_for_drips = True
@@ -39,51 +55,148 @@ class MachineStatus(object):
         self._complete = False
         self._aborted = False
         self._failed = False
+        self._paused = False
         self._drips = 0
         self._drips_per_second = 0
         self._drip_history = []
-        self._axis = []
+        self._layer_stats = LayerStats()
         self._skipped_layers = 0
+        self._scheduling_errors = collections.deque(maxlen=SCHEDULING_ERRORS_KEPT)
+        self._sequence = 0
+        self._changed = dict.fromkeys(self._FIELDS, 0)
+        self._appended = {'errors': []}
+        self._drip_times = collections.deque(maxlen=DRIP_TIMES_KEPT)
+        self._lock = threading.Lock()
+        self._events = events
+        self._published_status = self._status()
+        self._shared_status = shared_status
+        self._shared_start_time = time.mktime(self._start_time.timetuple()) + self._start_time.microsecond / 1000000.0
+        if shared_status:
+            self._share()
+
+    def _publish(self, event):
+        if self._events:
+            self._events.publish(event)
+
+    def _change(self, *fields):
+        with self._lock:
+            self._mark_changed(fields)
+
+    def _mark_changed(self, fields):
+        self._sequence += 1
+        for field in fields:
+            self._changed[field] = self._sequence
+        if 'status' in fields and self._events:
+            status = self._status()
+            if status != self._published_status:
+                self._published_status = status
+                self._events.publish(StateChanged(status))
+        if self._shared_status:
+            self._share()
+
+    def _share(self):
+        self._shared_status.write(
+            self._sequence, self._current_layer, self._skipped_layers, self._drips, self._status(),
+            self._waiting_for_drips, self._height, self._model_height, self._drips_per_second,
+            self._shared_start_time, len(self._errors)
+            )
+
+    def _append(self, name, items, item):
+        with self._lock:
+            self._sequence += 1
+            items.append(item)
+            self._appended[name].append(self._sequence)
+            if self._shared_status:
+                self._share()
 
     def drip_call_back(self, drips, height, drips_per_second, drip_history=[]):
+        new_drips = min(int(drips - self._drips), len(drip_history))
         self._height = height
         self._drips = drips
         self._drips_per_second = drips_per_second
         self._drip_history = drip_history
+        with self._lock:
+            self._mark_changed(('height', 'drips', 'drips_per_second', 'status'))
+            if new_drips > 0:
+                self._drip_times.extend((self._sequence, drip_time) for drip_time in drip_history[-new_drips:])
+        self._publish(Drip(drips, height, drips_per_second))
 
     def add_layer(self):
         self._current_layer += 1
+        self._change('current_layer', 'status')
+        self._publish(LayerStarted(self._current_layer, self._model_height))
 
     def skipped_layer(self):
         self._skipped_layers += 1
+        self._change('skipped_layers')
+        self._publish(LayerSkipped(self._current_layer, self._model_height))
+
+    def add_scheduling_error(self, seconds):
+        '''Records how late a layer started, only the newest SCHEDULING_ERRORS_KEPT are kept'''
+        with self._lock:
+            self._sequence += 1
+            self._scheduling_errors.append((self._sequence, seconds))
+            if self._shared_status:
+                self._share()
 
     def add_error(self, error):
-        self._errors.append(error)
+        self._append('errors', self._errors, error)
+        self._publish(PrintError(error.message, error.layer))
 
-    def add_axis_data(self, axis):
-        self._axis.append(axis)
+    def add_axis_data(self, axis, start=None, duration=0.0, samples=0):
+        '''Records the [[min_x, max_x], [min_y, max_y], z] drawn by a layer, with when it started and
+        the seconds and samples it took'''
+        start = time.time() if start is None else start
+        with self._lock:
+            self._sequence += 1
+            self._layer_stats.append(axis, start, duration, samples, self._sequence)
+        self._publish(LayerCompleted(self._current_layer, self._model_height, duration, samples))
+
+    @property
+    def layer_stats(self):
+        return self._layer_stats
 
     def set_waiting_for_drips(self):
-        self._waiting_for_drips = True
+        if not self._waiting_for_drips:
+            self._waiting_for_drips = True
+            self._change('waiting_for_drips')
+
+    @property
+    def current_layer(self):
+        return self._current_layer
+
+    @property
+    def drips(self):
+        return self._drips
 
     @property
     def waiting_for_drips(self):
         return self._waiting_for_drips
 
     def set_not_waiting_for_drips(self):
-        self._waiting_for_drips = False
+        if self._waiting_for_drips:
+            self._waiting_for_drips = False
+            self._change('waiting_for_drips')
 
     def set_model_height(self, model_height):
         self._model_height = model_height
+        self._change('model_height')
 
     def set_complete(self):
         self._complete = True
+        self._change('status')
 
     def set_aborted(self):
         self._aborted = True
+        self._change('status')
 
     def set_failed(self):
         self._failed = True
+        self._change('status')
+
+    def set_paused(self, paused):
+        self._paused = paused
+        self._change('status')
 
     def _elapsed_time(self):
         return datetime.datetime.now() - self._start_time
@@ -95,15 +208,67 @@ class MachineStatus(object):
             return 'Cancelled'
         if self._failed:
             return 'Failed'
+        if self._paused:
+            return 'Paused'
         if (self._drips == 0 and self._current_layer == 0):
             return 'Starting'
         else:
             return 'Running'
 
-    def _formatted_errors(self):
-        return [{'time': error.timestamp, 'message': error.message, 'layer': error.layer} for error in self._errors]
+    def _formatted_errors(self, errors=None):
+        errors = self._errors if errors is None else errors
+        return [{'time': error.timestamp, 'message': error.message, 'layer': error.layer} for error in errors]
+
+    def _value(self, field):
+        if field == 'status':
+            return self._status()
+        return getattr(self, '_' + field)
+
+    def _added_since(self, name, items, sequence):
+        return items[bisect.bisect_right(self._appended[name], sequence):]
+
+    def _kept_since(self, kept, sequence):
+        '''Values of the (sequence, value) pairs in kept recorded after sequence'''
+        values = []
+        for value_sequence, value in reversed(kept):
+            if value_sequence <= sequence:
+                break
+            values.append(value)
+        values.reverse()
+        return values
+
+    def status_since(self, sequence=None):
+        '''The fields of status() that changed after sequence plus 'sequence' to pass to the next call.
+        errors, axis, scheduling_errors and drip_history hold only the entries added since and are left out
+        when there are none, elapsed_time is always included. With no sequence everything is returned.'''
+        if sequence is None:
+            sequence = self._sequence
+            status = self.status()
+            status['sequence'] = sequence
+            return status
+        with self._lock:
+            status = {'sequence': self._sequence, 'elapsed_time': self._elapsed_time()}
+            for field, changed in self._changed.items():
+                if changed > sequence:
+                    status[field] = self._value(field)
+            errors = self._added_since('errors', self._errors, sequence)
+            if errors:
+                status['errors'] = self._formatted_errors(errors)
+            scheduling_errors = self._kept_since(self._scheduling_errors, sequence)
+            if scheduling_errors:
+                status['scheduling_errors'] = scheduling_errors
+            axis = self._layer_stats.since(sequence)
+            if len(axis):
+                status['axis'] = self._layer_stats.axis(axis)
+                status['axis_extents'] = self._layer_stats.extents()
+            drip_times = self._kept_since(self._drip_times, sequence)
+            if drip_times:
+                status['drip_history'] = drip_times
+        return status
 
     def status(self):
+        with self._lock:
+            axis = self._layer_stats.all_axis()
         return {
             'start_time': self._start_time,
             'elapsed_time': self._elapsed_time(),
@@ -116,6 +281,13 @@ class MachineStatus(object):
             'drips_per_second': self._drips_per_second,
             'model_height': self._model_height,
             'skipped_layers': self._skipped_layers,
-            'drip_history': self._drip_history,
-            'axis': self._axis
+            'drip_history': list(self._drip_history),
+            'scheduling_errors': [seconds for sequence, seconds in self._scheduling_errors],
+            'axis': axis,
+            'axis_extents': self._layer_stats.extents(),
         }
+
+    _FIELDS = [
+        'start_time', 'current_layer', 'status', 'waiting_for_drips', 'height', 'drips',
+        'drips_per_second', 'model_height', 'skipped_layers',
+        ]
@@ -0,0 +1,88 @@
+import threading
+import time
+import logging
+from collections import deque
+from peachyprinter.infrastructure.messages import DripRecordedMessage, PrinterStatusMessage
+logger = logging.getLogger('peachy')
+
+LOSSLESS_MESSAGES = (DripRecordedMessage, PrinterStatusMessage)
+
+
+class MessageDispatcher(threading.Thread):
+    '''Decodes received messages and runs their handlers on its own thread so the USB read callback never waits on handler code.
+
+    Once queue_size messages are waiting new ones are dropped, except for the lossless message types
+    which are always queued as they are rare and losing them loses drips or printer state.
+    '''
+
+    def __init__(self, queue_size=256, lossless=LOSSLESS_MESSAGES):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._queue_size = queue_size
+        self._lossless = lossless
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._running = False
+        self.received = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.errors = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_last = 0.0
+
+    def submit(self, message_type, payload, handlers):
+        self.received += 1
+        with self._condition:
+            if len(self._queue) >= self._queue_size and not issubclass(message_type, self._lossless):
+                self.dropped += 1
+                logger.warning("Dispatch queue full dropping {}, {} dropped so far".format(message_type.__name__, self.dropped))
+                return
+            self._queue.append((time.time(), message_type, payload, handlers))
+            self._condition.notify()
+
+    def start(self):
+        self._running = True
+        threading.Thread.start(self)
+
+    def run(self):
+        while self._running:
+            with self._condition:
+                if not self._queue:
+                    self._condition.wait(0.1)
+                    continue
+                received_time, message_type, payload, handlers = self._queue.popleft()
+            self._dispatch(received_time, message_type, payload, handlers)
+
+    def _dispatch(self, received_time, message_type, payload, handlers):
+        latency = time.time() - received_time
+        self._latency_last = latency
+        self._latency_total += latency
+        if latency > self._latency_max:
+            self._latency_max = latency
+        try:
+            message = message_type.from_bytes(payload)
+            for handler in handlers:
+                handler(message)
+        except Exception as ex:
+            self.errors += 1
+            logger.error("Handler for {} failed: {}".format(message_type.__name__, ex))
+        self.dispatched += 1
+
+    def close(self):
+        self._running = False
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+    def stats(self):
+        dispatched = self.dispatched
+        return {
+            'queue_depth': len(self._queue),
+            'received': self.received,
+            'dispatched': dispatched,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'latency_last': self._latency_last,
+            'latency_max': self._latency_max,
+            'latency_average': self._latency_total / dispatched if dispatched else 0.0,
+        }
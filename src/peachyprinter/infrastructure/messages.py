@@ -3,7 +3,7 @@ import logging
 logger = logging.getLogger('peachy')
 
 try:
-    from messages_pb2 import Move, DripRecorded, SetDripCount, MoveToDripCount, IAm, EnterBootloader, GetAdcVal, ReturnAdcVal, PrinterStatus
+    from messages_pb2 import Move, DripRecorded, SetDripCount, MoveToDripCount, IAm, EnterBootloader, GetAdcVal, ReturnAdcVal, PrinterStatus, Hold, Dwell
 except Exception as ex:
     logger.error(
         "\033[91m Cannot import protobuf classes, Have you compiled your protobuf files?\033[0m")
@@ -13,6 +13,10 @@ except Exception as ex:
 class ProtoBuffableMessage(object):
     TYPE_ID = 0
 
+    @property
+    def cache_key(self):
+        return None
+
     def get_bytes(self):
         raise NotImplementedError()
 
@@ -41,6 +45,10 @@ class MoveMessage(ProtoBuffableMessage):
     def laser_power(self):
         return self._laser_power
 
+    @property
+    def cache_key(self):
+        return (self.TYPE_ID, self._x_pos, self._y_pos, self._laser_power)
+
     def get_bytes(self):
         encoded = Move()
         encoded.x = self._x_pos
@@ -396,4 +404,126 @@ class PrinterStatusMessage(ProtoBuffableMessage):
             return False
 
     def __repr__(self):
-        return "cardInserted = {} overrideSwitch = {} keyInserted = {} laserOn = {} laserPowerFeedback  = {}".format(self._cardInserted, self._overrideSwitch, self._keyInserted, self._laserOn, self._laserPowerFeedback)
\ No newline at end of file
+        return "cardInserted = {} overrideSwitch = {} keyInserted = {} laserOn = {} laserPowerFeedback  = {}".format(self._cardInserted, self._overrideSwitch, self._keyInserted, self._laserOn, self._laserPowerFeedback)
+
+
+class HoldMessage(ProtoBuffableMessage):
+    TYPE_ID = 15
+
+    def __init__(self, x_pos, y_pos, laser_power, count):
+        self._x_pos = x_pos
+        self._y_pos = y_pos
+        self._laser_power = laser_power
+        self._count = count
+
+    @property
+    def x_pos(self):
+        return self._x_pos
+
+    @property
+    def y_pos(self):
+        return self._y_pos
+
+    @property
+    def laser_power(self):
+        return self._laser_power
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def cache_key(self):
+        return (self.TYPE_ID, self._x_pos, self._y_pos, self._laser_power, self._count)
+
+    def move_message(self):
+        return MoveMessage(self._x_pos, self._y_pos, self._laser_power)
+
+    def get_bytes(self):
+        encoded = Hold()
+        encoded.x = self._x_pos
+        encoded.y = self._y_pos
+        encoded.laserPower = self._laser_power
+        encoded.count = self._count
+        if encoded.IsInitialized():
+            return encoded.SerializeToString()
+        else:
+            logger.error("Protobuf Message encoding incomplete. Did the spec change? Have you compiled your proto files?")
+            raise Exception("Protobuf Message encoding incomplete")
+
+    @classmethod
+    def from_bytes(cls, proto_bytes):
+        decoded = Hold()
+        decoded.ParseFromString(proto_bytes)
+        return cls(decoded.x, decoded.y, decoded.laserPower, decoded.count)
+
+    def __eq__(self, other):
+        if (self.__class__ == other.__class__ and
+                self._x_pos == other._x_pos and
+                self._y_pos == other._y_pos and
+                self._laser_power == other._laser_power and
+                self._count == other._count):
+            return True
+        else:
+            return False
+
+    def __repr__(self):
+        return "x:y={}:{}, laser_power={}, count={}".format(self._x_pos, self._y_pos, self._laser_power, self._count)
+
+
+class DwellMessage(ProtoBuffableMessage):
+    '''Holds a position with the laser off for a time kept by the firmware'''
+    TYPE_ID = 16
+
+    def __init__(self, x_pos, y_pos, milliseconds):
+        self._x_pos = x_pos
+        self._y_pos = y_pos
+        self._milliseconds = milliseconds
+
+    @property
+    def x_pos(self):
+        return self._x_pos
+
+    @property
+    def y_pos(self):
+        return self._y_pos
+
+    @property
+    def milliseconds(self):
+        return self._milliseconds
+
+    @property
+    def cache_key(self):
+        return (self.TYPE_ID, self._x_pos, self._y_pos, self._milliseconds)
+
+    def hold_message(self, data_rate):
+        return HoldMessage(self._x_pos, self._y_pos, 0, int(self._milliseconds * data_rate / 1000))
+
+    def get_bytes(self):
+        encoded = Dwell()
+        encoded.x = self._x_pos
+        encoded.y = self._y_pos
+        encoded.milliseconds = self._milliseconds
+        if encoded.IsInitialized():
+            return encoded.SerializeToString()
+        else:
+            logger.error("Protobuf Message encoding incomplete. Did the spec change? Have you compiled your proto files?")
+            raise Exception("Protobuf Message encoding incomplete")
+
+    @classmethod
+    def from_bytes(cls, proto_bytes):
+        decoded = Dwell()
+        decoded.ParseFromString(proto_bytes)
+        return cls(decoded.x, decoded.y, decoded.milliseconds)
+
+    def __eq__(self, other):
+        if (self.__class__ == other.__class__ and
+                self._x_pos == other._x_pos and
+                self._y_pos == other._y_pos and
+                self._milliseconds == other._milliseconds):
+            return True
+        else:
+            return False
+
+    def __repr__(self):
+        return "x:y={}:{}, milliseconds={}".format(self._x_pos, self._y_pos, self._milliseconds)
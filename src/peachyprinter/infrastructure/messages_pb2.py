@@ -1,3 +1,4 @@
+# -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: messages.proto
 
@@ -7,7 +8,6 @@ from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
 from google.protobuf import reflection as _reflection
 from google.protobuf import symbol_database as _symbol_database
-from google.protobuf import descriptor_pb2
 # @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
@@ -18,9 +18,10 @@ _sym_db = _symbol_database.Default()
 DESCRIPTOR = _descriptor.FileDescriptor(
   name='messages.proto',
   package='',
-  serialized_pb=_b('\n\x0emessages.proto\"0\n\x04Move\x12\t\n\x01x\x18\x01 \x02(\x05\x12\t\n\x01y\x18\x02 \x02(\x05\x12\x12\n\nlaserPower\x18\x03 \x02(\r\"\x1d\n\x0c\x44ripRecorded\x12\r\n\x05\x64rips\x18\x01 \x02(\r\"\x1d\n\x0cSetDripCount\x12\r\n\x05\x64rips\x18\x01 \x02(\r\" \n\x0fMoveToDripCount\x12\r\n\x05\x64rips\x18\x01 \x02(\r\"\n\n\x08Identify\"\x1b\n\tGetAdcVal\x12\x0e\n\x06\x61\x64\x63Num\x18\x01 \x02(\r\"\x1e\n\x0cReturnAdcVal\x12\x0e\n\x06\x61\x64\x63Val\x18\x01 \x02(\r\"\x11\n\x0f\x45nterBootloader\"A\n\x03IAm\x12\r\n\x05swrev\x18\x01 \x02(\t\x12\r\n\x05hwrev\x18\x02 \x02(\t\x12\n\n\x02sn\x18\x03 \x02(\t\x12\x10\n\x08\x64\x61taRate\x18\x04 \x02(\r\"\x7f\n\rPrinterStatus\x12\x14\n\x0c\x63\x61rdInserted\x18\x01 \x02(\x08\x12\x16\n\x0eoverrideSwitch\x18\x02 \x02(\x08\x12\x13\n\x0bkeyInserted\x18\x03 \x02(\x08\x12\x0f\n\x07laserOn\x18\x04 \x02(\x08\x12\x1a\n\x12laserPowerFeedback\x18\x05 \x02(\x05')
+  syntax='proto2',
+  serialized_options=None,
+  serialized_pb=_b('\n\x0emessages.proto\"0\n\x04Move\x12\t\n\x01x\x18\x01 \x02(\x05\x12\t\n\x01y\x18\x02 \x02(\x05\x12\x12\n\nlaserPower\x18\x03 \x02(\r\"\x1d\n\x0c\x44ripRecorded\x12\r\n\x05\x64rips\x18\x01 \x02(\r\"\x1d\n\x0cSetDripCount\x12\r\n\x05\x64rips\x18\x01 \x02(\r\" \n\x0fMoveToDripCount\x12\r\n\x05\x64rips\x18\x01 \x02(\r\"\n\n\x08Identify\"\x1b\n\tGetAdcVal\x12\x0e\n\x06\x61\x64\x63Num\x18\x01 \x02(\r\"\x1e\n\x0cReturnAdcVal\x12\x0e\n\x06\x61\x64\x63Val\x18\x01 \x02(\r\"\x11\n\x0f\x45nterBootloader\"A\n\x03IAm\x12\r\n\x05swrev\x18\x01 \x02(\t\x12\r\n\x05hwrev\x18\x02 \x02(\t\x12\n\n\x02sn\x18\x03 \x02(\t\x12\x10\n\x08\x64\x61taRate\x18\x04 \x02(\r\"\x7f\n\rPrinterStatus\x12\x14\n\x0c\x63\x61rdInserted\x18\x01 \x02(\x08\x12\x16\n\x0eoverrideSwitch\x18\x02 \x02(\x08\x12\x13\n\x0bkeyInserted\x18\x03 \x02(\x08\x12\x0f\n\x07laserOn\x18\x04 \x02(\x08\x12\x1a\n\x12laserPowerFeedback\x18\x05 \x02(\x05\"?\n\x04Hold\x12\t\n\x01x\x18\x01 \x02(\x05\x12\t\n\x01y\x18\x02 \x02(\x05\x12\x12\n\nlaserPower\x18\x03 \x02(\r\x12\r\n\x05\x63ount\x18\x04 \x02(\r\"3\n\x05\x44well\x12\t\n\x01x\x18\x01 \x02(\x05\x12\t\n\x01y\x18\x02 \x02(\x05\x12\x14\n\x0cmilliseconds\x18\x03 \x02(\r')
 )
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
 
 
@@ -38,29 +39,30 @@ _MOVE = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='y', full_name='Move.y', index=1,
       number=2, type=5, cpp_type=1, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='laserPower', full_name='Move.laserPower', index=2,
       number=3, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -82,15 +84,16 @@ _DRIPRECORDED = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -112,15 +115,16 @@ _SETDRIPCOUNT = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -142,15 +146,16 @@ _MOVETODRIPCOUNT = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -172,8 +177,9 @@ _IDENTIFY = _descriptor.Descriptor(
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -195,15 +201,16 @@ _GETADCVAL = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -225,15 +232,16 @@ _RETURNADCVAL = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -255,8 +263,9 @@ _ENTERBOOTLOADER = _descriptor.Descriptor(
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -278,36 +287,37 @@ _IAM = _descriptor.Descriptor(
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='hwrev', full_name='IAm.hwrev', index=1,
       number=2, type=9, cpp_type=9, label=2,
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='sn', full_name='IAm.sn', index=2,
       number=3, type=9, cpp_type=9, label=2,
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='dataRate', full_name='IAm.dataRate', index=3,
       number=4, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -329,43 +339,44 @@ _PRINTERSTATUS = _descriptor.Descriptor(
       has_default_value=False, default_value=False,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='overrideSwitch', full_name='PrinterStatus.overrideSwitch', index=1,
       number=2, type=8, cpp_type=7, label=2,
       has_default_value=False, default_value=False,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='keyInserted', full_name='PrinterStatus.keyInserted', index=2,
       number=3, type=8, cpp_type=7, label=2,
       has_default_value=False, default_value=False,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='laserOn', full_name='PrinterStatus.laserOn', index=3,
       number=4, type=8, cpp_type=7, label=2,
       has_default_value=False, default_value=False,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='laserPowerFeedback', full_name='PrinterStatus.laserPowerFeedback', index=4,
       number=5, type=5, cpp_type=1, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
+  syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
@@ -373,6 +384,103 @@ _PRINTERSTATUS = _descriptor.Descriptor(
   serialized_end=450,
 )
 
+
+_HOLD = _descriptor.Descriptor(
+  name='Hold',
+  full_name='Hold',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='x', full_name='Hold.x', index=0,
+      number=1, type=5, cpp_type=1, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='y', full_name='Hold.y', index=1,
+      number=2, type=5, cpp_type=1, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='laserPower', full_name='Hold.laserPower', index=2,
+      number=3, type=13, cpp_type=3, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='count', full_name='Hold.count', index=3,
+      number=4, type=13, cpp_type=3, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=452,
+  serialized_end=515,
+)
+
+
+_DWELL = _descriptor.Descriptor(
+  name='Dwell',
+  full_name='Dwell',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='x', full_name='Dwell.x', index=0,
+      number=1, type=5, cpp_type=1, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='y', full_name='Dwell.y', index=1,
+      number=2, type=5, cpp_type=1, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='milliseconds', full_name='Dwell.milliseconds', index=2,
+      number=3, type=13, cpp_type=3, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=517,
+  serialized_end=568,
+)
+
 DESCRIPTOR.message_types_by_name['Move'] = _MOVE
 DESCRIPTOR.message_types_by_name['DripRecorded'] = _DRIPRECORDED
 DESCRIPTOR.message_types_by_name['SetDripCount'] = _SETDRIPCOUNT
@@ -383,76 +491,93 @@ DESCRIPTOR.message_types_by_name['ReturnAdcVal'] = _RETURNADCVAL
 DESCRIPTOR.message_types_by_name['EnterBootloader'] = _ENTERBOOTLOADER
 DESCRIPTOR.message_types_by_name['IAm'] = _IAM
 DESCRIPTOR.message_types_by_name['PrinterStatus'] = _PRINTERSTATUS
+DESCRIPTOR.message_types_by_name['Hold'] = _HOLD
+DESCRIPTOR.message_types_by_name['Dwell'] = _DWELL
+_sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
-Move = _reflection.GeneratedProtocolMessageType('Move', (_message.Message,), dict(
-  DESCRIPTOR = _MOVE,
-  __module__ = 'messages_pb2'
+Move = _reflection.GeneratedProtocolMessageType('Move', (_message.Message,), {
+  'DESCRIPTOR' : _MOVE,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:Move)
-  ))
+  })
 _sym_db.RegisterMessage(Move)
 
-DripRecorded = _reflection.GeneratedProtocolMessageType('DripRecorded', (_message.Message,), dict(
-  DESCRIPTOR = _DRIPRECORDED,
-  __module__ = 'messages_pb2'
+DripRecorded = _reflection.GeneratedProtocolMessageType('DripRecorded', (_message.Message,), {
+  'DESCRIPTOR' : _DRIPRECORDED,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:DripRecorded)
-  ))
+  })
 _sym_db.RegisterMessage(DripRecorded)
 
-SetDripCount = _reflection.GeneratedProtocolMessageType('SetDripCount', (_message.Message,), dict(
-  DESCRIPTOR = _SETDRIPCOUNT,
-  __module__ = 'messages_pb2'
+SetDripCount = _reflection.GeneratedProtocolMessageType('SetDripCount', (_message.Message,), {
+  'DESCRIPTOR' : _SETDRIPCOUNT,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:SetDripCount)
-  ))
+  })
 _sym_db.RegisterMessage(SetDripCount)
 
-MoveToDripCount = _reflection.GeneratedProtocolMessageType('MoveToDripCount', (_message.Message,), dict(
-  DESCRIPTOR = _MOVETODRIPCOUNT,
-  __module__ = 'messages_pb2'
+MoveToDripCount = _reflection.GeneratedProtocolMessageType('MoveToDripCount', (_message.Message,), {
+  'DESCRIPTOR' : _MOVETODRIPCOUNT,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:MoveToDripCount)
-  ))
+  })
 _sym_db.RegisterMessage(MoveToDripCount)
 
-Identify = _reflection.GeneratedProtocolMessageType('Identify', (_message.Message,), dict(
-  DESCRIPTOR = _IDENTIFY,
-  __module__ = 'messages_pb2'
+Identify = _reflection.GeneratedProtocolMessageType('Identify', (_message.Message,), {
+  'DESCRIPTOR' : _IDENTIFY,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:Identify)
-  ))
+  })
 _sym_db.RegisterMessage(Identify)
 
-GetAdcVal = _reflection.GeneratedProtocolMessageType('GetAdcVal', (_message.Message,), dict(
-  DESCRIPTOR = _GETADCVAL,
-  __module__ = 'messages_pb2'
+GetAdcVal = _reflection.GeneratedProtocolMessageType('GetAdcVal', (_message.Message,), {
+  'DESCRIPTOR' : _GETADCVAL,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:GetAdcVal)
-  ))
+  })
 _sym_db.RegisterMessage(GetAdcVal)
 
-ReturnAdcVal = _reflection.GeneratedProtocolMessageType('ReturnAdcVal', (_message.Message,), dict(
-  DESCRIPTOR = _RETURNADCVAL,
-  __module__ = 'messages_pb2'
+ReturnAdcVal = _reflection.GeneratedProtocolMessageType('ReturnAdcVal', (_message.Message,), {
+  'DESCRIPTOR' : _RETURNADCVAL,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:ReturnAdcVal)
-  ))
+  })
 _sym_db.RegisterMessage(ReturnAdcVal)
 
-EnterBootloader = _reflection.GeneratedProtocolMessageType('EnterBootloader', (_message.Message,), dict(
-  DESCRIPTOR = _ENTERBOOTLOADER,
-  __module__ = 'messages_pb2'
+EnterBootloader = _reflection.GeneratedProtocolMessageType('EnterBootloader', (_message.Message,), {
+  'DESCRIPTOR' : _ENTERBOOTLOADER,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:EnterBootloader)
-  ))
+  })
 _sym_db.RegisterMessage(EnterBootloader)
 
-IAm = _reflection.GeneratedProtocolMessageType('IAm', (_message.Message,), dict(
-  DESCRIPTOR = _IAM,
-  __module__ = 'messages_pb2'
+IAm = _reflection.GeneratedProtocolMessageType('IAm', (_message.Message,), {
+  'DESCRIPTOR' : _IAM,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:IAm)
-  ))
+  })
 _sym_db.RegisterMessage(IAm)
 
-PrinterStatus = _reflection.GeneratedProtocolMessageType('PrinterStatus', (_message.Message,), dict(
-  DESCRIPTOR = _PRINTERSTATUS,
-  __module__ = 'messages_pb2'
+PrinterStatus = _reflection.GeneratedProtocolMessageType('PrinterStatus', (_message.Message,), {
+  'DESCRIPTOR' : _PRINTERSTATUS,
+  '__module__' : 'messages_pb2'
   # @@protoc_insertion_point(class_scope:PrinterStatus)
-  ))
+  })
 _sym_db.RegisterMessage(PrinterStatus)
 
+Hold = _reflection.GeneratedProtocolMessageType('Hold', (_message.Message,), {
+  'DESCRIPTOR' : _HOLD,
+  '__module__' : 'messages_pb2'
+  # @@protoc_insertion_point(class_scope:Hold)
+  })
+_sym_db.RegisterMessage(Hold)
+
+Dwell = _reflection.GeneratedProtocolMessageType('Dwell', (_message.Message,), {
+  'DESCRIPTOR' : _DWELL,
+  '__module__' : 'messages_pb2'
+  # @@protoc_insertion_point(class_scope:Dwell)
+  })
+_sym_db.RegisterMessage(Dwell)
+
 
 # @@protoc_insertion_point(module_scope)
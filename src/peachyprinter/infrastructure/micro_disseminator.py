@@ -1,8 +1,9 @@
 import logging
 logger = logging.getLogger('peachy')
 import sys
+import numpy
 from peachyprinter.domain.disseminator import Disseminator
-from peachyprinter.infrastructure.messages import MoveMessage
+from peachyprinter.infrastructure.messages import MoveMessage, HoldMessage, DwellMessage
 
 
 class MicroDisseminator(Disseminator):
@@ -15,12 +16,47 @@ class MicroDisseminator(Disseminator):
         self.DEFLECTION_MAX = pow(2, self.BIT_DEPTH) - 1
 
     def process(self, data):
+        if len(data) == 0:
+            return
         laser_power = int(self._laser_control.laser_power() * self.LASER_MAX)
-        for (x, y) in data:
-            x_scaled = int(x * self.DEFLECTION_MAX)
-            y_scaled = int(y * self.DEFLECTION_MAX)
-            data = MoveMessage(x_scaled, y_scaled, laser_power)
-            self._communication.send(data)
+        scaled = (numpy.asarray(data) * self.DEFLECTION_MAX).astype(numpy.int64)
+        for ((x_scaled, y_scaled), count) in self._runs(scaled):
+            if count == 1:
+                message = MoveMessage(x_scaled, y_scaled, laser_power)
+            else:
+                message = HoldMessage(x_scaled, y_scaled, laser_power, count)
+            self._communication.send(message)
+
+    def hold(self, (x, y), count):
+        if count < 1:
+            return
+        laser_power = int(self._laser_control.laser_power() * self.LASER_MAX)
+        x_scaled = int(x * self.DEFLECTION_MAX)
+        y_scaled = int(y * self.DEFLECTION_MAX)
+        if count == 1:
+            self._communication.send(MoveMessage(x_scaled, y_scaled, laser_power))
+        else:
+            self._communication.send(HoldMessage(x_scaled, y_scaled, laser_power, count))
+
+    def dwell(self, (x, y), duration):
+        '''Holds the point with the laser off for duration seconds as one message when the printer supports it'''
+        if not self._communication.dwell_supported:
+            self.hold((x, y), int(self._data_rate * duration))
+            return
+        milliseconds = int(duration * 1000)
+        if milliseconds < 1:
+            return
+        self._communication.send(DwellMessage(int(x * self.DEFLECTION_MAX), int(y * self.DEFLECTION_MAX), milliseconds))
+
+    def _runs(self, scaled):
+        '''Collapses identical consecutive samples into (sample, repeat count) pairs'''
+        changed = numpy.any(scaled[1:] != scaled[:-1], axis=1)
+        starts = numpy.concatenate(([0], numpy.flatnonzero(changed) + 1))
+        counts = numpy.diff(numpy.append(starts, len(scaled)))
+        return zip(scaled[starts].tolist(), counts.tolist())
+
+    def discard_pending(self):
+        self._communication.discard_pending()
 
     def next_layer(self, height):
         pass
@@ -58,6 +58,11 @@ class PathToPoints(object):
                 else:
                     return self._get_points(start, end, samples)
 
+    def point(self, position):
+        '''Transforms a single position without generating a path'''
+        with self._lock:
+            return self._transformer.transform(position)
+
     def set_transformer(self, transformer):
         with self._lock:
             self._transformer = transformer
@@ -0,0 +1,123 @@
+import threading
+import logging
+import Queue as queue
+from peachyprinter.domain.layer_generator import LayerGenerator
+from peachyprinter.infrastructure.clock import monotonic
+
+logger = logging.getLogger('peachy')
+
+_upstream = threading.local()
+
+
+def take_upstream_wait():
+    '''Seconds the current thread has spent waiting on PipelineStages since the last call'''
+    waited = getattr(_upstream, 'seconds', 0.0)
+    _upstream.seconds = 0.0
+    return waited
+
+
+class StageStats(object):
+    '''Time a pipeline stage spends working, waiting on the stage before it and blocked on the stage after it'''
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._start = monotonic()
+        self.items = 0
+        self.busy_time = 0.0
+        self.waiting_time = 0.0
+        self.blocked_time = 0.0
+
+    def record(self, busy, waiting=0.0, blocked=0.0):
+        with self._lock:
+            self.items += 1
+            self.busy_time += busy
+            self.waiting_time += waiting
+            self.blocked_time += blocked
+
+    def stats(self, queue_depth=None, queue_size=None):
+        with self._lock:
+            elapsed = max(monotonic() - self._start, 1e-9)
+            return {
+                'name': self.name,
+                'items': self.items,
+                'busy_time': self.busy_time,
+                'waiting_time': self.waiting_time,
+                'blocked_time': self.blocked_time,
+                'utilization': min(1.0, self.busy_time / elapsed),
+                'queue_depth': queue_depth,
+                'queue_size': queue_size,
+            }
+
+
+class PipelineStage(LayerGenerator):
+    '''Runs a layer source, and optionally process on each layer, on its own thread into a bounded queue.
+
+    Stages chain by using one stage as the source of the next. Errors raised by the source or by
+    process are raised from next in order with the layers before them.
+    '''
+
+    def __init__(self, name, source, process=None, queue_size=2):
+        self._name = name
+        self._source = source
+        self._process = process
+        self._queue_size = queue_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stats = StageStats(name)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def name(self):
+        return self._name
+
+    def _run(self):
+        take_upstream_wait()
+        try:
+            while self._running:
+                start = monotonic()
+                try:
+                    item = self._source.next()
+                except StopIteration:
+                    self._put(StopIteration())
+                    return
+                if self._process:
+                    item = self._process(item)
+                produced = monotonic()
+                waiting = take_upstream_wait()
+                if not self._put(item):
+                    return
+                self._stats.record(produced - start - waiting, waiting, monotonic() - produced)
+        except Exception as ex:
+            logger.error("%s stage failed: %s" % (self._name, ex))
+            self._put(ex)
+
+    def _put(self, item):
+        while self._running:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def next(self):
+        start = monotonic()
+        item = self._queue.get()
+        _upstream.seconds = getattr(_upstream, 'seconds', 0.0) + monotonic() - start
+        if isinstance(item, Exception):
+            self._queue.put(item)
+            raise item
+        return item
+
+    def stats(self):
+        return self._stats.stats(self._queue.qsize(), self._queue_size)
+
+    def close(self):
+        self._running = False
+        try:
+            self._queue.put_nowait(StopIteration())
+        except queue.Full:
+            pass
@@ -0,0 +1,184 @@
+import ctypes
+import threading
+import logging
+import multiprocessing
+import Queue as queue
+from peachyprinter.domain.layer_generator import LayerGenerator
+from peachyprinter.infrastructure.clock import monotonic
+from peachyprinter.infrastructure.pipeline import StageStats
+
+logger = logging.getLogger('peachy')
+
+
+class SharedRing(object):
+    '''Byte ring in shared memory with one writing and one reading process.
+
+    Records are never split across the end of the ring so each can be read in place.
+    Positions are byte counts since the start, a record ends at the position returned by write.
+    '''
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buffer = multiprocessing.RawArray(ctypes.c_char, capacity)
+        self._written = multiprocessing.RawValue(ctypes.c_ulonglong, 0)
+        self._released = multiprocessing.RawValue(ctypes.c_ulonglong, 0)
+        self._condition = multiprocessing.Condition()
+        self._stopped = multiprocessing.RawValue(ctypes.c_bool, False)
+
+    def write(self, data):
+        '''Copies data into the ring waiting for space, returns the offset and end position or None when stopped'''
+        length = len(data)
+        if length > self.capacity:
+            raise Exception("Layer of %d bytes does not fit in a render ring of %d bytes" % (length, self.capacity))
+        with self._condition:
+            offset = self._written.value % self.capacity
+            padding = self.capacity - offset if offset + length > self.capacity else 0
+            needed = min(self._written.value, self._written.value + padding + length - self.capacity)
+            while self._released.value < needed:
+                if self._stopped.value:
+                    return None
+                self._condition.wait(0.1)
+            if padding:
+                offset = 0
+            ctypes.memmove(ctypes.addressof(self._buffer) + offset, data, length)
+            self._written.value += padding + length
+            return offset, self._written.value
+
+    def view(self, offset, length):
+        '''The bytes of a record in place'''
+        return buffer(self._buffer, offset, length)
+
+    def release(self, end):
+        '''Frees the ring up to the end position of a record that has been read'''
+        with self._condition:
+            self._released.value = end
+            self._condition.notify_all()
+
+    def stop(self):
+        with self._condition:
+            self._stopped.value = True
+            self._condition.notify_all()
+
+
+class ProcessRenderedLayer(object):
+    def __init__(self, z, offset, length, ring_end, axis, end):
+        self.z = z
+        self.offset = offset
+        self.length = length
+        self.ring_end = ring_end
+        self.axis = axis
+        self.end = end
+        self.commands = []
+
+    def __str__(self):
+        return "ProcessRenderedLayer[Z:%f,Bytes:%d]" % (self.z, self.length)
+
+
+def _render_layers(renderer_factory, layers, rendered, ring):
+    renderer = renderer_factory()
+    while True:
+        layer = layers.get()
+        if layer is None:
+            rendered.put(None)
+            return
+        try:
+            start = monotonic()
+            result = renderer.render(layer)
+            data = ''.join(result.frames)
+            busy = monotonic() - start
+            placed = ring.write(data)
+            if placed is None:
+                return
+            offset, ring_end = placed
+            rendered.put((result.z, offset, len(data), ring_end, result.axis, result.end, busy))
+        except Exception as ex:
+            rendered.put(str(ex))
+            return
+
+
+class ProcessRenderingLayerGenerator(LayerGenerator):
+    '''Renders layers in a separate process into a SharedRing.
+
+    renderer_factory is called in the render process to build a LayerRenderer and must be picklable.
+    Layers yielded hold the ring position of their frames, read returns a buffer over them in the ring
+    and the space is reused once the next layer is requested. Use with a CompiledLayerWriter, which copies
+    each frame out as it sends it since the send queue and the usb write need frames that outlive the ring space.
+    '''
+
+    def __init__(self, layer_generator, renderer_factory, ring_size=32 * 1024 * 1024, lookahead=3):
+        self._layer_generator = layer_generator
+        self._ring = SharedRing(ring_size)
+        self._lookahead = lookahead
+        self._layers = multiprocessing.Queue(lookahead)
+        self._rendered = multiprocessing.Queue()
+        self._previous = None
+        self._done = False
+        self._running = True
+        self._stats = StageStats('render')
+        self._process = multiprocessing.Process(target=_render_layers, args=(renderer_factory, self._layers, self._rendered, self._ring), name='Renderer')
+        self._process.daemon = True
+        self._process.start()
+        self._feeder = threading.Thread(target=self._feed, name='RenderFeeder')
+        self._feeder.daemon = True
+        self._feeder.start()
+
+    def _feed(self):
+        try:
+            for layer in self._layer_generator:
+                if not self._put(layer):
+                    return
+        except Exception as ex:
+            logger.error("Reading layers failed: %s" % ex)
+            self._rendered.put(str(ex))
+            return
+        self._put(None)
+
+    def _put(self, layer):
+        while self._running:
+            try:
+                self._layers.put(layer, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def next(self):
+        if self._previous:
+            self._ring.release(self._previous.ring_end)
+            self._previous = None
+        if self._done:
+            raise StopIteration()
+        while True:
+            try:
+                item = self._rendered.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if not self._running:
+                    raise StopIteration()
+                if not self._process.is_alive():
+                    self._done = True
+                    raise Exception("Render process stopped unexpectedly")
+        if item is None:
+            self._done = True
+            raise StopIteration()
+        if isinstance(item, str):
+            self._done = True
+            raise Exception("Rendering failed: %s" % item)
+        self._stats.record(item[-1])
+        self._previous = ProcessRenderedLayer(*item[:-1])
+        return self._previous
+
+    def read(self, layer):
+        return self._ring.view(layer.offset, layer.length)
+
+    def stats(self):
+        return self._stats.stats(self._rendered.qsize(), self._lookahead)
+
+    def close(self):
+        if not self._running:
+            return
+        self._running = False
+        self._ring.stop()
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join()
@@ -0,0 +1,113 @@
+import atexit
+import heapq
+import itertools
+import threading
+import logging
+from peachyprinter.infrastructure.clock import monotonic
+
+logger = logging.getLogger('peachy')
+
+
+class Timer(object):
+    def __init__(self, function, interval=None):
+        self.function = function
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler(object):
+    '''Runs timed calls from a single thread ordered on a heap by monotonic due time.
+
+    Calls run on the scheduler thread so they should return quickly. Repeating calls that fall
+    behind skip the missed calls rather than running in a burst.
+    '''
+
+    def __init__(self, name='Scheduler'):
+        self._name = name
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = True
+
+    def call_at(self, due, function, interval=None):
+        '''Calls function at the monotonic time due, then every interval seconds if given'''
+        timer = Timer(function, interval)
+        self._push(due, timer)
+        return timer
+
+    def call_later(self, delay, function):
+        return self.call_at(monotonic() + delay, function)
+
+    def call_every(self, interval, function):
+        return self.call_at(monotonic() + interval, function, interval)
+
+    def pending(self):
+        with self._condition:
+            return len([entry for entry in self._heap if not entry[2].cancelled])
+
+    def _push(self, due, timer):
+        with self._condition:
+            heapq.heappush(self._heap, (due, next(self._sequence), timer))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name)
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+
+    def _next(self):
+        with self._condition:
+            while self._running:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                due, sequence, timer = self._heap[0]
+                if timer.cancelled:
+                    heapq.heappop(self._heap)
+                    continue
+                remaining = due - monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+                return due, timer
+        return None, None
+
+    def _run(self):
+        while True:
+            due, timer = self._next()
+            if timer is None:
+                return
+            try:
+                timer.function()
+            except Exception as ex:
+                logger.error("Scheduled call %s failed: %s" % (timer.function, ex))
+            if timer.interval and not timer.cancelled:
+                next_due = due + timer.interval
+                now = monotonic()
+                if next_due < now:
+                    next_due = now + timer.interval
+                self._push(next_due, timer)
+
+    def close(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def default_scheduler():
+    '''The Scheduler shared by emulated devices in this process'''
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = Scheduler('SharedScheduler')
+            atexit.register(_default_scheduler.close)
+        return _default_scheduler
@@ -0,0 +1,107 @@
+import threading
+import time
+import logging
+import Queue as queue
+from Queue import Empty, Full
+logger = logging.getLogger('peachy')
+
+
+class SendQueue(threading.Thread):
+    '''Writes pre-framed buffers to the device on its own thread, blocking producers when the queue is full.
+
+    While paused queued buffers are kept and laser_off, if given, is called with the last buffer
+    written to get a buffer that is written once to turn the laser off at that position.
+    '''
+
+    def __init__(self, write, stats, queue_size=1000, laser_off=None):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._write = write
+        self._stats = stats
+        self._queue_size = queue_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._laser_off = laser_off
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._last = None
+        self._running = False
+        self.error = None
+
+    def put(self, data, repeats=1):
+        item = (data, repeats)
+        try:
+            self._queue.put_nowait(item)
+        except Full:
+            blocked_start = time.time()
+            while self._running:
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    break
+                except Full:
+                    pass
+            self._stats.record_blocked(time.time() - blocked_start)
+
+    def discard(self):
+        '''Drops buffers not yet written, returning how many were dropped'''
+        dropped = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+                dropped += 1
+            except Empty:
+                return dropped
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    @property
+    def size(self):
+        return self._queue_size
+
+    def start(self):
+        self._running = True
+        threading.Thread.start(self)
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def run(self):
+        while self._running:
+            try:
+                data, repeats = self._queue.get(timeout=0.1)
+            except Empty:
+                if not self._resumed.is_set():
+                    self._wait_while_paused()
+                continue
+            if not self._resumed.is_set():
+                self._wait_while_paused()
+            if not self._running or not self._send(data, repeats):
+                return
+            self._last = data
+
+    def _send(self, data, repeats):
+        try:
+            self._write(data, repeats)
+            return True
+        except Exception as ex:
+            logger.error("Send queue write failed: {}".format(ex))
+            self.error = ex
+            self._running = False
+            return False
+
+    def _wait_while_paused(self):
+        if self._laser_off and self._last:
+            off = self._laser_off(self._last)
+            if off and not self._send(off, 1):
+                return
+        while self._running and not self._resumed.wait(0.1):
+            pass
+
+    def close(self):
+        self._running = False
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
@@ -0,0 +1,104 @@
+import os
+import mmap
+import time
+import struct
+import logging
+
+logger = logging.getLogger('peachy')
+
+SHARED_STATUS_MAGIC = 'PEACHYSS'
+SHARED_STATUS_VERSION = 1
+
+STATUSES = ['Starting', 'Running', 'Paused', 'Complete', 'Cancelled', 'Failed']
+
+_header = struct.Struct('<8sII')
+_version = struct.Struct('<Q')
+_body = struct.Struct('<QiiqBBxxxxxxddddid')
+
+_VERSION_OFFSET = _header.size
+_BODY_OFFSET = _VERSION_OFFSET + _version.size
+SHARED_STATUS_SIZE = _BODY_OFFSET + _body.size
+
+_FIELDS = [
+    'sequence', 'current_layer', 'skipped_layers', 'drips', 'status', 'waiting_for_drips',
+    'height', 'model_height', 'drips_per_second', 'start_time', 'errors', 'updated',
+    ]
+
+
+class SharedStatusWriter(object):
+    '''Keeps the status of a print in a memory mapped file other processes can read with SharedStatusReader.
+
+    File layout: an 8 byte magic, a version and the writers process id (uint32s), then a seqlock version
+    (uint64) that is odd while the status after it is being changed. The status is the MachineStatus
+    sequence (uint64), current layer and skipped layers (int32), drips (int64), status as an index of
+    STATUSES and waiting for drips (uint8), height, model height, drips per second and start time
+    (float64), errors (int32) and the wall clock time of the update (float64).
+
+    Only one thread may write at a time.
+    '''
+
+    def __init__(self, file_name):
+        self._file_name = file_name
+        self._file = open(file_name, 'w+b')
+        self._file.write('\0' * SHARED_STATUS_SIZE)
+        self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), SHARED_STATUS_SIZE)
+        self._version = 0
+        _header.pack_into(self._map, 0, SHARED_STATUS_MAGIC, SHARED_STATUS_VERSION, os.getpid())
+
+    def write(self, sequence, current_layer, skipped_layers, drips, status, waiting_for_drips, height, model_height, drips_per_second, start_time, errors):
+        self._version += 1
+        _version.pack_into(self._map, _VERSION_OFFSET, self._version)
+        _body.pack_into(
+            self._map, _BODY_OFFSET,
+            sequence, current_layer, skipped_layers, int(drips), STATUSES.index(status), waiting_for_drips,
+            height, model_height, drips_per_second, start_time, errors, time.time()
+            )
+        self._version += 1
+        _version.pack_into(self._map, _VERSION_OFFSET, self._version)
+
+    def close(self):
+        if self._map:
+            self._map.close()
+            self._map = None
+            self._file.close()
+
+
+class SharedStatusReader(object):
+    '''Reads the status a SharedStatusWriter keeps in file_name without locking or waiting for it'''
+
+    def __init__(self, file_name, retries=1000):
+        self._file = open(file_name, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), SHARED_STATUS_SIZE, access=mmap.ACCESS_READ)
+        self._retries = retries
+        magic, version, self.pid = _header.unpack_from(self._map, 0)
+        if magic != SHARED_STATUS_MAGIC:
+            raise Exception("%s is not a shared status" % file_name)
+        if version != SHARED_STATUS_VERSION:
+            raise Exception("Unsupported shared status version: %s" % version)
+
+    def read(self):
+        '''Returns a dictionary of the status fields, status is one of STATUSES'''
+        for attempt in xrange(self._retries):
+            before = _version.unpack_from(self._map, _VERSION_OFFSET)[0]
+            if before % 2:
+                continue
+            values = _body.unpack_from(self._map, _BODY_OFFSET)
+            if _version.unpack_from(self._map, _VERSION_OFFSET)[0] == before:
+                status = dict(zip(_FIELDS, values))
+                status['status'] = STATUSES[status['status']]
+                status['waiting_for_drips'] = bool(status['waiting_for_drips'])
+                return status
+        raise Exception("Shared status changing too fast to read")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def read_shared_status(file_name):
+    reader = SharedStatusReader(file_name)
+    try:
+        return reader.read()
+    finally:
+        reader.close()
@@ -2,23 +2,29 @@ import threading
 import time
 import math
 from peachyprinter.domain.zaxis import ZAxis
+from peachyprinter.infrastructure.clock import monotonic
+from peachyprinter.infrastructure.drip_history import DripHistory
+from peachyprinter.infrastructure.scheduler import default_scheduler
 import logging
 logger = logging.getLogger('peachy')
 
 
-class TimedDripZAxis(ZAxis, threading.Thread):
+class TimedDripZAxis(ZAxis):
     def __init__(self,
                  drips_per_mm,
                  starting_height,
                  call_back=None,
                  calls_back_per_second=15,
-                 drips_per_second=1.0
+                 drips_per_second=1.0,
+                 scheduler=None
                  ):
         ZAxis.__init__(self, starting_height)
-        threading.Thread.__init__(self)
 
         self._drips_per_mm = drips_per_mm
         self._drips_per_second = drips_per_second
+        self._scheduler = scheduler if scheduler else default_scheduler()
+        self._timer = None
+        self._lock = threading.Lock()
         self.shutdown = False
         self.running = False
         self.start_time = 0
@@ -26,74 +32,92 @@ class TimedDripZAxis(ZAxis, threading.Thread):
         self._time_to_wait = 1.0 / (calls_back_per_second * 1.0)
         self._last_drip = 0.0
         self._height_history = self._starting_height
-        self._drip_history = [time.time()]
-        self._drip_history_length = 500
+        self._drip_history = DripHistory(500)
+        self._drip_history.append(time.time())
+        self._recorded_drips = 0
 
     def set_call_back(self, call_back):
         self._call_back = call_back
 
     def set_drips_per_second(self, dps):
-        current_time = time.time() - self.start_time
+        current_time = monotonic() - self.start_time
         drips = current_time * self._drips_per_second
         self._last_drip = self._last_drip + drips
         self._height_history = self._height_history + (drips / self._drips_per_mm)
-        self.start_time = time.time()
+        self.start_time = monotonic()
         self._drips_per_second = dps
+        self._height_changed()
 
     def get_drips_per_second(self):
         return self._drips_per_second
 
     def set_drips_per_mm(self, drips_per_mm):
         self._drips_per_mm = drips_per_mm
+        self._height_changed()
+
+    def _seconds_to_height(self, height_mm):
+        if not self.running or self._drips_per_second <= 0:
+            return None
+        return (height_mm - self.current_z_location_mm()) * self._drips_per_mm / self._drips_per_second
+
+    def predicted_height(self, at_time):
+        if not self.running:
+            return self._height_history
+        elapsed = monotonic() - self.start_time + (at_time - time.time())
+        return self._height_history + (elapsed * self._drips_per_second) / self._drips_per_mm
+
+    @property
+    def prediction_confidence(self):
+        return 1.0 if self.running else 0.0
 
     def current_z_location_mm(self):
         if self.running:
-            current_time = time.time() - self.start_time
+            current_time = monotonic() - self.start_time
             height = (current_time * self._drips_per_second) / self._drips_per_mm
             return self._height_history + height
         else:
             return self._height_history
 
     def update_data(self):
-        if len(self._drip_history) > self._drip_history_length:
-            self._drip_history = self._drip_history[-self._drip_history_length:]
-        if self._call_back:
-            tme = time.time()
-            current_time = tme - self.start_time
-            drips = current_time * self._drips_per_second
-            height = drips / self._drips_per_mm
-            new_drips = int(math.floor((tme - self._drip_history[-1]) * self._drips_per_second))
-            for i in range(0, new_drips):
-                self._drip_history.append(tme)
-            self._call_back(math.ceil(self._last_drip + drips), self._height_history + height, self._drips_per_second, self._drip_history)
+        with self._lock:
+            if self._call_back and self.running:
+                self._update_data()
+
+    def _update_data(self):
+        drips = (monotonic() - self.start_time) * self._drips_per_second
+        height = drips / self._drips_per_mm
+        total_drips = int(math.floor(self._last_drip + drips))
+        if total_drips > self._recorded_drips:
+            self._drip_history.append(time.time(), total_drips - self._recorded_drips)
+            self._recorded_drips = total_drips
+        self._call_back(math.ceil(self._last_drip + drips), self._height_history + height, self._drips_per_second, self._drip_history.view())
 
     def start(self):
-        threading.Thread.start(self)
-        while self.start_time == 0:
-            time.sleep(0.1)
-
-    def run(self):
+        if self.running:
+            return
+        self.shutdown = False
         self.running = True
-        self.start_time = time.time()
-        while self.running:
-            start = time.time()
-            self.update_data()
-            delta = time.time() - start
-            time.sleep(max(0, self._time_to_wait - delta))
-        self.shutdown = True
+        self.start_time = monotonic()
+        self._timer = self._scheduler.call_every(self._time_to_wait, self.update_data)
+        self._height_changed()
+
+    def is_alive(self):
+        return self.running
 
     def move_to(self, height_mm):
         logger.info('Ignoring move to %s' % height_mm)
 
     def close(self):
-        if self.running:
-            self.running = False
-            while not self.shutdown:
-                time.sleep(0.1)
+        with self._lock:
+            if self.running:
+                self._timer.cancel()
+                self.running = False
+            self.shutdown = True
+        self._height_changed()
 
 
 class PhotoZAxis(ZAxis):
-    def __init__(self, starting_height, height_change_delay=1.0, call_back=None):
+    def __init__(self, starting_height, height_change_delay=1.0, call_back=None, scheduler=None):
         super(PhotoZAxis, self).__init__(starting_height)
         self._current_height = self._starting_height
         self._next_height = None
@@ -101,21 +125,39 @@ class PhotoZAxis(ZAxis):
         self._next_change = 0
         self._height_change_delay = height_change_delay
         self._call_back = call_back
+        self._scheduler = scheduler if scheduler else default_scheduler()
+        self._timer = None
+        self._lock = threading.RLock()
 
     def start(self):
         self.move_to(0)
 
     def close(self):
-        pass
+        if self._timer:
+            self._timer.cancel()
+
+    def _seconds_to_height(self, height_mm):
+        time_of_change = self._time_of_change
+        if time_of_change is None:
+            return None
+        return time_of_change - monotonic()
 
     def current_z_location_mm(self):
-        if (self._next_height is not None):
-            if (self._time_of_change and self._time_of_change <= time.time()):
-                self._current_height = self._next_height
-                self._next_height = None
-                self._time_of_change = None
-                self.callback()
-        return self._current_height
+        with self._lock:
+            if (self._next_height is not None):
+                if (self._time_of_change is not None and self._time_of_change <= monotonic()):
+                    self._change_height()
+            return self._current_height
+
+    def _change_height(self):
+        self._current_height = self._next_height
+        self._next_height = None
+        self._time_of_change = None
+        self.callback()
+        self._height_changed()
+
+    def _scheduled_change(self):
+        self.current_z_location_mm()
 
     def set_call_back(self, call_back):
         self._call_back = call_back
@@ -125,5 +167,10 @@ class PhotoZAxis(ZAxis):
             self._call_back(0, self._current_height, 0)
 
     def move_to(self, height_mm):
-        self._time_of_change = time.time() + self._height_change_delay
-        self._next_height = height_mm
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._time_of_change = monotonic() + self._height_change_delay
+            self._next_height = height_mm
+            self._timer = self._scheduler.call_at(self._time_of_change, self._scheduled_change)
+        self._height_changed()
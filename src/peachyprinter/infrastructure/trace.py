@@ -0,0 +1,112 @@
+import struct
+import time
+import logging
+from threading import Lock
+from peachyprinter.infrastructure.clock import monotonic
+logger = logging.getLogger('peachy')
+
+TRACE_MAGIC = 'PEACHYTR'
+TRACE_VERSION = 1
+OUTGOING = 0
+INCOMING = 1
+
+_header = struct.Struct('<8sB')
+_record = struct.Struct('<BdH')
+
+
+class TraceWriter(object):
+    '''Records framed messages with monotonic timestamps to a binary trace file.
+
+    File layout: an 8 byte magic and a version byte, then one record per message made of
+    direction (uint8), seconds since capture start (float64), length (uint16) and the bytes.
+    '''
+
+    def __init__(self, file_name, buffer_size=65536):
+        self._file = open(file_name, 'wb', buffer_size)
+        self._file.write(_header.pack(TRACE_MAGIC, TRACE_VERSION))
+        self._lock = Lock()
+        self._start = monotonic()
+        self.records = 0
+
+    def write(self, direction, data):
+        with self._lock:
+            if self._file:
+                self._file.write(_record.pack(direction, monotonic() - self._start, len(data)))
+                self._file.write(data)
+                self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+class TraceReader(object):
+    def __init__(self, file_name):
+        self._file_name = file_name
+
+    def __iter__(self):
+        with open(self._file_name, 'rb') as trace_file:
+            magic, version = _header.unpack(trace_file.read(_header.size))
+            if magic != TRACE_MAGIC:
+                raise Exception("%s is not a trace file" % self._file_name)
+            if version != TRACE_VERSION:
+                raise Exception("Unsupported trace version: %s" % version)
+            while True:
+                record = trace_file.read(_record.size)
+                if len(record) < _record.size:
+                    return
+                direction, timestamp, length = _record.unpack(record)
+                yield (direction, timestamp, trace_file.read(length))
+
+    def outgoing(self):
+        return ((timestamp, data) for (direction, timestamp, data) in self if direction == OUTGOING)
+
+
+class TraceReplayer(object):
+    '''Streams the outgoing frames of a trace to a device at the recorded pace or as fast as possible'''
+
+    def __init__(self, trace_file_name, device, original_pace=True):
+        self._reader = TraceReader(trace_file_name)
+        self._device = device
+        self._original_pace = original_pace
+        self._running = False
+        self.frames = 0
+        self.bytes = 0
+        self.max_lag = 0.0
+        self.write_time = 0.0
+        self.elapsed = 0.0
+
+    def replay(self):
+        self._running = True
+        start = monotonic()
+        for (timestamp, data) in self._reader.outgoing():
+            if not self._running:
+                break
+            if self._original_pace:
+                delay = timestamp - (monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+                elif -delay > self.max_lag:
+                    self.max_lag = -delay
+            write_start = monotonic()
+            self._device.write(data)
+            self.write_time += monotonic() - write_start
+            self.frames += 1
+            self.bytes += len(data)
+        self.elapsed = monotonic() - start
+        self._running = False
+        return self.stats()
+
+    def stop(self):
+        self._running = False
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'bytes': self.bytes,
+            'elapsed': self.elapsed,
+            'write_time': self.write_time,
+            'max_lag': self.max_lag,
+        }
@@ -0,0 +1,65 @@
+import time
+import threading
+from collections import deque
+import numpy
+
+
+class TransportStats(object):
+    '''Flow control telemetry for outgoing printer data'''
+
+    def __init__(self, latency_window=1000, rate_period=1.0):
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self._latencies = deque(maxlen=latency_window)
+        self._rate_period = rate_period
+        self._period_start = time.time()
+        self._period_bytes = 0
+        self._period_frames = 0
+        self._bytes_per_second = 0.0
+        self._frames_per_second = 0.0
+        self.total_bytes = 0
+        self.total_frames = 0
+        self.blocked_time = 0.0
+        self.write_time = 0.0
+
+    def record_write(self, byte_count, frame_count, latency):
+        with self._lock:
+            now = time.time()
+            self._latencies.append(latency)
+            self.total_bytes += byte_count
+            self.total_frames += frame_count
+            self.write_time += latency
+            elapsed = now - self._period_start
+            if elapsed >= self._rate_period:
+                self._bytes_per_second = self._period_bytes / elapsed
+                self._frames_per_second = self._period_frames / elapsed
+                self._period_start = now
+                self._period_bytes = 0
+                self._period_frames = 0
+            self._period_bytes += byte_count
+            self._period_frames += frame_count
+
+    def record_blocked(self, seconds):
+        with self._lock:
+            self.blocked_time += seconds
+
+    def _latency_percentiles(self):
+        if not self._latencies:
+            return (0.0, 0.0, 0.0)
+        return tuple(numpy.percentile(numpy.fromiter(self._latencies, dtype=float), [50, 90, 99]))
+
+    def stats(self):
+        with self._lock:
+            p50, p90, p99 = self._latency_percentiles()
+            return {
+                'bytes_per_second': self._bytes_per_second,
+                'frames_per_second': self._frames_per_second,
+                'total_bytes': self.total_bytes,
+                'total_frames': self.total_frames,
+                'write_time': self.write_time,
+                'write_latency_p50': p50,
+                'write_latency_p90': p90,
+                'write_latency_p99': p99,
+                'blocked_time': self.blocked_time,
+                'utilization': min(1.0, self.write_time / max(time.time() - self._start, 1e-9)),
+            }
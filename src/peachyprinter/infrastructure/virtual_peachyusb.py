@@ -0,0 +1,148 @@
+import os
+import time
+import ctypes
+import threading
+import logging
+from collections import deque
+import Queue as queue
+from Queue import Empty, Full
+from peachyprinter.infrastructure.messages import MoveMessage, HoldMessage, DwellMessage, IdentifyMessage, IAmMessage, DripRecordedMessage, SetDripCountMessage, MoveToDripCountMessage
+
+logger = logging.getLogger('peachy')
+
+
+class VirtualPeachyUSB(object):
+    '''Pure python stand in for PeachyUSB that consumes samples at the firmware data rate.
+
+    Select it by setting the PEACHY_VIRTUAL_USB environment variable. Rates can be set with
+    PEACHY_VIRTUAL_DATA_RATE and PEACHY_VIRTUAL_DRIPS_PER_SECOND.
+    '''
+    VERSION = 'virtual'
+    hold_supported = True
+    dwell_supported = True
+    SLEEP_THRESHOLD = 0.002
+
+    def __init__(self, capacity, data_rate=None, drips_per_second=None, serial_number='VIRTUAL', software_revision='virtual', hardware_revision='virtual'):
+        if data_rate is None:
+            data_rate = int(os.environ.get('PEACHY_VIRTUAL_DATA_RATE', 8000))
+        if drips_per_second is None:
+            drips_per_second = float(os.environ.get('PEACHY_VIRTUAL_DRIPS_PER_SECOND', 2.75))
+        self.data_rate = data_rate
+        self.drips_per_second = drips_per_second
+        self._capacity = capacity
+        self._identity = IAmMessage(software_revision, hardware_revision, serial_number, data_rate)
+        self._samples = queue.Queue(maxsize=max(1, capacity))
+        self._responses = deque()
+        self._read_callback = None
+        self._drips = 0
+        self._next_drip_time = None
+        self._sample_clock = None
+        self._running = True
+
+        self.position = None
+        self.samples_consumed = 0
+        self.frames_received = 0
+        self.underruns = 0
+        self.max_queue_depth = 0
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, buf):
+        index = 0
+        while index < len(buf):
+            length = ord(buf[index])
+            frame = buf[index + 1:index + 1 + length]
+            index += length + 1
+            self.frames_received += 1
+            self._handle(ord(frame[0]), frame[1:])
+
+    def _handle(self, type_id, payload):
+        if type_id == MoveMessage.TYPE_ID:
+            self._queue_samples(MoveMessage.from_bytes(payload), 1)
+        elif type_id == HoldMessage.TYPE_ID:
+            hold = HoldMessage.from_bytes(payload)
+            self._queue_samples(hold.move_message(), hold.count)
+        elif type_id == DwellMessage.TYPE_ID:
+            hold = DwellMessage.from_bytes(payload).hold_message(self.data_rate)
+            self._queue_samples(hold.move_message(), hold.count)
+        elif type_id == IdentifyMessage.TYPE_ID:
+            self._respond(self._identity)
+        elif type_id == SetDripCountMessage.TYPE_ID:
+            self._drips = SetDripCountMessage.from_bytes(payload).drips
+        elif type_id == MoveToDripCountMessage.TYPE_ID:
+            pass
+        else:
+            logger.warning("Virtual printer ignoring message type: {}".format(type_id))
+
+    def _queue_samples(self, move, count):
+        item = (move, count)
+        while self._running:
+            try:
+                self._samples.put(item, timeout=0.1)
+                break
+            except Full:
+                pass
+        depth = self._samples.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def _respond(self, message):
+        self._responses.append(chr(message.TYPE_ID) + message.get_bytes())
+
+    def set_read_callback(self, func):
+        self._read_callback = func
+
+    def _deliver_responses(self):
+        while self._responses:
+            data = self._responses.popleft()
+            if self._read_callback:
+                buf = ctypes.create_string_buffer(data, len(data))
+                self._read_callback(ctypes.cast(buf, ctypes.POINTER(ctypes.c_char)), len(data))
+
+    def _drip(self, now):
+        if self.drips_per_second <= 0:
+            return
+        if self._next_drip_time is None:
+            self._next_drip_time = now + 1.0 / self.drips_per_second
+        while now >= self._next_drip_time:
+            self._drips += 1
+            self._respond(DripRecordedMessage(self._drips))
+            self._next_drip_time += 1.0 / self.drips_per_second
+
+    def _service(self):
+        now = time.time()
+        self._drip(now)
+        self._deliver_responses()
+        return now
+
+    def _run(self):
+        while self._running:
+            now = self._service()
+            try:
+                move, count = self._samples.get(timeout=0.01)
+            except Empty:
+                if self._sample_clock is not None:
+                    self.underruns += 1
+                    self._sample_clock = None
+                continue
+            if self._sample_clock is None or self._sample_clock < now:
+                self._sample_clock = now
+            self._sample_clock += count / float(self.data_rate)
+            self.position = (move.x_pos, move.y_pos, move.laser_power)
+            if self._sample_clock - now > self.SLEEP_THRESHOLD:
+                while self._running:
+                    remaining = self._sample_clock - self._service()
+                    if remaining <= 0:
+                        break
+                    time.sleep(min(remaining, 0.01))
+            self.samples_consumed += count
+
+    def close(self):
+        self._running = False
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def __del__(self):
+        self._running = False
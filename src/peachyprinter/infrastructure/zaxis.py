@@ -3,46 +3,72 @@ import logging
 logger = logging.getLogger('peachy')
 from math import ceil
 from peachyprinter.domain.zaxis import ZAxis
+from peachyprinter.infrastructure.drip_history import DripHistory
+from peachyprinter.infrastructure.drip_rate_estimators import EWMADripRateEstimator
 from peachyprinter.infrastructure.messages import DripRecordedMessage, SetDripCountMessage, MoveToDripCountMessage
 
 
 class SerialDripZAxis(ZAxis):
-    def __init__(self, communicator, drips_per_mm, starting_height, drip_call_back=None,):
+    def __init__(self, communicator, drips_per_mm, starting_height, drip_call_back=None, drip_rate_estimator=None):
         super(SerialDripZAxis, self).__init__(starting_height)
+        self._estimator = drip_rate_estimator if drip_rate_estimator else EWMADripRateEstimator()
         self._communicator = communicator
         self._drips_per_mm = drips_per_mm
         self._drips = 0
         self._drip_call_back = drip_call_back
+        self._drip_history = DripHistory(500)
+        self._drips_in_average = 10
         self.reset()
         self._communicator.register_handler(DripRecordedMessage, self.drip_reported_handler)
-        self._drip_history = []
-        self._drips_in_average = 10
-        self._drip_history_length = 500
 
     def drip_reported_handler(self, drip_reported):
         drips_added = drip_reported.drips - self._drips
         self._drips = drip_reported.drips
         self._append_drip(drips_added)
+        self._height_changed()
         if self._drip_call_back:
             self._drip_call_back(self._drips, self.current_z_location_mm(), self.average_drips, self.drip_history)
 
     def _append_drip(self, drips_count):
-        for i in range(0, drips_count):
-            self._drip_history.append(time.time())
-        if len(self._drip_history) > self._drip_history_length:
-            self._drip_history = self._drip_history[-self._drip_history_length:]
+        if drips_count > 0:
+            now = time.time()
+            self._drip_history.append(now, drips_count)
+            self._estimator.add_drips(now, drips_count)
 
     @property
     def average_drips(self):
         if len(self._drip_history) >= self._drips_in_average:
-            seconds = (self._drip_history[-1] - self._drip_history[-10])
+            recent = self._drip_history.view(self._drips_in_average)
+            seconds = (recent[-1] - recent[0])
             if seconds > 0:
-                return 10.0 / seconds
+                return float(self._drips_in_average) / seconds
         return 0.0
 
     @property
     def drip_history(self):
-        return list(self._drip_history)
+        '''Read only view of the recent drip times, see DripHistory.view for how long it stays valid'''
+        return self._drip_history.view()
+
+    @property
+    def drip_rate_estimator(self):
+        return self._estimator
+
+    def predicted_height(self, at_time):
+        drips = self._drips + self._estimator.predicted_drips(at_time) - self._estimator.drips
+        return self._starting_height + (drips * 1.0 / self._drips_per_mm)
+
+    def predicted_time_to_height(self, height_mm):
+        if self.current_z_location_mm() >= height_mm:
+            return 0.0
+        wanted_drips = (height_mm - self._starting_height) * self._drips_per_mm
+        predicted = self._estimator.predicted_time_of_drips(self._estimator.drips + wanted_drips - self._drips)
+        if predicted is None:
+            return None
+        return max(0.0, predicted - time.time())
+
+    @property
+    def prediction_confidence(self):
+        return self._estimator.confidence
 
     def set_call_back(self, call_back):
         self._drip_call_back = call_back
@@ -52,7 +78,9 @@ class SerialDripZAxis(ZAxis):
         self._communicator.send(SetDripCountMessage(0))
         time.sleep(0.2)
         self._drips = 0
-        self._drip_history = []
+        self._drip_history.clear()
+        self._estimator.reset()
+        self._height_changed()
 
     def current_z_location_mm(self):
         return self._starting_height + (self._drips * 1.0 / self._drips_per_mm)
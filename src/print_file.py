@@ -75,20 +75,28 @@ def print_status(status):
     except Exception as ex:
         print(ex)
 
-def print_file(a_file):
+def print_file(a_file, capture_file=None, late_layer_policy=None, drip_log_file=None, pipelined=False, render_process=False, checkpoint_file=None, resume=False, shared_status_file=None):
     api = PrinterAPI()
     api.load_printer()
 
-    print_api = api.get_print_api()
+    print_api = api.get_print_api(capture_file=capture_file, drip_log_file=drip_log_file, checkpoint_file=checkpoint_file, shared_status_file=shared_status_file)
     running = True
-    print_api.print_gcode(a_file)
+    status = {}
+    sequence = None
+    if resume:
+        print_api.resume_from_checkpoint(late_layer_policy=late_layer_policy, pipelined=pipelined, render_process=render_process)
+    else:
+        print_api.print_gcode(a_file, late_layer_policy=late_layer_policy, pipelined=pipelined, render_process=render_process)
 
     while running:
-        status = print_api.get_status()
+        changes = print_api.get_status_since(sequence)
+        sequence = changes['sequence']
+        status.update(changes)
         if status['status'] in ['Complete', 'Cancelled', 'Failed']:
             running = False
         time.sleep(0.05)
-        print_status(status)
+        print_status(dict(status))
+    print_api.close()
 
 
 if __name__ == "__main__":
@@ -97,7 +105,17 @@ if __name__ == "__main__":
     parser.add_argument('-t', '--console',  dest='console',  action='store_true', required=False,                     help="Logs to console not file")
     parser.add_argument('-p', '--log_path', dest='log_path', action='store',      required=False,  default=None,       help="Set the path for the log files")
     parser.add_argument('-f', '--file',     dest='file',     action='store',      required=True,  default=None,       help='Specify a file to print')
+    parser.add_argument('-c', '--capture',  dest='capture',  action='store',      required=False, default=None,       help='Capture usb traffic to a trace file')
+    parser.add_argument('-s', '--late',     dest='late',     action='store',      required=False, default=None,       help='Render layers ahead and handle late layers with [skip|partial|speed_scale]', choices=['skip', 'partial', 'speed_scale'])
+    parser.add_argument('-d', '--drip_log', dest='drip_log', action='store',      required=False, default=None,       help='Record drips to a binary drip log file')
+    parser.add_argument('-q', '--pipelined', dest='pipelined', action='store_true', required=False,                   help='Generate, render and send layers on separate threads')
+    parser.add_argument('-r', '--render_process', dest='render_process', action='store_true', required=False,         help='Render layers in a separate process')
+    parser.add_argument('-k', '--checkpoint', dest='checkpoint', action='store',    required=False, default=None,       help='Record progress after each layer to a checkpoint file')
+    parser.add_argument('-e', '--resume',   dest='resume',   action='store_true', required=False,                     help='Resume the print recorded in the checkpoint file')
+    parser.add_argument('-m', '--shared_status', dest='shared_status', action='store', required=False, default=None,  help='Keep the print status in a memory mapped file other processes can read')
     args, unknown = parser.parse_known_args()
+    if args.resume and not args.checkpoint:
+        parser.error('--resume requires --checkpoint')
 
     path = os.path.dirname(os.path.realpath(__file__))
     setup_env(path)
@@ -108,4 +126,4 @@ if __name__ == "__main__":
         os.makedirs(args.log_path)
     setup_logging(args)
 
-    print_file(args.file)
+    print_file(args.file, args.capture, args.late, args.drip_log, args.pipelined, args.render_process, args.checkpoint, args.resume, args.shared_status)
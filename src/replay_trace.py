@@ -0,0 +1,52 @@
+#!/bin/python
+
+import logging
+import os
+import sys
+import argparse
+
+from print_file import setup_env
+
+
+def setup_logging(args):
+    peachy_logger = logging.getLogger('peachy')
+    logging_level = getattr(logging, args.loglevel.upper(), "INFO")
+    if not isinstance(logging_level, int):
+        raise ValueError('Invalid log level: %s' % args.loglevel)
+    peachy_logger.propagate = False
+    consoleHandler = logging.StreamHandler()
+    consoleHandler.setFormatter(logging.Formatter('%(levelname)s: %(asctime)s %(module)s - %(message)s'))
+    peachy_logger.addHandler(consoleHandler)
+    peachy_logger.setLevel(logging_level)
+
+
+def replay(trace_file, queue_length, original_pace):
+    from peachyprinter.infrastructure.peachyusb import PeachyUSB
+    from peachyprinter.infrastructure.trace import TraceReplayer
+
+    device = PeachyUSB(queue_length)
+    replayer = TraceReplayer(trace_file, device, original_pace=original_pace)
+    try:
+        stats = replayer.replay()
+    finally:
+        device.close()
+    print("Frames     : {frames}".format(**stats))
+    print("Bytes      : {bytes}".format(**stats))
+    print("Elapsed    : {elapsed:.3f} s".format(**stats))
+    print("Write time : {write_time:.3f} s".format(**stats))
+    print("Max lag    : {max_lag:.6f} s".format(**stats))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Replay a captured usb trace to a Peachy Printer or virtual printer (PEACHY_VIRTUAL_USB=1)")
+    parser.add_argument('-l', '--log',      dest='loglevel',     action='store',      required=False, default="WARNING", help="Enter the loglevel [DEBUG|INFO|WARNING|ERROR] default: WARNING")
+    parser.add_argument('-f', '--file',     dest='file',         action='store',      required=True,  default=None,      help='Specify a trace file to replay')
+    parser.add_argument('-q', '--queue',    dest='queue_length', action='store',      required=False, default=500,       help='Device queue length default: 500', type=int)
+    parser.add_argument('-m', '--max',      dest='max_pace',     action='store_true', required=False,                    help='Replay as fast as possible instead of at the recorded pace')
+    args, unknown = parser.parse_known_args()
+
+    path = os.path.dirname(os.path.realpath(__file__))
+    setup_env(path)
+    setup_logging(args)
+
+    replay(args.file, args.queue_length, not args.max_pace)
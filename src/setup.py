@@ -23,7 +23,7 @@ setup(
                   '': ['*.dfu', 'peachyprinter/dependancies/firmware/*'],
                   },
     install_requires=[
-      'protobuf>=2.6.1',
+      'protobuf>=3.6',
       'pyserial>=2.7',
       'numpy>=1.9.2',
       'libusb1>=1.3.1',
@@ -11,8 +11,11 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
 
 from peachyprinter.api.print_api import PrintAPI, PrintQueueAPI
+from peachyprinter.infrastructure.event_bus import StateChanged, LayerCompleted
 from peachyprinter.infrastructure.machine import *
 from peachyprinter.infrastructure.messages import PrinterStatusMessage
+from peachyprinter.infrastructure.compiled_print import configuration_fingerprint
+from peachyprinter.infrastructure.layer_stats import LayerStats
 
 import test_helpers
 
@@ -82,9 +85,9 @@ class PrintQueueAPITests(unittest.TestCase, test_helpers.TestHelpers):
             api = PrintQueueAPI(self.default_config)
             api.print_folder(folder)
             mock_print_api.print_gcode.assert_called_with(expected_path1)
-            call_back = mock_PrintAPI.call_args[0][1]
-            mock_status = {'status': 'Complete'}
-            call_back(mock_status)
+            call_back = mock_PrintAPI.return_value.subscribe.call_args[0][0]
+            call_back(StateChanged('Complete'))
+            api._worker.join()
             mock_print_api.print_gcode.assert_called_with(expected_path2)
 
     @patch.object(os.path, 'isdir')
@@ -98,9 +101,9 @@ class PrintQueueAPITests(unittest.TestCase, test_helpers.TestHelpers):
         with patch('peachyprinter.api.print_api.listdir', return_value=['ASDFAS.txt', 'bor.fa', expected_file1, expected_file2]):
             api = PrintQueueAPI(self.default_config)
             api.print_folder(folder)
-            call_back = mock_PrintAPI.call_args[0][1]
-            mock_status = {'status': 'Complete'}
-            call_back(mock_status)
+            call_back = mock_PrintAPI.return_value.subscribe.call_args[0][0]
+            call_back(StateChanged('Complete'))
+            api._worker.join()
             mock_print_api.close.assert_called_with()
 
     @patch.object(os.path, 'isdir')
@@ -127,9 +130,10 @@ class PrintQueueAPITests(unittest.TestCase, test_helpers.TestHelpers):
         with patch('peachyprinter.api.print_api.listdir', return_value=['ASDFAS.txt', 'bor.fa', expected_file1]):
             api = PrintQueueAPI(self.default_config)
             api.print_folder(folder)
-            call_back = mock_PrintAPI.call_args[0][1]
-            mock_status = {'status': 'Complete'}
-            call_back(mock_status)
+            call_back = mock_PrintAPI.return_value.subscribe.call_args[0][0]
+            call_back(StateChanged('Complete'))
+            api._worker.join()
+            self.assertEquals(1, mock_PrintAPI.call_count)
 
     @patch.object(os.path, 'isdir')
     @patch('peachyprinter.api.print_api.PrintAPI')
@@ -145,14 +149,53 @@ class PrintQueueAPITests(unittest.TestCase, test_helpers.TestHelpers):
             api = PrintQueueAPI(config)
             api.print_folder(folder)
             self.assertEquals(1, mock_PrintAPI.call_count)
-            call_back = mock_PrintAPI.call_args[0][1]
+            call_back = mock_PrintAPI.return_value.subscribe.call_args[0][0]
             start = time.time()
-            mock_status = {'status': 'Complete'}
-            call_back(mock_status)
-            call_back(mock_status)
+            call_back(StateChanged('Complete'))
+            self.assertTrue(time.time() - start < expected_delay, "status delivery waited for the delay")
+            api._worker.join()
             end = time.time()
+            self.assertEquals(2, mock_PrintAPI.call_count)
             self.assertTrue(expected_delay <= end-start + 0.01, "%s was not <= %s" % (expected_delay, (end - start + 0.01)))
 
+    @patch.object(os.path, 'isdir')
+    @patch('peachyprinter.api.print_api.PrintAPI')
+    def test_close_stops_waiting_for_next_print(self, mock_PrintAPI, mock_isdir):
+        folder = os.path.join('', 'SomthingMadeUp')
+        mock_isdir.return_value = True
+        config = self.default_config
+        config.options.print_queue_delay = 5.0
+        with patch('peachyprinter.api.print_api.listdir', return_value=['thingy1.gcode', 'thingy2.gcode']):
+            api = PrintQueueAPI(config)
+            api.print_folder(folder)
+            call_back = mock_PrintAPI.return_value.subscribe.call_args[0][0]
+            call_back(StateChanged('Complete'))
+            start = time.time()
+            api.close()
+
+        self.assertTrue(time.time() - start < 1.0)
+        self.assertEquals(1, mock_PrintAPI.call_count)
+
+    @patch.object(os.path, 'isdir')
+    @patch('peachyprinter.api.print_api.PrintAPI')
+    def test_print_folder_forwards_status_to_status_call_back(self, mock_PrintAPI, mock_isdir):
+        folder = os.path.join('', 'SomthingMadeUp')
+        mock_isdir.return_value = True
+        mock_print_api = mock_PrintAPI.return_value
+        with patch('peachyprinter.api.print_api.listdir', return_value=['thingy1.gcode', 'thingy2.gcode']):
+            config = self.default_config
+            api = PrintQueueAPI(config, self.call_back)
+            api.print_folder(folder)
+            mock_PrintAPI.assert_called_once_with(config)
+            call_back = mock_print_api.subscribe.call_args[0][0]
+            layer_completed = LayerCompleted(1, 0.1, 0.5, 100)
+            running = StateChanged('Running')
+            call_back(layer_completed)
+            call_back(running)
+
+        self.assertEquals([layer_completed, running], self.call_backs)
+        self.assertEquals(1, mock_print_api.print_gcode.call_count)
+
 @patch('peachyprinter.api.print_api.SerialDripZAxis')
 @patch('peachyprinter.api.print_api.MicroDisseminator')
 @patch('peachyprinter.api.print_api.UsbPacketCommunicator')
@@ -469,6 +512,7 @@ class PrintAPITests(unittest.TestCase, test_helpers.TestHelpers):
             self.mock_sub_layer_generator,
             self.mock_machine_status,
             abort_on_error=True,
+            stages=[],
             )
 
     def test_print_gcode_should_print_overlap_layers_if_requested(self, *args):
@@ -489,6 +533,7 @@ class PrintAPITests(unittest.TestCase, test_helpers.TestHelpers):
             self.mock_over_lap_generator,
             self.mock_machine_status,
             abort_on_error=True,
+            stages=[],
             )
 
     def test_print_gcode_should_print_shuffle_layers_if_requested(self, *args):
@@ -509,6 +554,7 @@ class PrintAPITests(unittest.TestCase, test_helpers.TestHelpers):
             self.mock_shuffle_generator,
             self.mock_machine_status,
             abort_on_error=True,
+            stages=[],
             )
 
     def test_print_gcode_should_print_shuffle_overlap_and_sublayer_if_requested(self, *args):
@@ -534,6 +580,7 @@ class PrintAPITests(unittest.TestCase, test_helpers.TestHelpers):
             self.mock_over_lap_generator,
             self.mock_machine_status,
             abort_on_error=True,
+            stages=[],
             )
 
     def test_print_can_be_stopped_before_started(self, *args):
@@ -577,6 +624,49 @@ class PrintAPITests(unittest.TestCase, test_helpers.TestHelpers):
 
         self.mock_controller.get_status.assert_called_with()
 
+    def test_get_layer_summary_summarizes_layer_stats(self, *args):
+        self.setup_mocks(args)
+        layer_stats = LayerStats()
+        for duration in [1.0, 2.0, 3.0]:
+            layer_stats.append([[0.0, 1.0], [-1.0, 1.0], 0.1], duration=duration, samples=int(duration * 100))
+        self.mock_machine_status.layer_stats = layer_stats
+        api = PrintAPI(self.default_config)
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.print_gcode("Spam")
+
+        summary = api.get_layer_summary(percentiles=[50])
+
+        self.assertEquals(3, summary['layers'])
+        self.assertEquals({'min_x': 0.0, 'max_x': 1.0, 'min_y': -1.0, 'max_y': 1.0}, summary['extents'])
+        self.assertEquals({50: 2.0}, summary['duration'])
+        self.assertEquals({50: 200.0}, summary['samples'])
+        self.assertEquals([2.0, 3.0], api.get_layer_stats(-2)['duration'].tolist())
+
+    def test_subscribe_delivers_events_published_by_the_print_status(self, *args):
+        self.setup_mocks(args)
+        received = []
+        api = PrintAPI(self.default_config)
+        api.subscribe(received.append, [StateChanged])
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.print_gcode("Spam")
+        events = self.mock_MachineStatus.call_args[0][0]
+
+        events.publish(LayerCompleted(1, 0.1, 0.5, 100))
+        events.publish(StateChanged('Running'))
+        api.close()
+
+        self.assertEquals(['Running'], [event.status for event in received])
+
+    def test_get_status_since_calls_controller_status_since(self, *args):
+        self.setup_mocks(args)
+        api = PrintAPI(self.default_config)
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.print_gcode("Spam")
+            actual = api.get_status_since(12)
+
+        self.mock_controller.get_status_since.assert_called_with(12)
+        self.assertEqual(self.mock_controller.get_status_since.return_value, actual)
+
     def test_print_gcode_should_use_emulated_dripper_if_specified_in_config(self, * args):
         self.setup_mocks(args)
         gcode_path = "FakeFile"
@@ -657,6 +747,48 @@ class PrintAPITests(unittest.TestCase, test_helpers.TestHelpers):
 
         self.mock_PhotoZAxis.assert_called_with(expected_start_height, config.dripper.photo_zaxis_delay)
 
+    def test_pause_stops_the_emulated_dripper_and_resume_restores_it(self, *args):
+        self.setup_mocks(args)
+        config = self.default_config
+        config.dripper.dripper_type = 'emulated'
+        self.mock_timed_drip_zaxis.get_drips_per_second.return_value = 2.5
+        api = PrintAPI(config)
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.print_gcode("FakeFile")
+
+        api.pause()
+        api.pause()
+
+        self.mock_timed_drip_zaxis.set_drips_per_second.assert_called_once_with(0)
+        self.mock_controller.pause.assert_called_once_with()
+        self.mock_usb_packet_communicator.pause.assert_called_once_with()
+
+        api.resume()
+
+        self.mock_timed_drip_zaxis.set_drips_per_second.assert_called_with(2.5)
+        self.mock_usb_packet_communicator.resume.assert_called_once_with()
+        self.mock_controller.resume.assert_called_once_with()
+
+    def test_pause_and_resume_do_nothing_before_printing(self, *args):
+        self.setup_mocks(args)
+        api = PrintAPI(self.default_config)
+
+        api.pause()
+        api.resume()
+
+        self.assertFalse(self.mock_controller.pause.called)
+        self.assertFalse(self.mock_controller.resume.called)
+
+    def test_resume_does_nothing_when_not_paused(self, *args):
+        self.setup_mocks(args)
+        api = PrintAPI(self.default_config)
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.print_gcode("FakeFile")
+
+        api.resume()
+
+        self.assertFalse(self.mock_controller.resume.called)
+
     def test_set_drips_per_second_throws_error_if_not_using_emulated_drips(self, *args):
         self.setup_mocks(args)
         gcode_path = "FakeFile"
@@ -704,6 +836,108 @@ class PrintAPITests(unittest.TestCase, test_helpers.TestHelpers):
 
         self.mock_serial_drip_zaxis.set_call_back.assert_called_with(self.mock_machine_status.drip_call_back)
 
+    @patch('peachyprinter.api.print_api.DripLogWriter')
+    def test_print_with_drip_log_file_records_drips_with_current_layer(self, mock_DripLogWriter, *args):
+        self.setup_mocks(args)
+        mock_drip_log = mock_DripLogWriter.return_value
+        self.mock_machine_status.current_layer = 3
+
+        api = PrintAPI(self.default_config, drip_log_file='print.drips')
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.print_gcode("FakeFile")
+        call_back = self.mock_serial_drip_zaxis.set_call_back.call_args[0][0]
+        call_back(5, 1.0, 2.0, [])
+        api.close()
+
+        mock_DripLogWriter.assert_called_with('print.drips')
+        self.mock_machine_status.drip_call_back.assert_called_with(5, 1.0, 2.0, [])
+        mock_drip_log.record.assert_called_with(5, 3)
+        mock_drip_log.close.assert_called_with()
+
+    @patch('peachyprinter.api.print_api.PrintCheckpoint')
+    def test_print_with_checkpoint_file_records_a_checkpoint_after_each_layer(self, mock_PrintCheckpoint, *args):
+        self.setup_mocks(args)
+        config = self.default_config
+
+        api = PrintAPI(config, checkpoint_file='print.checkpoint')
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.print_gcode("FakeFile")
+
+        mock_PrintCheckpoint.assert_called_with('print.checkpoint', "FakeFile", self.mock_g_code_reader.get_layers.return_value, configuration_fingerprint(config))
+        self.assertEquals(mock_PrintCheckpoint.return_value, self.mock_LayerProcessing.call_args[1]['checkpoint'])
+
+    @patch('peachyprinter.api.print_api.SharedStatusWriter')
+    def test_print_with_shared_status_file_keeps_status_in_shared_status(self, mock_SharedStatusWriter, *args):
+        self.setup_mocks(args)
+
+        api = PrintAPI(self.default_config, shared_status_file='print.status')
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.print_gcode("FakeFile")
+        api.close()
+
+        mock_SharedStatusWriter.assert_called_with('print.status')
+        self.assertEquals(mock_SharedStatusWriter.return_value, self.mock_MachineStatus.call_args[0][1])
+        mock_SharedStatusWriter.return_value.close.assert_called_with()
+
+    @patch('peachyprinter.api.print_api.ResumeLayerGenerator')
+    @patch('peachyprinter.api.print_api.PrintCheckpoint')
+    @patch('peachyprinter.api.print_api.verify_checkpoint')
+    @patch('peachyprinter.api.print_api.load_checkpoint')
+    def test_resume_from_checkpoint_seeks_to_the_layer_after_the_checkpoint(self, mock_load_checkpoint, mock_verify_checkpoint, mock_PrintCheckpoint, mock_ResumeLayerGenerator, *args):
+        self.setup_mocks(args)
+        config = self.default_config
+        config.options.use_sublayers = False
+        config.options.use_shufflelayers = False
+        config.options.use_overlap = False
+        position = {'z': 1.0, 'offset': 1234, 'line': 56, 'state': {}}
+        checkpoint = {'file': {'name': 'FakeFile'}, 'layer': 20, 'z': 1.2, 'drips': 100, 'configuration': 'abc', 'position': position}
+        mock_load_checkpoint.return_value = checkpoint
+
+        api = PrintAPI(config, checkpoint_file='print.checkpoint')
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.resume_from_checkpoint()
+
+        mock_verify_checkpoint.assert_called_with(checkpoint, config)
+        self.mock_g_code_reader.get_layers.assert_called_with(position=position)
+        mock_ResumeLayerGenerator.assert_called_with(self.mock_g_code_reader.get_layers.return_value, 1.2)
+        self.assertEquals(mock_ResumeLayerGenerator.return_value, self.mock_Controller.call_args[0][2])
+        mock_PrintCheckpoint.assert_called_with('print.checkpoint', 'FakeFile', self.mock_g_code_reader.get_layers.return_value, 'abc', first_layer=20)
+        self.mock_SerialDripZAxis.assert_called_with(self.mock_usb_packet_communicator, config.dripper.drips_per_mm, 1.2)
+
+    @patch('peachyprinter.api.print_api.load_checkpoint')
+    def test_resume_from_checkpoint_raises_when_configuration_changed(self, mock_load_checkpoint, *args):
+        self.setup_mocks(args)
+        mock_load_checkpoint.return_value = {'configuration': 'not this configuration', 'file': {'name': 'FakeFile'}}
+        api = PrintAPI(self.default_config)
+
+        with self.assertRaises(Exception):
+            api.resume_from_checkpoint('print.checkpoint')
+        self.assertFalse(self.mock_Controller.called)
+
+    @patch('peachyprinter.api.print_api.CompiledLayerWriter')
+    @patch('peachyprinter.api.print_api.ProcessRenderingLayerGenerator')
+    def test_print_with_render_process_streams_layers_rendered_in_another_process(self, mock_ProcessRenderingLayerGenerator, mock_CompiledLayerWriter, *args):
+        self.setup_mocks(args)
+        mock_generator = mock_ProcessRenderingLayerGenerator.return_value
+        config = self.default_config
+
+        api = PrintAPI(config)
+        with patch('__builtin__.open', mock_open(read_data='bibble'), create=True):
+            api.print_gcode("FakeFile", render_process=True)
+
+        self.assertEquals(self.mock_g_code_reader.get_layers.return_value, mock_ProcessRenderingLayerGenerator.call_args[0][0])
+        mock_CompiledLayerWriter.assert_called_with(mock_generator, self.mock_usb_packet_communicator, config.circut.data_rate)
+        self.assertEquals(mock_CompiledLayerWriter.return_value, self.mock_LayerProcessing.call_args[0][0])
+        self.assertEquals([mock_generator], self.mock_Controller.call_args[1]['stages'])
+        self.assertFalse(self.mock_LayerWriter.called)
+
+    def test_render_process_cannot_be_combined_with_a_late_layer_policy(self, *args):
+        self.setup_mocks(args)
+        api = PrintAPI(self.default_config)
+
+        with self.assertRaises(Exception):
+            api.print_layers([], render_process=True, late_layer_policy='skip')
+
     def test_configuration_returns_configuration(self, *args):
         self.setup_mocks(args)
         config = self.default_config
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import shutil
+import logging
+from mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.checkpoint import *
+from peachyprinter.infrastructure.compiled_print import configuration_fingerprint
+from peachyprinter.infrastructure.layer_generators import StubLayerGenerator
+from peachyprinter.domain.commands import Layer
+import test_helpers
+
+
+class CheckpointTests(unittest.TestCase, test_helpers.TestHelpers):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.checkpoint_file = os.path.join(self.folder, 'print.checkpoint')
+        self.gcode_file = os.path.join(self.folder, 'print.gcode')
+        with open(self.gcode_file, 'w') as gcode:
+            gcode.write("G1 Z0.1\nG1 X1.0 Y1.0 E1\n")
+        self.position = {'z': 0.1, 'offset': 0, 'line': 0, 'state': {}}
+        self.source = MagicMock()
+        self.source.source_position.return_value = self.position
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def record(self, config, first_layer=0):
+        checkpoint = PrintCheckpoint(self.checkpoint_file, self.gcode_file, self.source, configuration_fingerprint(config), first_layer=first_layer)
+        checkpoint.record(3, 0.3, 12)
+        checkpoint.close()
+        return load_checkpoint(self.checkpoint_file)
+
+    def test_record_writes_the_position_of_the_layer(self):
+        checkpoint = self.record(self.default_config, first_layer=10)
+
+        self.assertEquals(13, checkpoint['layer'])
+        self.assertEquals(0.3, checkpoint['z'])
+        self.assertEquals(12, checkpoint['drips'])
+        self.assertEquals(self.position, checkpoint['position'])
+        self.assertEquals(file_identity(self.gcode_file), checkpoint['file'])
+        self.source.source_position.assert_called_with(0.3)
+
+    def test_write_checkpoint_replaces_the_previous_checkpoint(self):
+        write_checkpoint(self.checkpoint_file, {'layer': 1})
+        write_checkpoint(self.checkpoint_file, {'layer': 2})
+
+        self.assertEquals({'layer': 2}, load_checkpoint(self.checkpoint_file))
+        self.assertEquals(['print.checkpoint', 'print.gcode'], sorted(os.listdir(self.folder)))
+
+    def test_load_checkpoint_raises_when_missing(self):
+        with self.assertRaises(Exception):
+            load_checkpoint(self.checkpoint_file)
+
+    def test_verify_accepts_unchanged_file_and_configuration(self):
+        config = self.default_config
+        verify_checkpoint(self.record(config), config)
+
+    def test_verify_raises_when_configuration_changed(self):
+        config = self.default_config
+        checkpoint = self.record(config)
+        config.calibration.max_deflection = 0.5
+
+        with self.assertRaises(Exception):
+            verify_checkpoint(checkpoint, config)
+
+    def test_verify_raises_when_file_changed(self):
+        config = self.default_config
+        checkpoint = self.record(config)
+        with open(self.gcode_file, 'a') as gcode:
+            gcode.write("G1 Z0.2\n")
+
+        with self.assertRaises(Exception):
+            verify_checkpoint(checkpoint, config)
+
+
+class ResumeLayerGeneratorTests(unittest.TestCase):
+
+    def test_skips_layers_at_or_below_the_checkpoint_height(self):
+        layers = [Layer(0.1), Layer(0.2), Layer(0.3), Layer(0.4)]
+
+        resumed = ResumeLayerGenerator(StubLayerGenerator(layers), 0.2)
+
+        self.assertEquals([0.3, 0.4], [layer.z for layer in resumed])
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
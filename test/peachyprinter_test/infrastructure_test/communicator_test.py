@@ -1,13 +1,20 @@
 import unittest
 import sys
 import os
-from mock import patch
+import ctypes
+import time
+import threading
+import tempfile
+import shutil
+from mock import patch, MagicMock
 import logging
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
 
-from peachyprinter.infrastructure.communicator import UsbPacketCommunicator
+from peachyprinter.infrastructure.communicator import UsbPacketCommunicator, MissingPrinterException, frame_message
+from peachyprinter.infrastructure.trace import TraceReader, OUTGOING, INCOMING
+from peachyprinter.infrastructure.messages import MoveMessage, HoldMessage, DripRecordedMessage
 
 
 #TODO this really needs to be actually tested
@@ -19,6 +26,344 @@ class UsbPacketCommunicatorTest(unittest.TestCase):
     def test_init_doesnt_raise_exception(self, mock_PeachyUSB):
         UsbPacketCommunicator(50)
 
+    def test_send_writes_length_and_type_framed_message(self, mock_PeachyUSB):
+        message = MoveMessage(1, 2, 3)
+        communicator = UsbPacketCommunicator(50)
+        communicator.start()
+
+        communicator.send(message)
+
+        expected = chr(message.TYPE_ID) + message.get_bytes()
+        mock_PeachyUSB.return_value.write.assert_called_once_with(chr(len(expected)) + expected)
+
+    def test_send_hold_writes_single_hold_frame_when_supported(self, mock_PeachyUSB):
+        message = HoldMessage(1, 2, 3, 500)
+        communicator = UsbPacketCommunicator(50, hold_supported=True)
+        communicator.start()
+
+        communicator.send(message)
+
+        expected = chr(message.TYPE_ID) + message.get_bytes()
+        mock_PeachyUSB.return_value.write.assert_called_once_with(chr(len(expected)) + expected)
+
+    def test_send_hold_expands_to_moves_when_unsupported(self, mock_PeachyUSB):
+        mock_PeachyUSB.return_value.hold_supported = False
+        communicator = UsbPacketCommunicator(50)
+        communicator.start()
+
+        communicator.send(HoldMessage(1, 2, 3, 5))
+
+        move = MoveMessage(1, 2, 3)
+        expected = chr(move.TYPE_ID) + move.get_bytes()
+        self.assertEqual([((chr(len(expected)) + expected,),)] * 5, mock_PeachyUSB.return_value.write.call_args_list)
+
+    def test_send_frame_writes_frame_unchanged(self, mock_PeachyUSB):
+        communicator = UsbPacketCommunicator(50)
+        communicator.start()
+        frame = frame_message(MoveMessage(1, 2, 3))
+
+        communicator.send_frame(frame)
+
+        mock_PeachyUSB.return_value.write.assert_called_once_with(frame)
+
+    def test_send_frame_expands_hold_frames_when_unsupported(self, mock_PeachyUSB):
+        mock_PeachyUSB.return_value.hold_supported = False
+        communicator = UsbPacketCommunicator(50)
+        communicator.start()
+
+        communicator.send_frame(frame_message(HoldMessage(1, 2, 3, 3)))
+
+        expected = frame_message(MoveMessage(1, 2, 3))
+        self.assertEqual([((expected,),)] * 3, mock_PeachyUSB.return_value.write.call_args_list)
+
+    def test_hold_supported_when_device_supports_hold(self, mock_PeachyUSB):
+        mock_PeachyUSB.return_value.hold_supported = True
+        message = HoldMessage(1, 2, 3, 500)
+        communicator = UsbPacketCommunicator(50)
+        self.assertFalse(communicator.hold_supported)
+
+        communicator.start()
+        communicator.send(message)
+
+        self.assertTrue(communicator.hold_supported)
+        expected = chr(message.TYPE_ID) + message.get_bytes()
+        mock_PeachyUSB.return_value.write.assert_called_once_with(chr(len(expected)) + expected)
+
+    def test_hold_supported_can_be_set(self, mock_PeachyUSB):
+        mock_PeachyUSB.return_value.hold_supported = True
+        communicator = UsbPacketCommunicator(50, hold_supported=False)
+        communicator.start()
+
+        self.assertFalse(communicator.hold_supported)
+
+    def test_dwell_supported_when_device_supports_dwell(self, mock_PeachyUSB):
+        mock_PeachyUSB.return_value.dwell_supported = True
+        communicator = UsbPacketCommunicator(50)
+        self.assertFalse(communicator.dwell_supported)
+
+        communicator.start()
+
+        self.assertTrue(communicator.dwell_supported)
+
+    def test_dwell_supported_can_be_set(self, mock_PeachyUSB):
+        mock_PeachyUSB.return_value.dwell_supported = True
+        communicator = UsbPacketCommunicator(50, dwell_supported=False)
+        communicator.start()
+
+        self.assertFalse(communicator.dwell_supported)
+
+    def test_send_reuses_cached_frame_for_repeated_points(self, mock_PeachyUSB):
+        communicator = UsbPacketCommunicator(50)
+        communicator.start()
+
+        communicator.send(MoveMessage(1, 2, 3))
+        communicator.send(MoveMessage(1, 2, 3))
+        communicator.send(MoveMessage(4, 5, 6))
+
+        stats = communicator.frame_cache_stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(2, stats['misses'])
+        self.assertEqual(2, stats['size'])
+
+    def test_send_does_not_cache_uncacheable_messages(self, mock_PeachyUSB):
+        communicator = UsbPacketCommunicator(50)
+        communicator.start()
+
+        communicator.send(DripRecordedMessage(1))
+
+        self.assertEqual(0, communicator.frame_cache_stats()['size'])
+
+    def _received(self, message):
+        data = chr(message.TYPE_ID) + message.get_bytes()
+        buf = ctypes.create_string_buffer(data, len(data))
+        return (ctypes.cast(buf, ctypes.POINTER(ctypes.c_char)), len(data), buf)
+
+    def test_process_decodes_and_calls_registered_handlers(self, mock_PeachyUSB):
+        handler_1 = MagicMock()
+        handler_2 = MagicMock()
+        communicator = UsbPacketCommunicator(50, dispatch_queue_size=0)
+        communicator.register_handler(DripRecordedMessage, handler_1)
+        communicator.register_handler(DripRecordedMessage, handler_2)
+        data, length, buf = self._received(DripRecordedMessage(77))
+
+        communicator._process(data, length)
+
+        handler_1.assert_called_once_with(DripRecordedMessage(77))
+        handler_2.assert_called_once_with(DripRecordedMessage(77))
+
+    def test_process_ignores_unregistered_message_types(self, mock_PeachyUSB):
+        handler = MagicMock()
+        communicator = UsbPacketCommunicator(50, dispatch_queue_size=0)
+        communicator.register_handler(DripRecordedMessage, handler)
+        data, length, buf = self._received(MoveMessage(1, 2, 3))
+
+        communicator._process(data, length)
+
+        self.assertEqual(0, handler.call_count)
+
+    def test_process_ignores_empty_reads(self, mock_PeachyUSB):
+        handler = MagicMock()
+        communicator = UsbPacketCommunicator(50, dispatch_queue_size=0)
+        communicator.register_handler(DripRecordedMessage, handler)
+        data, length, buf = self._received(DripRecordedMessage(77))
+
+        communicator._process(data, 0)
+
+        self.assertEqual(0, handler.call_count)
+
+    def test_register_handler_during_dispatch_applies_to_next_message(self, mock_PeachyUSB):
+        late_handler = MagicMock()
+        communicator = UsbPacketCommunicator(50, dispatch_queue_size=0)
+
+        def registering_handler(message):
+            communicator.register_handler(DripRecordedMessage, late_handler)
+        communicator.register_handler(DripRecordedMessage, registering_handler)
+        data, length, buf = self._received(DripRecordedMessage(1))
+
+        communicator._process(data, length)
+        self.assertEqual(0, late_handler.call_count)
+        communicator._process(data, length)
+        late_handler.assert_called_once_with(DripRecordedMessage(1))
+
+    def test_register_handler_rejects_non_protobuf_messages(self, mock_PeachyUSB):
+        communicator = UsbPacketCommunicator(50)
+        with self.assertRaises(Exception):
+            communicator.register_handler(object, MagicMock())
+
+    def test_process_runs_handlers_off_the_read_callback_thread_by_default(self, mock_PeachyUSB):
+        threads = []
+        communicator = UsbPacketCommunicator(50)
+        communicator.register_handler(DripRecordedMessage, lambda message: threads.append(threading.current_thread()))
+        communicator.start()
+        data, length, buf = self._received(DripRecordedMessage(77))
+
+        communicator._process(data, length)
+        self.wait_for(lambda: threads)
+        communicator.close()
+
+        self.assertEqual(1, len(threads))
+        self.assertNotEqual(threading.current_thread(), threads[0])
+
+    def test_process_hands_messages_to_dispatcher_thread_when_started(self, mock_PeachyUSB):
+        handler = MagicMock()
+        communicator = UsbPacketCommunicator(50)
+        communicator.register_handler(DripRecordedMessage, handler)
+        communicator.start()
+        data, length, buf = self._received(DripRecordedMessage(77))
+
+        communicator._process(data, length)
+        timeout = time.time() + 2.0
+        while handler.call_count == 0 and time.time() < timeout:
+            time.sleep(0.01)
+        communicator.close()
+
+        handler.assert_called_once_with(DripRecordedMessage(77))
+
+    def test_process_does_not_run_handlers_on_read_callback_when_threaded(self, mock_PeachyUSB):
+        handler = MagicMock()
+        communicator = UsbPacketCommunicator(50)
+        communicator.register_handler(DripRecordedMessage, handler)
+        data, length, buf = self._received(DripRecordedMessage(77))
+
+        communicator._process(data, length)
+
+        self.assertEqual(0, handler.call_count)
+        self.assertEqual(1, communicator.dispatch_stats()['queue_depth'])
+
+    def test_dispatch_stats_is_none_when_dispatching_inline(self, mock_PeachyUSB):
+        communicator = UsbPacketCommunicator(50, dispatch_queue_size=0)
+        self.assertEqual(None, communicator.dispatch_stats())
+
+    def wait_for(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+
+    def test_transport_stats_reports_synchronous_writes(self, mock_PeachyUSB):
+        mock_PeachyUSB.return_value.hold_supported = False
+        message = MoveMessage(1, 2, 3)
+        communicator = UsbPacketCommunicator(50)
+        communicator.start()
+
+        communicator.send(message)
+        communicator.send(HoldMessage(1, 2, 3, 4))
+
+        frame_length = len(message.get_bytes()) + 2
+        stats = communicator.transport_stats()
+        self.assertEqual(5, stats['total_frames'])
+        self.assertEqual(5 * frame_length, stats['total_bytes'])
+        self.assertEqual(0, stats['queue_depth'])
+
+    def test_send_queue_writes_on_sender_thread(self, mock_PeachyUSB):
+        message = MoveMessage(1, 2, 3)
+        write = mock_PeachyUSB.return_value.write
+        communicator = UsbPacketCommunicator(50, send_queue_size=10)
+        communicator.start()
+
+        communicator.send(message)
+        self.wait_for(lambda: write.call_count == 1)
+        communicator.close()
+
+        expected = chr(message.TYPE_ID) + message.get_bytes()
+        write.assert_called_once_with(chr(len(expected)) + expected)
+
+    def test_send_queue_blocks_producer_when_full(self, mock_PeachyUSB):
+        def slow_write(data):
+            time.sleep(0.02)
+        mock_PeachyUSB.return_value.write.side_effect = slow_write
+        communicator = UsbPacketCommunicator(50, send_queue_size=1)
+        communicator.start()
+
+        for i in range(5):
+            communicator.send(MoveMessage(i, 2, 3))
+        stats = communicator.transport_stats()
+        communicator.close()
+
+        self.assertTrue(stats['blocked_time'] > 0.0)
+        self.assertEqual(1, stats['queue_size'])
+
+    def test_discard_pending_drops_queued_frames(self, mock_PeachyUSB):
+        writing = threading.Event()
+        release = threading.Event()
+
+        def blocked_write(data):
+            writing.set()
+            release.wait(2.0)
+        mock_PeachyUSB.return_value.write.side_effect = blocked_write
+        communicator = UsbPacketCommunicator(50, send_queue_size=10)
+        communicator.start()
+
+        for i in range(5):
+            communicator.send(MoveMessage(i, 2, 3))
+        writing.wait(2.0)
+        communicator.discard_pending()
+        release.set()
+        communicator.close()
+
+        self.assertEqual(1, mock_PeachyUSB.return_value.write.call_count)
+
+    def test_pause_turns_the_laser_off_and_keeps_queued_frames_until_resumed(self, mock_PeachyUSB):
+        write = mock_PeachyUSB.return_value.write
+        communicator = UsbPacketCommunicator(50, send_queue_size=10)
+        communicator.start()
+        communicator.send(MoveMessage(1, 2, 3))
+        self.wait_for(lambda: write.call_count == 1)
+
+        communicator.pause()
+        communicator.send(MoveMessage(4, 5, 6))
+        self.wait_for(lambda: write.call_count == 2)
+        time.sleep(0.15)
+
+        self.assertEqual(2, write.call_count)
+        self.assertEqual(frame_message(MoveMessage(1, 2, 0)), write.call_args[0][0])
+
+        communicator.resume()
+        self.wait_for(lambda: write.call_count == 3)
+        communicator.close()
+
+        self.assertEqual(frame_message(MoveMessage(4, 5, 6)), write.call_args[0][0])
+
+    def test_discard_pending_stops_expanding_a_hold(self, mock_PeachyUSB):
+        communicator = UsbPacketCommunicator(50)
+        communicator.start()
+        mock_PeachyUSB.return_value.write.side_effect = lambda data: communicator.discard_pending()
+
+        communicator.send(HoldMessage(1, 2, 3, 100))
+
+        self.assertEqual(1, mock_PeachyUSB.return_value.write.call_count)
+
+    def test_send_raises_missing_printer_after_sender_write_fails(self, mock_PeachyUSB):
+        mock_PeachyUSB.return_value.write.side_effect = Exception('Detached')
+        communicator = UsbPacketCommunicator(50, send_queue_size=10)
+        communicator.start()
+
+        communicator.send(MoveMessage(1, 2, 3))
+        self.wait_for(lambda: communicator._sender.error is not None)
+
+        with self.assertRaises(MissingPrinterException):
+            communicator.send(MoveMessage(1, 2, 3))
+        communicator.close()
+
+    def test_capture_records_outgoing_and_incoming_frames(self, mock_PeachyUSB):
+        folder = tempfile.mkdtemp()
+        try:
+            trace_file = os.path.join(folder, 'capture.trace')
+            move = MoveMessage(1, 2, 3)
+            communicator = UsbPacketCommunicator(50, dispatch_queue_size=0)
+            communicator.start()
+            communicator.start_capture(trace_file)
+            data, length, buf = self._received(DripRecordedMessage(77))
+
+            communicator.send(move)
+            communicator._process(data, length)
+            communicator.stop_capture()
+            communicator.send(move)
+
+            records = [(direction, frame) for (direction, timestamp, frame) in TraceReader(trace_file)]
+            expected = chr(move.TYPE_ID) + move.get_bytes()
+            self.assertEqual([(OUTGOING, chr(len(expected)) + expected), (INCOMING, buf.raw)], records)
+        finally:
+            shutil.rmtree(folder)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,240 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import shutil
+import logging
+from mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.compiled_print import *
+from peachyprinter.infrastructure.communicator import frame_message
+from peachyprinter.infrastructure.messages import MoveMessage, HoldMessage
+from peachyprinter.api.print_api import PrintAPI
+import test_helpers
+
+
+class CompiledPrintTests(unittest.TestCase, test_helpers.TestHelpers):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.compiled_folder = os.path.join(self.folder, 'compiled')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_configuration_fingerprint_changes_with_calibration(self):
+        config = self.default_config
+        before = configuration_fingerprint(config)
+        self.assertEquals(before, configuration_fingerprint(self.default_config))
+        config.calibration.max_deflection = 0.5
+        self.assertNotEquals(before, configuration_fingerprint(config))
+
+    def test_configuration_fingerprint_ignores_email_settings(self):
+        config = self.default_config
+        before = configuration_fingerprint(config)
+        config.email.host = 'mail.example.com'
+        self.assertEquals(before, configuration_fingerprint(config))
+
+    def test_frame_recorder_records_frames_and_position(self):
+        recorder = FrameRecorder()
+        move = MoveMessage(1, 2, 3)
+        hold = HoldMessage(4, 5, 6, 7)
+        recorder.send(move)
+        recorder.send(move)
+        recorder.send(hold)
+
+        self.assertEquals(frame_message(move) * 2 + frame_message(hold), recorder.take())
+        self.assertEquals('', recorder.take())
+        self.assertEquals((4, 5), recorder.position)
+
+    def test_written_layers_can_be_read_back(self):
+        writer = CompiledPrintWriter(self.compiled_folder, 'abc', source='thing.gcode', data_rate=8000)
+        writer.add_layer(0.1, 'layer one', [[0.0, 1.0], [0.0, 1.0], 0.1], (1, 2))
+        writer.add_layer(0.2, 'layer 2', [[0.0, 1.0], [0.0, 1.0], 0.2], (3, 4))
+        writer.close()
+
+        compiled = CompiledPrint(self.compiled_folder)
+        self.assertEquals('abc', compiled.fingerprint)
+        self.assertEquals('thing.gcode', compiled.source)
+        self.assertEquals(2, len(compiled.layers))
+        self.assertEquals('layer 2', compiled.read(compiled.layers[1]))
+        self.assertEquals('layer one', compiled.read(compiled.layers[0]))
+        self.assertEquals([3, 4], compiled.layers[1].end)
+        compiled.close()
+
+    def test_compiled_print_raises_when_missing(self):
+        with self.assertRaises(Exception):
+            CompiledPrint(self.compiled_folder)
+
+    def test_verify_raises_when_configuration_changed(self):
+        config = self.default_config
+        writer = CompiledPrintWriter(self.compiled_folder, configuration_fingerprint(config))
+        writer.close()
+        compiled = CompiledPrint(self.compiled_folder)
+        compiled.verify(config)
+        config.calibration.height = config.calibration.height + 1.0
+        with self.assertRaises(Exception):
+            compiled.verify(config)
+        compiled.close()
+
+    def test_layer_generator_starts_at_height(self):
+        writer = CompiledPrintWriter(self.compiled_folder, 'abc')
+        for z in [0.1, 0.2, 0.3]:
+            writer.add_layer(z, 'a', None, None)
+        writer.close()
+        compiled = CompiledPrint(self.compiled_folder)
+
+        layers = list(CompiledLayerGenerator(compiled, start_height=0.2))
+
+        self.assertEquals([0.2, 0.3], [layer.z for layer in layers])
+        compiled.close()
+
+    def test_layer_writer_sends_each_frame_and_returns_axis(self):
+        frames = [frame_message(MoveMessage(1, 2, 3)), frame_message(HoldMessage(4, 5, 6, 7))]
+        writer = CompiledPrintWriter(self.compiled_folder, 'abc')
+        writer.add_layer(0.1, ''.join(frames), [[0.0, 1.0], [0.0, 1.0], 0.1], (4, 5))
+        writer.close()
+        compiled = CompiledPrint(self.compiled_folder)
+        communicator = MagicMock()
+        layer_writer = CompiledLayerWriter(compiled, communicator, 8000)
+
+        axis = layer_writer.process_layer(compiled.layers[0])
+
+        self.assertEquals([[0.0, 1.0], [0.0, 1.0], 0.1], axis)
+        self.assertEquals(frames, [args[0][0] for args in communicator.send_frame.call_args_list])
+        self.assertEquals(8, layer_writer.samples_written)
+        layer_writer.terminate()
+        communicator.close.assert_called_with()
+
+    def test_layer_writer_abort_stops_the_layer(self):
+        writer = CompiledPrintWriter(self.compiled_folder, 'abc')
+        writer.add_layer(0.1, frame_message(MoveMessage(1, 2, 3)) * 3, None, None)
+        writer.close()
+        compiled = CompiledPrint(self.compiled_folder)
+        communicator = MagicMock()
+        layer_writer = CompiledLayerWriter(compiled, communicator, 8000)
+        communicator.send_frame.side_effect = lambda frame: layer_writer.abort_current_command()
+
+        layer_writer.process_layer(compiled.layers[0])
+
+        self.assertEquals(1, communicator.send_frame.call_count)
+        compiled.close()
+
+    def test_layer_writer_splits_long_holds_and_records_abort_latency(self):
+        writer = CompiledPrintWriter(self.compiled_folder, 'abc')
+        writer.add_layer(0.1, frame_message(HoldMessage(1, 2, 3, 8000)), None, None)
+        writer.close()
+        compiled = CompiledPrint(self.compiled_folder)
+        communicator = MagicMock()
+        layer_writer = CompiledLayerWriter(compiled, communicator, 8000, max_abort_latency=0.02)
+        sent = []
+
+        def send(message):
+            sent.append(message)
+            if len(sent) == 3:
+                layer_writer.abort_current_command()
+        communicator.send.side_effect = send
+
+        layer_writer.process_layer(compiled.layers[0])
+
+        self.assertEquals([80, 80, 80], [message.count for message in sent])
+        self.assertEquals(240, layer_writer.samples_written)
+        communicator.discard_pending.assert_called_with()
+        self.assertEquals(1, layer_writer.abort_stats()['count'])
+        compiled.close()
+
+    def test_layer_writer_abort_between_layers_does_not_stop_the_next_layer(self):
+        writer = CompiledPrintWriter(self.compiled_folder, 'abc')
+        writer.add_layer(0.1, frame_message(MoveMessage(1, 2, 3)) * 3, None, None)
+        writer.close()
+        compiled = CompiledPrint(self.compiled_folder)
+        communicator = MagicMock()
+        layer_writer = CompiledLayerWriter(compiled, communicator, 8000)
+
+        layer_writer.abort_current_command()
+        layer_writer.process_layer(compiled.layers[0])
+
+        self.assertEquals(3, communicator.send_frame.call_count)
+        self.assertEquals(0, layer_writer.abort_stats()['count'])
+        compiled.close()
+
+    def test_layer_writer_pause_turns_the_laser_off_and_keeps_the_layer_until_resumed(self):
+        frames = [frame_message(MoveMessage(1, 2, 3)), frame_message(MoveMessage(4, 5, 6))]
+        writer = CompiledPrintWriter(self.compiled_folder, 'abc')
+        writer.add_layer(0.1, ''.join(frames), None, None)
+        writer.close()
+        compiled = CompiledPrint(self.compiled_folder)
+        communicator = MagicMock()
+        layer_writer = CompiledLayerWriter(compiled, communicator, 8000)
+        communicator.send_frame.side_effect = lambda frame: layer_writer.pause()
+
+        def laser_off(message):
+            self.assertEquals([frames[0]], [args[0][0] for args in communicator.send_frame.call_args_list])
+            layer_writer.resume()
+        communicator.send.side_effect = laser_off
+
+        layer_writer.process_layer(compiled.layers[0])
+
+        self.assertEquals((1, 2, 0), (communicator.send.call_args[0][0].x_pos, communicator.send.call_args[0][0].y_pos, communicator.send.call_args[0][0].laser_power))
+        self.assertEquals(frames, [args[0][0] for args in communicator.send_frame.call_args_list])
+        compiled.close()
+
+    def test_layer_writer_holds_laser_off_at_end_position_while_waiting(self):
+        writer = CompiledPrintWriter(self.compiled_folder, 'abc')
+        writer.add_layer(0.1, '', None, (4, 5))
+        writer.close()
+        compiled = CompiledPrint(self.compiled_folder)
+        communicator = MagicMock()
+        communicator.send.side_effect = lambda message: time.sleep(0.001)
+        layer_writer = CompiledLayerWriter(compiled, communicator, 8000)
+        layer_writer.process_layer(compiled.layers[0])
+
+        before = time.time()
+        layer_writer.wait_till_time(before + 0.1)
+        after = time.time()
+
+        holds = [args[0][0] for args in communicator.send.call_args_list]
+        self.assertTrue(after - before < 0.15)
+        self.assertEquals(set([(4, 5, 0)]), set((hold.x_pos, hold.y_pos, hold.laser_power) for hold in holds))
+        self.assertTrue(max(hold.count for hold in holds) <= 80)
+        self.assertAlmostEquals(800, sum(hold.count for hold in holds), delta=40)
+        compiled.close()
+
+    def test_print_api_compile_gcode_renders_each_layer(self):
+        gcode_file = os.path.join(self.folder, 'test.gcode')
+        with open(gcode_file, 'w') as afile:
+            afile.write("G1 Z0.1\nG1 X1.0 Y1.0 F100\nG1 X2.0 Y1.0 E1\nG1 Z0.2\nG1 X1.0 Y1.0 E1\n")
+        config = self.default_config
+        config.options.use_sublayers = False
+        config.options.use_shufflelayers = False
+        config.options.use_overlap = False
+        config.circut.data_rate = 8000
+
+        PrintAPI(config).compile_gcode(gcode_file, self.compiled_folder)
+
+        compiled = CompiledPrint(self.compiled_folder)
+        compiled.verify(config)
+        self.assertEquals([0.1, 0.2], [layer.z for layer in compiled.layers])
+        for layer in compiled.layers:
+            data = compiled.read(layer)
+            self.assertTrue(len(data) > 0)
+            self.assertTrue(ord(data[1]) in (MoveMessage.TYPE_ID, HoldMessage.TYPE_ID))
+        compiled.close()
+
+    def test_print_api_compile_gcode_requires_a_data_rate(self):
+        gcode_file = os.path.join(self.folder, 'test.gcode')
+        with open(gcode_file, 'w') as afile:
+            afile.write("G1 Z0.1\n")
+        config = self.default_config
+        config.circut.data_rate = 0
+
+        with self.assertRaises(Exception):
+            PrintAPI(config).compile_gcode(gcode_file, self.compiled_folder)
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
@@ -14,6 +14,7 @@ from peachyprinter.infrastructure.machine import MachineStatus
 from peachyprinter.infrastructure.controller import *
 from peachyprinter.infrastructure.layer_generators import StubLayerGenerator
 from peachyprinter.infrastructure.communicator import MissingPrinterException
+from peachyprinter.infrastructure.pipeline import PipelineStage
 
 @patch('infrastructure.layer_control.LayerWriter')
 @patch('infrastructure.layer_control.LayerProcessing')
@@ -59,6 +60,34 @@ class ControllerTests(unittest.TestCase):
 
         self.assertEquals("Complete", self.controller.get_status()['status'])
 
+    def test_stages_are_reported_and_closed_when_complete(self, mock_LayerGenerator, mock_LayerWriter, mock_LayerProcessing):
+        mock_layer_writer = mock_LayerWriter.return_value
+        mock_layer_processing = mock_LayerProcessing.return_value
+        stage = PipelineStage('generate', StubLayerGenerator([Layer(1.0), Layer(2.0)]))
+
+        self.controller = Controller(mock_layer_writer, mock_layer_processing, stage, MachineStatus(), True, stages=[stage])
+        self.controller.start()
+        self.wait_for_controller()
+
+        stats = self.controller.stage_stats()
+        self.assertEquals(['generate', 'print'], [stage_stats['name'] for stage_stats in stats])
+        self.assertEquals([2, 2], [stage_stats['items'] for stage_stats in stats])
+        self.assertFalse(stage._running)
+
+    def test_close_does_not_wait_for_a_stalled_stage(self, mock_LayerGenerator, mock_LayerWriter, mock_LayerProcessing):
+        mock_layer_writer = mock_LayerWriter.return_value
+        mock_layer_processing = mock_LayerProcessing.return_value
+        stage = PipelineStage('render', StubLayerGenerator([Layer(1.0)]), lambda layer: time.sleep(5.0) or layer)
+        self.controller = Controller(mock_layer_writer, mock_layer_processing, stage, MachineStatus(), True, stages=[stage])
+        self.controller.start()
+        time.sleep(0.05)
+
+        start = time.time()
+        self.controller.close()
+
+        self.assertTrue(time.time() - start < 1.0)
+        self.assertEquals("Cancelled", self.controller.get_status()['status'])
+
     def test_run_should_record_errors_and_abort(self, mock_LayerGenerator, mock_LayerWriter, mock_LayerProcessing):
         mock_layer_writer = mock_LayerWriter.return_value
         mock_layer_processing = mock_LayerProcessing.return_value
@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import logging
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.drip_history import DripHistory
+
+
+class DripHistoryTests(unittest.TestCase):
+
+    def test_empty_history_has_no_statistics(self):
+        history = DripHistory(5)
+
+        self.assertEquals(0, len(history))
+        self.assertEquals(0, len(history.view()))
+        self.assertEquals(None, history.last)
+        self.assertEquals(None, history.last_interval)
+        self.assertEquals(None, history.interval_variance)
+        self.assertEquals(0.0, history.rate)
+
+    def test_view_returns_newest_entries_oldest_first(self):
+        history = DripHistory(5)
+        for timestamp in range(8):
+            history.append(float(timestamp))
+
+        self.assertEquals([3.0, 4.0, 5.0, 6.0, 7.0], history.view().tolist())
+        self.assertEquals([6.0, 7.0], history.view(2).tolist())
+        self.assertEquals(5, len(history))
+        self.assertEquals(8, history.total)
+
+    def test_view_is_read_only(self):
+        history = DripHistory(5)
+        history.append(1.0)
+
+        with self.assertRaises(ValueError):
+            history.view()[0] = 2.0
+
+    def test_view_is_kept_through_the_next_append(self):
+        history = DripHistory(5)
+        for timestamp in range(8):
+            history.append(float(timestamp))
+        view = history.view()
+
+        history.append(8.0)
+
+        self.assertEquals([3.0, 4.0, 5.0, 6.0, 7.0], view.tolist())
+        self.assertEquals([4.0, 5.0, 6.0, 7.0, 8.0], history.view().tolist())
+
+    def test_append_with_count_adds_repeated_timestamps(self):
+        history = DripHistory(5)
+        history.append(1.0)
+        history.append(2.0, 3)
+
+        self.assertEquals([1.0, 2.0, 2.0, 2.0], history.view().tolist())
+
+    def test_statistics_match_the_held_intervals(self):
+        history = DripHistory(6)
+        times = [0.0, 0.5, 1.1, 1.4, 2.0, 2.9, 3.1, 3.9, 4.0]
+        for timestamp in times:
+            history.append(timestamp)
+        intervals = numpy.diff(times[-6:])
+
+        self.assertAlmostEquals(intervals.mean(), history.interval_mean)
+        self.assertAlmostEquals(intervals.var(), history.interval_variance)
+        self.assertAlmostEquals(1.0 / intervals.mean(), history.rate)
+        self.assertAlmostEquals(0.1, history.last_interval)
+        self.assertEquals(4.0, history.last)
+
+    def test_statistics_stay_accurate_over_many_wraps(self):
+        history = DripHistory(10)
+        for drip in range(10000):
+            history.append(1000000.0 + drip * 0.25)
+
+        self.assertAlmostEquals(4.0, history.rate)
+        self.assertAlmostEquals(0.0, history.interval_variance)
+
+    def test_clear_empties_history(self):
+        history = DripHistory(5)
+        history.append(1.0, 3)
+        history.clear()
+
+        self.assertEquals(0, len(history))
+        self.assertEquals(None, history.last)
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
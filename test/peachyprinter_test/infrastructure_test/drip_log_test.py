@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import logging
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.drip_log import DripLogWriter, load_drip_log, load_drip_logs
+
+
+class DripLogTests(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def log_file(self, name='print.drips'):
+        return os.path.join(self.folder, name)
+
+    def write_log(self, records, name='print.drips'):
+        writer = DripLogWriter(self.log_file(name))
+        for drips, layer in records:
+            writer.record(drips, layer)
+        writer.close()
+        return self.log_file(name)
+
+    def test_records_are_loaded_as_arrays(self):
+        log_file = self.write_log([(1, 0), (2, 0), (3, 1)])
+
+        start_time, log = load_drip_log(log_file)
+
+        self.assertTrue(start_time > 0)
+        self.assertEquals([1, 2, 3], log['drips'].tolist())
+        self.assertEquals([0, 0, 1], log['layer'].tolist())
+        self.assertTrue((log['time'][1:] >= log['time'][:-1]).all())
+
+    def test_repeated_drip_counts_are_not_recorded(self):
+        log_file = self.write_log([(1, 0), (1, 0), (1.2, 1), (2, 1)])
+
+        start_time, log = load_drip_log(log_file)
+
+        self.assertEquals([1, 2], log['drips'].tolist())
+
+    def test_partially_written_records_are_ignored(self):
+        log_file = self.write_log([(1, 0), (2, 0)])
+        with open(log_file, 'ab') as log:
+            log.write('\x01\x02\x03')
+
+        start_time, log = load_drip_log(log_file)
+
+        self.assertEquals([1, 2], log['drips'].tolist())
+
+    def test_load_raises_for_files_that_are_not_drip_logs(self):
+        with open(self.log_file(), 'wb') as log:
+            log.write('NOTADRIPLOGATALL' * 2)
+
+        with self.assertRaises(Exception):
+            load_drip_log(self.log_file())
+
+    def test_load_drip_logs_combines_prints(self):
+        first = self.write_log([(1, 0), (2, 1)], 'first.drips')
+        second = self.write_log([(1, 0)], 'second.drips')
+
+        logs = load_drip_logs([first, second])
+
+        self.assertEquals([1, 2, 1], logs['drips'].tolist())
+        self.assertEquals([0, 0, 1], logs['print'].tolist())
+
+    def test_close_can_be_called_twice(self):
+        writer = DripLogWriter(self.log_file())
+        writer.close()
+        writer.close()
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
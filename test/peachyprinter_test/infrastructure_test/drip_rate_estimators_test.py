@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.drip_rate_estimators import EWMADripRateEstimator, KalmanDripRateEstimator
+
+
+class DripRateEstimatorTests(object):
+
+    def drip(self, estimator, intervals, start=100.0):
+        timestamp = start
+        estimator.add_drips(timestamp)
+        for interval in intervals:
+            timestamp += interval
+            estimator.add_drips(timestamp)
+        return timestamp
+
+    def test_has_no_confidence_before_drips(self):
+        estimator = self.estimator()
+
+        self.assertEquals(0.0, estimator.confidence)
+        self.assertEquals(0.0, estimator.predicted_drips(10.0))
+        self.assertEquals(None, estimator.predicted_time_of_drips(1))
+
+    def test_converges_on_a_steady_rate(self):
+        estimator = self.estimator()
+
+        self.drip(estimator, [0.5] * 60)
+
+        self.assertAlmostEquals(2.0, estimator.rate, places=2)
+        self.assertAlmostEquals(0.0, estimator.trend, places=2)
+        self.assertTrue(estimator.confidence > 0.8)
+
+    def test_predicts_drips_and_time_of_drips_at_a_steady_rate(self):
+        estimator = self.estimator()
+        last = self.drip(estimator, [0.5] * 60)
+
+        self.assertAlmostEquals(61 + 20, estimator.predicted_drips(last + 10.0), delta=0.5)
+        self.assertAlmostEquals(last + 10.0, estimator.predicted_time_of_drips(61 + 20), delta=0.25)
+
+    def test_tracks_an_increasing_rate_as_a_positive_trend(self):
+        estimator = self.estimator()
+        rate = 1.0
+        intervals = []
+        for drip in range(100):
+            intervals.append(1.0 / rate)
+            rate += 0.02 / rate
+
+        self.drip(estimator, intervals)
+
+        self.assertAlmostEquals(rate, estimator.rate, delta=0.1)
+        self.assertTrue(estimator.trend > 0.005)
+
+    def test_irregular_drips_reduce_confidence(self):
+        steady = self.estimator()
+        irregular = self.estimator()
+
+        self.drip(steady, [0.5] * 60)
+        self.drip(irregular, [0.2, 0.8] * 30)
+
+        self.assertTrue(irregular.confidence < steady.confidence)
+
+    def test_drips_at_the_same_time_count_towards_the_next_interval(self):
+        estimator = self.estimator()
+        timestamp = self.drip(estimator, [1.0] * 30)
+        estimator.add_drips(timestamp)
+        for drip in range(30):
+            timestamp += 1.0
+            estimator.add_drips(timestamp, 2)
+
+        self.assertEquals(92, estimator.drips)
+        self.assertAlmostEquals(2.0, estimator.rate, delta=0.1)
+
+    def test_reset_clears_the_model(self):
+        estimator = self.estimator()
+        self.drip(estimator, [0.5] * 10)
+
+        estimator.reset()
+
+        self.assertEquals(0, estimator.drips)
+        self.assertEquals(None, estimator.last_time)
+        self.assertEquals(0.0, estimator.confidence)
+
+
+class EWMADripRateEstimatorTests(unittest.TestCase, DripRateEstimatorTests):
+    def estimator(self):
+        return EWMADripRateEstimator()
+
+
+class KalmanDripRateEstimatorTests(unittest.TestCase, DripRateEstimatorTests):
+    def estimator(self):
+        return KalmanDripRateEstimator()
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+import logging
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.event_bus import *
+
+
+class BlockingSubscriber(object):
+    def __init__(self):
+        self.events = []
+        self.threads = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, event):
+        self.started.set()
+        self.release.wait(5)
+        self.events.append(event)
+        self.threads.append(threading.current_thread())
+
+
+class EventBusTests(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = EventBus()
+
+    def tearDown(self):
+        self.bus.close()
+
+    def test_delivers_events_in_order_off_the_publishing_thread(self):
+        subscriber = BlockingSubscriber()
+        subscriber.release.set()
+        self.bus.subscribe(subscriber)
+
+        self.bus.publish(LayerStarted(1, 0.1))
+        self.bus.publish(LayerCompleted(1, 0.1, 0.5, 100))
+        self.bus.close()
+
+        self.assertEquals([LayerStarted, LayerCompleted], [type(event) for event in subscriber.events])
+        self.assertFalse(threading.current_thread() in subscriber.threads)
+
+    def test_delivers_only_subscribed_event_types(self):
+        received = []
+        self.bus.subscribe(received.append, [StateChanged, PrintError])
+
+        self.bus.publish(LayerStarted(1, 0.1))
+        self.bus.publish(StateChanged('Running'))
+        self.bus.publish(PrintError('broken', 1))
+        self.bus.close()
+
+        self.assertEquals([StateChanged, PrintError], [type(event) for event in received])
+
+    def test_slow_subscriber_gets_latest_coalescing_event(self):
+        subscriber = BlockingSubscriber()
+        subscription = self.bus.subscribe(subscriber)
+        self.bus.publish(StateChanged('Running'))
+        subscriber.started.wait(5)
+
+        for drips in range(1, 6):
+            self.bus.publish(Drip(drips, drips * 0.1, 1.0))
+        self.bus.publish(LayerStarted(1, 0.1))
+        subscriber.release.set()
+        self.bus.close()
+
+        self.assertEquals([StateChanged, Drip, LayerStarted], [type(event) for event in subscriber.events])
+        self.assertEquals(5, subscriber.events[1].drips)
+        self.assertEquals(4, subscription.coalesced)
+
+    def test_oldest_events_dropped_past_max_pending(self):
+        subscriber = BlockingSubscriber()
+        subscription = self.bus.subscribe(subscriber, max_pending=2)
+        self.bus.publish(LayerStarted(1, 0.1))
+        subscriber.started.wait(5)
+
+        for layer in range(2, 6):
+            self.bus.publish(LayerStarted(layer, layer * 0.1))
+        subscriber.release.set()
+        self.bus.close()
+
+        self.assertEquals([1, 4, 5], [event.layer for event in subscriber.events])
+        self.assertEquals(2, subscription.dropped)
+
+    def test_failing_subscriber_keeps_receiving_and_does_not_affect_others(self):
+        failed = []
+        received = []
+
+        def failing(event):
+            failed.append(event)
+            raise Exception('Boom')
+        self.bus.subscribe(failing)
+        self.bus.subscribe(received.append)
+
+        self.bus.publish(LayerStarted(1, 0.1))
+        self.bus.publish(LayerStarted(2, 0.2))
+        self.bus.close()
+
+        self.assertEquals(2, len(failed))
+        self.assertEquals(2, len(received))
+
+    def test_unsubscribe_stops_delivery(self):
+        received = []
+        subscription = self.bus.subscribe(received.append)
+        self.bus.publish(LayerStarted(1, 0.1))
+
+        self.bus.unsubscribe(subscription)
+        self.bus.publish(LayerStarted(2, 0.2))
+
+        self.assertEquals([1], [event.layer for event in received])
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.frame_cache import FrameCache
+
+
+class FrameCacheTests(unittest.TestCase):
+
+    def test_get_returns_none_for_missing_key(self):
+        cache = FrameCache()
+        self.assertEqual(None, cache.get((2, 1, 1, 1)))
+
+    def test_get_returns_stored_frame(self):
+        cache = FrameCache()
+        cache.put((2, 1, 1, 1), 'frame')
+        self.assertEqual('frame', cache.get((2, 1, 1, 1)))
+
+    def test_put_evicts_least_recently_used_when_full(self):
+        cache = FrameCache(2)
+        cache.put('a', 'frame_a')
+        cache.put('b', 'frame_b')
+        cache.get('a')
+        cache.put('c', 'frame_c')
+
+        self.assertEqual(2, len(cache))
+        self.assertEqual('frame_a', cache.get('a'))
+        self.assertEqual(None, cache.get('b'))
+        self.assertEqual('frame_c', cache.get('c'))
+
+    def test_zero_capacity_stores_nothing(self):
+        cache = FrameCache(0)
+        cache.put('a', 'frame_a')
+        self.assertEqual(None, cache.get('a'))
+
+    def test_stats_reports_hits_misses_and_hit_rate(self):
+        cache = FrameCache(10)
+        cache.put('a', 'frame_a')
+        cache.get('a')
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+
+        stats = cache.stats()
+
+        self.assertEqual(3, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(0.75, stats['hit_rate'])
+        self.assertEqual(1, stats['size'])
+        self.assertEqual(10, stats['capacity'])
+
+    def test_hit_rate_is_zero_before_lookups(self):
+        self.assertEqual(0.0, FrameCache().hit_rate)
+
+    def test_clear_empties_cache_and_resets_stats(self):
+        cache = FrameCache()
+        cache.put('a', 'frame_a')
+        cache.get('a')
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.hits)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='DEBUG')
+    unittest.main()
@@ -178,6 +178,7 @@ class GCodeToLayerGeneratorTests(unittest.TestCase, test_helpers.TestHelpers):
 
         mock_gcode_command_reader = mock_GCodeCommandReader.return_value
         mock_gcode_command_reader.to_command.side_effect = side_effect
+        mock_gcode_command_reader.scan.return_value = 5.0
 
         gcode_line = "G01 Z0.1 F100.0"
         test_gcode = StringIO.StringIO(gcode_line)
@@ -210,8 +211,71 @@ class GCodeToLayerGeneratorTests(unittest.TestCase, test_helpers.TestHelpers):
 
         self.assertLayersEquals(expected, actual)
 
+    def test_layers_resumed_from_a_source_position_match_those_read_from_the_start(self):
+        gcode = "G1 F600\nG1 Z0.1\nG1 X1.0 Y1.0 E1\nG1 Z0.2\nG1 X2.0 Y1.0 E1\nG1 Z0.3\nG1 X2.0 Y2.0 E1\nG1 X0.0 Y0.0\n"
+        expected = list(GCodeToLayerGenerator(StringIO.StringIO(gcode)))
+        layer_generator = GCodeToLayerGenerator(StringIO.StringIO(gcode))
+        layer_generator.next()
+        layer_generator.next()
+
+        position = layer_generator.source_position(0.2)
+        actual = list(GCodeToLayerGenerator(StringIO.StringIO(gcode), position=position))
+
+        self.assertEquals(0.2, position['z'])
+        self.assertEquals(gcode.index("G1 Z0.2"), position['offset'])
+        self.assertLayersEquals(expected[1:], actual)
+
+    def test_layers_from_start_height_match_those_read_from_the_start(self):
+        gcode = "G1 F600\nG1 X0.5 Y0.5\nG1 Z0.1\nG1 X1.0 Y1.0 E1\nG1 Z0.2 F1200\nG1 X2.0 Y1.0 E1\nG1 X3.0 Y3.0\nG1 Z0.3\nG1 X2.0 Y2.0 E1\nG1 Z0.4\nG1 X0.0 Y0.0 E1\n"
+        expected = [layer for layer in GCodeToLayerGenerator(StringIO.StringIO(gcode)) if layer.z >= 0.3]
+
+        actual = list(GCodeToLayerGenerator(StringIO.StringIO(gcode), start_height=0.3))
+
+        self.assertLayersEquals(expected, actual)
+
+    def test_start_height_makes_no_commands_below_it(self):
+        gcode = "G1 F600\n" + ''.join("G1 Z%s\nG1 X1.0 Y1.0 E1\nG1 X0.0 Y0.0 E1\n" % (layer / 10.0) for layer in range(1, 101))
+        layer_generator = GCodeToLayerGenerator(StringIO.StringIO(gcode), start_height=9.95)
+
+        get_lateral_movement = GCodeCommandReader._get_lateral_movement
+        with patch.object(GCodeCommandReader, '_get_lateral_movement', autospec=True, side_effect=get_lateral_movement) as mock_get_lateral_movement:
+            actual = list(layer_generator)
+
+        self.assertEquals([10.0], [layer.z for layer in actual])
+        self.assertEquals(2, mock_get_lateral_movement.call_count)
+        self.assertEquals(gcode.index("G1 Z10.0"), layer_generator.source_position(10.0)['offset'])
+
+    def test_source_position_is_the_start_of_the_file_before_the_first_layer(self):
+        layer_generator = GCodeToLayerGenerator(StringIO.StringIO("G1 F600\nG1 Z0.1\nG1 X1.0 Y1.0 E1\n"))
+        layer_generator.next()
+
+        self.assertEquals(0, layer_generator.source_position(0.0)['offset'])
+
 
 class GCodeCommandReaderTest(unittest.TestCase, test_helpers.TestHelpers):
+    def test_state_can_be_restored_to_a_new_reader(self):
+        reader = GCodeCommandReader()
+        reader.to_command("G20")
+        reader.to_command("G1 Z0.1 F60")
+        reader.to_command("G1 X1.0 Y2.0 E1")
+        resumed = GCodeCommandReader()
+
+        resumed.set_state(reader.state())
+
+        self.assertCommandsEqual(reader.to_command("G1 X2.0 Y2.0 E1"), resumed.to_command("G1 X2.0 Y2.0 E1"))
+        self.assertEquals(reader.state(), resumed.state())
+
+    def test_scan_changes_state_as_to_command_does(self):
+        lines = ["G1 F600", "G1 X1.0 Y2.0 E1", "G1 Z0.1", "G1 Z0.2 X3.0 Y3.0", "G1 X4.0", ";Comment", "G1 Z0.5 E1 F120", "G1 X5.0 Y5.0"]
+        reader = GCodeCommandReader()
+        scanner = GCodeCommandReader()
+
+        for line in lines:
+            commands = reader.to_command(line)
+            ends = [command.end for command in commands if type(command) == VerticalMove]
+            self.assertEquals(max(ends) if ends else None, scanner.scan(line))
+            self.assertEquals(reader.state(), scanner.state())
+
     def test_to_command_returns_empty_list_for_comments(self):
         test_gcode_line = ";Comment"
         command_reader = GCodeCommandReader()
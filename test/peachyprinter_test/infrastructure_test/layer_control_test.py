@@ -2,8 +2,10 @@ import unittest
 import os
 import sys
 import time
+import threading
 import logging
-from mock import patch, call, Mock
+import numpy
+from mock import patch, call, Mock, MagicMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
@@ -11,6 +13,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'sr
 from peachyprinter.infrastructure.layer_control import *
 from peachyprinter.domain.commands import *
 from peachyprinter.infrastructure.machine import *
+from peachyprinter.domain.laser_control import LaserControl
+from peachyprinter.infrastructure.checkpoint import PrintCheckpoint
 
 
 @patch('peachyprinter.domain.laser_control.LaserControl')
@@ -81,6 +85,7 @@ class LayerWriterTests(unittest.TestCase):
         mock_disseminator = mock_MicroDisseminator.return_value
         test_layer = Layer(0.0, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)])
         mock_path_to_points.process.return_value = "SomeAudio"
+        mock_path_to_points.samples_per_second = 8000
         mock_laser_control.modulate.return_value = "SomeModulatedAudio"
         self.writer = LayerWriter(
             mock_disseminator, mock_path_to_points, mock_laser_control, MachineState(), override_move_speed=2.0, override_draw_speed=2.0)
@@ -224,21 +229,53 @@ class LayerWriterTests(unittest.TestCase):
         mock_path_to_points.process.assert_called_with(
             [0.0, 0.0, 0.0], [2.0, 2.0, 0.0], expected_move_speed)
 
-    def test_wait_till_time_will_move_to_existing_space(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
+    def test_wait_till_time_dwells_at_existing_space_in_abort_latency_slices(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
         mock_path_to_points = mock_PathToPoints.return_value
+        mock_path_to_points.point.return_value = [0.25, 0.75]
         mock_disseminator = mock_MicroDisseminator.return_value
         mock_laser_control = mock_LaserControl.return_value
         state = MachineState()
         self.writer = LayerWriter(
-            mock_disseminator, mock_path_to_points, mock_laser_control, state, override_move_speed=2.0, override_draw_speed=2.0)
+            mock_disseminator, mock_path_to_points, mock_laser_control, state, override_move_speed=2.0, override_draw_speed=2.0, max_abort_latency=0.1)
 
         before = time.time()
-        self.writer.wait_till_time(before + 1)
+        self.writer.wait_till_time(before + 0.5)
         after = time.time()
 
-        self.assertTrue(before + 1 <= after)
-        mock_path_to_points.process.assert_called_with(
-            state.xyz, state.xyz, state.speed)
+        self.assertTrue(before + 0.5 <= after)
+        mock_path_to_points.point.assert_called_with(state.xyz)
+        dwells = [args[0] for args in mock_disseminator.dwell.call_args_list]
+        self.assertTrue(len(dwells) >= 5)
+        self.assertEqual([[0.25, 0.75]] * len(dwells), [point for point, duration in dwells])
+        self.assertTrue(max(duration for point, duration in dwells) <= 0.1)
+        self.assertAlmostEqual(0.5, sum(duration for point, duration in dwells), delta=0.1)
+        self.assertFalse(mock_path_to_points.process.called)
+
+    def test_wait_till_time_sleeps_only_what_is_left_of_each_slice(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
+        mock_disseminator = mock_MicroDisseminator.return_value
+        mock_disseminator.dwell.side_effect = lambda point, duration: time.sleep(duration * 0.8)
+        self.writer = LayerWriter(
+            mock_disseminator, mock_PathToPoints.return_value, mock_LaserControl.return_value, MachineState(), max_abort_latency=0.05)
+
+        before = time.time()
+        self.writer.wait_till_time(before + 0.5)
+        after = time.time()
+
+        self.assertTrue(after - before < 0.6)
+        self.assertAlmostEqual(0.5, sum(args[0][1] for args in mock_disseminator.dwell.call_args_list), delta=0.05)
+
+    def test_terminate_stops_wait_till_time_within_abort_latency(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
+        mock_disseminator = mock_MicroDisseminator.return_value
+        self.writer = LayerWriter(
+            mock_disseminator, mock_PathToPoints.return_value, mock_LaserControl.return_value, MachineState(), max_abort_latency=0.02)
+        threading.Timer(0.2, self.writer.terminate).start()
+
+        before = time.time()
+        self.writer.wait_till_time(before + 10)
+        after = time.time()
+
+        self.assertTrue(after - before < 0.5)
+        self.assertTrue(max(args[0][1] for args in mock_disseminator.dwell.call_args_list) <= 0.02)
 
     def test_post_fire_delay_will_wait_after_laser_on(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
         mock_path_to_points = mock_PathToPoints.return_value
@@ -281,6 +318,122 @@ class LayerWriterTests(unittest.TestCase):
         self.assertEqual(mock_path_to_points.process.call_args_list[2][0], ([1.0, 1.0, 0.0], [1.5, 1.5, 0.0], 40.0))
         self.assertEquals(2, mock_laser_control.set_laser_on.call_count)
 
+    def test_hold_sends_current_position_with_laser_off(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
+        mock_path_to_points = mock_PathToPoints.return_value
+        mock_path_to_points.point.return_value = [0.25, 0.75]
+        mock_disseminator = mock_MicroDisseminator.return_value
+        mock_laser_control = mock_LaserControl.return_value
+        state = MachineState()
+        state.set_state([1.0, 2.0, 0.5], 10.0)
+        self.writer = LayerWriter(mock_disseminator, mock_path_to_points, mock_laser_control, state)
+
+        self.writer.hold(0.02)
+
+        mock_laser_control.set_laser_off.assert_called_with()
+        mock_path_to_points.point.assert_called_with([1.0, 2.0, 0.5])
+        mock_disseminator.dwell.assert_called_with([0.25, 0.75], 0.02)
+        self.assertFalse(mock_path_to_points.process.called)
+
+    def test_abort_stops_a_long_segment_within_the_abort_latency(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
+        mock_path_to_points = mock_PathToPoints.return_value
+        mock_disseminator = mock_MicroDisseminator.return_value
+        mock_path_to_points.samples_per_second = 8000
+        mock_path_to_points.process.return_value = numpy.zeros((80000, 2))
+        self.writer = LayerWriter(mock_disseminator, mock_path_to_points, mock_LaserControl.return_value, MachineState(), max_abort_latency=0.02)
+        started = threading.Event()
+
+        def send(samples):
+            started.set()
+            time.sleep(len(samples) / 8000.0)
+        mock_disseminator.process.side_effect = send
+        printing = threading.Thread(target=self.writer.process_layer, args=(Layer(0.0, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)]),))
+        printing.start()
+        started.wait(1.0)
+
+        self.writer.abort_current_command()
+        printing.join(1.0)
+
+        self.assertFalse(printing.is_alive())
+        self.assertEquals(80, len(mock_disseminator.process.call_args_list[0][0][0]))
+        self.assertTrue(mock_disseminator.process.call_count < 100)
+        self.assertEquals(80 * mock_disseminator.process.call_count, self.writer.samples_written)
+        mock_disseminator.discard_pending.assert_called_with()
+        stats = self.writer.abort_stats()
+        self.assertEquals(1, stats['count'])
+        self.assertTrue(stats['last'] < 0.1, stats)
+        self.assertEquals(0.02, stats['limit'])
+
+    def test_pause_holds_laser_off_part_way_through_a_segment_until_resumed(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
+        mock_path_to_points = mock_PathToPoints.return_value
+        mock_disseminator = mock_MicroDisseminator.return_value
+        mock_path_to_points.samples_per_second = 8000
+        mock_path_to_points.process.return_value = numpy.zeros((800, 2))
+        laser_control = LaserControl()
+        self.writer = LayerWriter(mock_disseminator, mock_path_to_points, laser_control, MachineState(), max_abort_latency=0.02)
+        paused = threading.Event()
+
+        def send(samples):
+            if mock_disseminator.process.call_count == 2:
+                self.writer.pause()
+        mock_disseminator.process.side_effect = send
+        mock_disseminator.dwell.side_effect = lambda point, duration: paused.set()
+        printing = threading.Thread(target=self.writer.process_layer, args=(Layer(0.0, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)]),))
+        printing.start()
+        paused.wait(1.0)
+        time.sleep(0.05)
+
+        self.assertEquals(2, mock_disseminator.process.call_count)
+        self.assertFalse(laser_control.laser_is_on())
+
+        self.writer.resume()
+        printing.join(1.0)
+
+        self.assertFalse(printing.is_alive())
+        self.assertEquals(10, mock_disseminator.process.call_count)
+        self.assertTrue(laser_control.laser_is_on())
+
+    def test_abort_ends_a_pause(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
+        mock_path_to_points = mock_PathToPoints.return_value
+        mock_disseminator = mock_MicroDisseminator.return_value
+        self.writer = LayerWriter(mock_disseminator, mock_path_to_points, mock_LaserControl.return_value, MachineState())
+        self.writer.pause()
+        printing = threading.Thread(target=self.writer.process_layer, args=(Layer(0.0, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)]),))
+        printing.start()
+        time.sleep(0.05)
+
+        self.writer.abort_current_command()
+        printing.join(1.0)
+
+        self.assertFalse(printing.is_alive())
+        self.assertFalse(mock_disseminator.process.called)
+
+    def test_abort_between_layers_stops_only_the_next_layer(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
+        mock_path_to_points = mock_PathToPoints.return_value
+        mock_disseminator = mock_MicroDisseminator.return_value
+        self.writer = LayerWriter(mock_disseminator, mock_path_to_points, mock_LaserControl.return_value, MachineState())
+        layer = Layer(0.0, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0), LateralDraw([2.0, 2.0], [1.0, 1.0], 2.0)])
+
+        self.writer.abort_current_command()
+        self.writer.process_layer(layer)
+        self.assertEquals(0, mock_disseminator.process.call_count)
+
+        self.writer.process_layer(layer)
+        self.assertEquals(2, mock_disseminator.process.call_count)
+
+    def test_abort_during_wait_till_time_ends_the_wait_and_stops_the_next_layer(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
+        mock_disseminator = mock_MicroDisseminator.return_value
+        self.writer = LayerWriter(mock_disseminator, mock_PathToPoints.return_value, mock_LaserControl.return_value, MachineState())
+        threading.Timer(0.1, self.writer.abort_current_command).start()
+
+        before = time.time()
+        self.writer.wait_till_time(before + 10)
+        after = time.time()
+        time.sleep(0.05)
+        self.writer.process_layer(Layer(0.0, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)]))
+
+        self.assertTrue(after - before < 0.5)
+        self.assertEquals(0, mock_disseminator.process.call_count)
+
     def test_wait_till_time_returns_instantly_if_shutting_down(self, mock_MicroDisseminator, mock_PathToPoints, mock_LaserControl):
         mock_path_to_points = mock_PathToPoints.return_value
         mock_disseminator = mock_MicroDisseminator.return_value
@@ -356,6 +509,10 @@ class LayerWriterTests(unittest.TestCase):
 @patch('peachyprinter.domain.zaxis.ZAxis')
 class LayerProcessingTest(unittest.TestCase):
 
+    def stub_writer(self, mock_Writer):
+        mock_Writer.return_value.process_layer.return_value = [[0.0, 1.0], [0.0, 1.0], 1.0]
+        mock_Writer.return_value.samples_written = 0
+
     def test_process_should_skip_layers_if_higher_then_max_lead_distance(self, mock_ZAxis, mock_Writer):
         max_lead_distance = 0.1
         mock_writer = mock_Writer.return_value
@@ -376,6 +533,7 @@ class LayerProcessingTest(unittest.TestCase):
         self.assertEquals(0, mock_writer.process_layer.call_count)
 
     def test_process_should_print_while_dripping_until_half_max_lead(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
         max_lead_distance = 1.0
         mock_writer = mock_Writer.return_value
         mock_zaxis = mock_ZAxis.return_value
@@ -395,6 +553,7 @@ class LayerProcessingTest(unittest.TestCase):
         mock_zaxis.move_to.assert_has_calls([call(1.5)])
 
     def test_process_should_ignore_z_in_layer_if_z_axis_none(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
         mock_writer = mock_Writer.return_value
         state = MachineState()
         status = MachineStatus()
@@ -408,6 +567,7 @@ class LayerProcessingTest(unittest.TestCase):
         mock_writer.process_layer.assert_called_with(test_layer)
 
     def test_process_should_wait_for_zaxis(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
         mock_writer = mock_Writer.return_value
         mock_zaxis = mock_ZAxis.return_value
         state = MachineState()
@@ -424,7 +584,49 @@ class LayerProcessingTest(unittest.TestCase):
         layer_processing.process(test_layer)
 
         self.assertEqual(1, mock_writer.process_layer.call_count)
-        self.assertEqual(2, mock_writer.wait_till_time.call_count)
+        self.assertEqual(2, mock_writer.hold.call_count)
+
+    def test_wait_for_drips_sends_nothing_while_paused(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
+        mock_writer = mock_Writer.return_value
+        mock_zaxis = mock_ZAxis.return_value
+        height = [0.0]
+        mock_zaxis.current_z_location_mm = lambda: height[0]
+        commander = Mock()
+        layer_processing = LayerProcessing(
+            mock_writer, MachineState(), MachineStatus(), mock_zaxis, commander=commander, hold_slice=0.01, dripper_on_command='o', dripper_off_command='f')
+        layer_processing.pause()
+        processing = threading.Thread(target=layer_processing.process, args=(Layer(1.0, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)]),))
+        processing.start()
+        time.sleep(0.1)
+
+        self.assertEqual(0, mock_writer.hold.call_count)
+        self.assertFalse(call('o') in commander.send_command.call_args_list)
+
+        layer_processing.resume()
+        time.sleep(0.05)
+        height[0] = 1.0
+        processing.join(1.0)
+
+        self.assertFalse(processing.is_alive())
+        self.assertTrue(mock_writer.hold.call_count > 0)
+        self.assertEqual(1, mock_writer.process_layer.call_count)
+
+    def test_process_should_wait_on_zaxis_between_holds(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
+        mock_writer = mock_Writer.return_value
+        mock_zaxis = mock_ZAxis.return_value
+        zaxis_return_values = [0.0, 1.0, 1.0]
+        mock_zaxis.current_z_location_mm = lambda: zaxis_return_values.pop(0)
+        test_layer = Layer(1.0, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)])
+        layer_processing = LayerProcessing(
+            mock_writer, MachineState(), MachineStatus(), mock_zaxis, hold_slice=0.05)
+
+        layer_processing.process(test_layer)
+
+        mock_writer.hold.assert_called_once_with(0.05)
+        mock_zaxis.wait_for_height.assert_called_once_with(1.0, 0.05)
+        self.assertEqual(0, mock_writer.wait_till_time.call_count)
 
     @patch('peachyprinter.infrastructure.machine.MachineStatus')
     def test_process_should_set_waiting_while_wating_for_z(self, mock_MachineStatus, mock_ZAxis, mock_Writer):
@@ -449,7 +651,7 @@ class LayerProcessingTest(unittest.TestCase):
         layer_processing.process(test_layer)
 
         self.assertEqual(1, mock_writer.process_layer.call_count)
-        self.assertEqual(1, mock_writer.wait_till_time.call_count)
+        self.assertEqual(1, mock_writer.hold.call_count)
         self.assertEqual(1, mock_machinestatus.set_waiting_for_drips.call_count)
         self.assertEqual(1, mock_machinestatus.set_not_waiting_for_drips.call_count)
         print commander.send_command.call_args_list
@@ -457,6 +659,7 @@ class LayerProcessingTest(unittest.TestCase):
 
     @patch('peachyprinter.infrastructure.commander.Commander')
     def test_process_should_write_layer_start_and_end_commands(self, mock_Commander, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
         mock_commander = mock_Commander.return_value
         mock_zaxis = mock_ZAxis.return_value
         mock_writer = mock_Writer.return_value
@@ -570,7 +773,28 @@ class LayerProcessingTest(unittest.TestCase):
         actual = status.status()['axis']
         self.assertEquals([expected_axis], actual)
 
+    def test_process_records_layer_duration_and_samples(self, mock_ZAxis, mock_Writer):
+        mock_writer = mock_Writer.return_value
+        mock_writer.samples_written = 100
+        status = MachineStatus()
+        layer_processing = LayerProcessing(mock_writer, MachineState(), status)
+
+        def write(layer):
+            time.sleep(0.01)
+            mock_writer.samples_written += 80
+            return [[0.0, 1.0], [0.0, 1.0], 0.1]
+        mock_writer.process_layer.side_effect = write
+
+        start = time.time()
+        layer_processing.process(Layer(0.1, [LateralDraw([0.0, 0.0], [1.0, 1.0], 2.0)]))
+
+        row = status.layer_stats.view()[0]
+        self.assertEquals(80, row['samples'])
+        self.assertTrue(row['duration'] >= 0.01)
+        self.assertTrue(start <= row['start'] <= time.time())
+
     def test_process_should_update_layer_height(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
         mock_zaxis = mock_ZAxis.return_value
         status = MachineStatus()
         layer_processing = LayerProcessing(
@@ -590,6 +814,7 @@ class LayerProcessingTest(unittest.TestCase):
         self.assertEquals(expected_model_height, actual)
 
     def test_process_should_set_waiting_for_drips(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
         mock_zaxis = mock_ZAxis.return_value
         status = MachineStatus()
         layer_processing = LayerProcessing(
@@ -617,6 +842,7 @@ class LayerProcessingTest(unittest.TestCase):
         self.assertFalse(actual[2])
 
     def test_process_should_tell_writer_to_wait_when_prelayer_delay(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
         mock_zaxis = mock_ZAxis.return_value
         mock_writer = mock_Writer.return_value
         pre_layer_delay = 0.1
@@ -639,6 +865,52 @@ class LayerProcessingTest(unittest.TestCase):
         self.assertTrue(mock_writer.wait_till_time.call_args_list[0][0][0] >= start_time + pre_layer_delay, "Was %s, expected: %s" % (mock_writer.wait_till_time.call_args_list[0][0], start_time + pre_layer_delay))
         self.assertTrue(mock_writer.wait_till_time.call_args_list[0][0][0] <= end_time + pre_layer_delay, "Was %s, expected: %s" % (mock_writer.wait_till_time.call_args_list[0][0], start_time + pre_layer_delay))
 
+    def test_process_records_a_checkpoint_after_each_layer(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
+        mock_writer = mock_Writer.return_value
+        mock_checkpoint = MagicMock()
+        status = MachineStatus()
+        status.drip_call_back(42, 1.0, 1.0)
+        layer_processing = LayerProcessing(mock_writer, MachineState(), status, checkpoint=mock_checkpoint)
+
+        layer_processing.process(Layer(0.1, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)]))
+        layer_processing.process(Layer(0.2, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)]))
+
+        mock_checkpoint.record.assert_has_calls([call(1, 0.1, 42), call(2, 0.2, 42)])
+
+    def test_process_does_not_record_a_checkpoint_for_an_aborted_layer(self, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
+        mock_writer = mock_Writer.return_value
+        mock_checkpoint = MagicMock()
+        layer_processing = LayerProcessing(mock_writer, MachineState(), MachineStatus(), checkpoint=mock_checkpoint)
+
+        def abort(layer):
+            layer_processing._abort_current_command = True
+            return [[None, None], [None, None], None]
+        mock_writer.process_layer.side_effect = abort
+
+        layer_processing.process(Layer(0.1, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)]))
+
+        self.assertFalse(mock_checkpoint.record.called)
+
+    @patch('peachyprinter.infrastructure.checkpoint.write_checkpoint')
+    def test_process_does_not_wait_for_slow_checkpoint_writes(self, mock_write_checkpoint, mock_ZAxis, mock_Writer):
+        self.stub_writer(mock_Writer)
+        mock_write_checkpoint.side_effect = lambda file_name, checkpoint: time.sleep(0.5)
+        source = MagicMock()
+        checkpoint = PrintCheckpoint('print.checkpoint', __file__, source, 'abc')
+        layer_processing = LayerProcessing(mock_Writer.return_value, MachineState(), MachineStatus(), checkpoint=checkpoint)
+
+        start = time.time()
+        for z in [0.1, 0.2, 0.3]:
+            layer_processing.process(Layer(z, [LateralDraw([0.0, 0.0], [2.0, 2.0], 2.0)]))
+        elapsed = time.time() - start
+        checkpoint.close()
+
+        self.assertTrue(elapsed < 0.25, "Processing took %s" % elapsed)
+        self.assertEquals(3, mock_write_checkpoint.call_args[0][1]['layer'])
+        self.assertTrue(mock_write_checkpoint.call_count <= 2)
+
 if __name__ == '__main__':
     logging.basicConfig(
         format='%(asctime)s %(levelname)s: %(message)s', level='DEBUG')
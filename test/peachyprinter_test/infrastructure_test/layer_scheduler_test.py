@@ -0,0 +1,178 @@
+import unittest
+import sys
+import os
+import time
+import logging
+from mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.layer_scheduler import *
+from peachyprinter.infrastructure.compiled_print import FrameRecorder
+from peachyprinter.infrastructure.communicator import frame_message
+from peachyprinter.infrastructure.messages import MoveMessage, HoldMessage
+from peachyprinter.infrastructure.machine import MachineState, MachineStatus
+from peachyprinter.domain.commands import Layer
+
+
+class LayerRendererTests(unittest.TestCase):
+
+    def test_render_returns_frames_samples_axis_and_end(self):
+        recorder = FrameRecorder()
+        writer = MagicMock()
+
+        def process_layer(layer):
+            recorder.send(MoveMessage(1, 2, 3))
+            recorder.send(HoldMessage(4, 5, 6, 10))
+            return [[0.0, 1.0], [0.0, 1.0], layer.z]
+        writer.process_layer.side_effect = process_layer
+
+        rendered = LayerRenderer(writer, recorder).render(Layer(0.5))
+
+        self.assertEquals(0.5, rendered.z)
+        self.assertEquals([frame_message(MoveMessage(1, 2, 3)), frame_message(HoldMessage(4, 5, 6, 10))], rendered.frames)
+        self.assertEquals([1, 10], rendered.samples)
+        self.assertEquals(11, rendered.sample_count)
+        self.assertEquals((4, 5), rendered.end)
+        self.assertEquals([[0.0, 1.0], [0.0, 1.0], 0.5], rendered.axis)
+
+
+class PreRenderingLayerGeneratorTests(unittest.TestCase):
+
+    def test_yields_rendered_layers_in_order_then_stops(self):
+        renderer = MagicMock()
+        renderer.render.side_effect = lambda layer: layer.z
+        generator = PreRenderingLayerGenerator(iter([Layer(0.1), Layer(0.2), Layer(0.3)]), renderer, lookahead=1)
+
+        self.assertEquals([0.1, 0.2, 0.3], list(generator))
+        with self.assertRaises(StopIteration):
+            generator.next()
+
+    def test_rendering_errors_are_raised_from_next(self):
+        renderer = MagicMock()
+        renderer.render.side_effect = Exception("Broken")
+        generator = PreRenderingLayerGenerator(iter([Layer(0.1)]), renderer)
+
+        with self.assertRaises(Exception):
+            generator.next()
+
+    def test_renders_ahead_of_consumer(self):
+        renderer = MagicMock()
+        renderer.render.side_effect = lambda layer: layer.z
+        generator = PreRenderingLayerGenerator(iter([Layer(0.1), Layer(0.2), Layer(0.3)]), renderer, lookahead=2)
+        timeout = time.time() + 5.0
+        while renderer.render.call_count < 3 and time.time() < timeout:
+            time.sleep(0.01)
+
+        self.assertEquals(3, renderer.render.call_count)
+        self.assertEquals([0.1, 0.2, 0.3], list(generator))
+
+
+class RenderedLayerWriterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.move = frame_message(MoveMessage(1, 2, 3))
+        self.hold = frame_message(HoldMessage(4, 5, 6, 10))
+        self.layer = RenderedLayer(0.1, [self.move, self.hold, self.move, self.move], [1, 10, 1, 1], 'axis', (7, 8))
+        self.communicator = MagicMock()
+        self.writer = RenderedLayerWriter(MagicMock(), self.communicator, 1000)
+
+    def sent(self):
+        return [args[0][0] for args in self.communicator.send_frame.call_args_list]
+
+    def test_process_layer_streams_every_frame(self):
+        axis = self.writer.process_layer(self.layer)
+
+        self.assertEquals('axis', axis)
+        self.assertEquals(self.layer.frames, self.sent())
+
+    def test_process_layer_partial_stops_once_fraction_of_samples_played(self):
+        self.writer.process_layer(self.layer, fraction=0.5)
+
+        self.assertEquals([self.move, self.hold], self.sent())
+
+    def test_process_layer_speed_scale_drops_samples_evenly(self):
+        self.writer.process_layer(self.layer, speed_scale=2.0)
+
+        self.assertEquals([frame_message(HoldMessage(4, 5, 6, 5)), self.move], self.sent())
+
+    def test_duration_is_samples_over_data_rate(self):
+        self.assertEquals(0.013, self.writer.duration(self.layer))
+
+
+class LayerSchedulerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = MagicMock()
+        self.writer.duration.return_value = 1.0
+        self.writer.process_layer.return_value = [[0.0, 1.0], [0.0, 1.0], 1.0]
+        self.writer.samples_written = 0
+        self.zaxis = MagicMock()
+        self.zaxis.predicted_height.side_effect = lambda at_time: at_time * 0.1
+        self.status = MachineStatus()
+
+    def scheduler(self, policy, heights):
+        self.zaxis.current_z_location_mm.side_effect = heights
+        return LayerScheduler(self.writer, MachineState(), self.status, policy=policy, zaxis=self.zaxis, max_lead_distance=0.2)
+
+    def test_on_time_layers_are_printed_in_full(self):
+        scheduler = self.scheduler(SKIP, [1.0, 1.0])
+
+        layer = Layer(1.0)
+        scheduler.process(layer)
+
+        self.writer.process_layer.assert_called_with(layer, speed_scale=1.0, fraction=1.0)
+        self.assertEquals([0.0], self.status.status()['scheduling_errors'])
+
+    def test_late_layers_are_skipped_with_skip_policy(self):
+        scheduler = self.scheduler(SKIP, [1.0, 1.0, 1.5, 1.5])
+        scheduler.process(Layer(1.0))
+
+        scheduler.process(Layer(1.1))
+
+        self.assertEquals(1, self.writer.process_layer.call_count)
+        self.assertEquals(1, self.status.status()['skipped_layers'])
+
+    def test_late_layers_are_partly_printed_with_partial_policy(self):
+        self.writer.duration.return_value = 2.0
+        scheduler = self.scheduler(PARTIAL, [1.0, 1.0, 1.5, 1.5])
+        scheduler.process(Layer(1.0))
+
+        scheduler.process(Layer(1.1))
+
+        kwargs = self.writer.process_layer.call_args[1]
+        self.assertEquals(1.0, kwargs['speed_scale'])
+        self.assertAlmostEquals(0.5, kwargs['fraction'], places=4)
+        self.assertEquals(0, self.status.status()['skipped_layers'])
+        self.assertAlmostEquals(4.0, self.status.status()['scheduling_errors'][1], places=4)
+
+    def test_late_layers_are_printed_faster_with_speed_scale_policy(self):
+        self.writer.duration.return_value = 1.5
+        scheduler = self.scheduler(SPEED_SCALE, [1.0, 1.0, 1.5, 1.5])
+        scheduler.process(Layer(1.0))
+
+        scheduler.process(Layer(1.1))
+
+        kwargs = self.writer.process_layer.call_args[1]
+        self.assertAlmostEquals(1.5, kwargs['speed_scale'], places=4)
+        self.assertAlmostEquals(1.0, kwargs['fraction'], places=4)
+
+    def test_speed_scale_beyond_maximum_prints_part_of_the_layer(self):
+        self.writer.duration.return_value = 4.0
+        scheduler = self.scheduler(SPEED_SCALE, [1.0, 1.0, 1.5, 1.5])
+        scheduler.process(Layer(1.0))
+
+        scheduler.process(Layer(1.1))
+
+        kwargs = self.writer.process_layer.call_args[1]
+        self.assertAlmostEquals(2.0, kwargs['speed_scale'], places=4)
+        self.assertAlmostEquals(0.5, kwargs['fraction'], places=4)
+
+    def test_unknown_policy_raises(self):
+        with self.assertRaises(Exception):
+            LayerScheduler(self.writer, MachineState(), self.status, policy='hurry')
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import logging
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.layer_stats import LayerStats
+
+
+class LayerStatsTests(unittest.TestCase):
+
+    def test_append_grows_past_initial_capacity(self):
+        stats = LayerStats(2)
+        for index in range(5):
+            stats.append([[0.0, 1.0], [0.0, 1.0], index * 0.1], start=index, duration=0.5, samples=index, sequence=index + 1)
+
+        self.assertEquals(5, len(stats))
+        self.assertEquals([0, 1, 2, 3, 4], stats.view()['samples'].tolist())
+        self.assertEquals([3.0, 4.0], stats.view(-2)['start'].tolist())
+
+    def test_views_are_read_only(self):
+        stats = LayerStats()
+        stats.append([[0.0, 1.0], [0.0, 1.0], 0.1])
+
+        with self.assertRaises(ValueError):
+            stats.view()['z'][0] = 1.0
+
+    def test_layers_that_drew_nothing_have_no_bounds(self):
+        stats = LayerStats()
+        stats.append([[None, None], [None, None], None])
+
+        self.assertTrue(numpy.isnan(stats.view()['min_x'][0]))
+        self.assertEquals([[[None, None], [None, None], None]], stats.axis(stats.view()))
+        self.assertEquals({'min_x': None, 'max_x': None, 'min_y': None, 'max_y': None}, stats.extents())
+
+    def test_axis_returns_writer_format(self):
+        stats = LayerStats()
+        stats.append([[0.0, 1.0], [-1.0, 0.5], 0.1])
+
+        self.assertEquals([[[0.0, 1.0], [-1.0, 0.5], 0.1]], stats.axis(stats.view()))
+
+    def test_all_axis_converts_only_new_layers(self):
+        stats = LayerStats()
+        stats.append([[0.0, 1.0], [-1.0, 0.5], 0.1])
+        first = stats.all_axis()
+        converted = first[0]
+
+        stats.append([[0.5, 2.0], [0.0, 1.0], 0.2])
+        actual = stats.all_axis()
+
+        self.assertEquals([[[0.0, 1.0], [-1.0, 0.5], 0.1], [[0.5, 2.0], [0.0, 1.0], 0.2]], actual)
+        self.assertTrue(actual[0] is converted)
+
+    def test_extents_cover_every_layer(self):
+        stats = LayerStats()
+        stats.append([[0.0, 1.0], [-1.0, 0.5], 0.1])
+        stats.append([[None, None], [None, None], None])
+        stats.append([[-2.0, 0.5], [0.0, 3.0], 0.2])
+
+        self.assertEquals({'min_x': -2.0, 'max_x': 1.0, 'min_y': -1.0, 'max_y': 3.0}, stats.extents())
+
+    def test_since_returns_layers_appended_after_sequence(self):
+        stats = LayerStats()
+        for sequence in [2, 5, 9]:
+            stats.append([[0.0, 1.0], [0.0, 1.0], sequence / 10.0], sequence=sequence)
+
+        self.assertEquals([5, 9], stats.since(2)['sequence'].tolist())
+        self.assertEquals([9], stats.since(8)['sequence'].tolist())
+        self.assertEquals(0, len(stats.since(9)))
+
+    def test_percentile_of_newest_layers(self):
+        stats = LayerStats()
+        for duration in [1.0, 2.0, 3.0, 4.0, 5.0]:
+            stats.append([[0.0, 1.0], [0.0, 1.0], 0.1], duration=duration)
+
+        self.assertEquals(3.0, stats.percentile('duration', 50))
+        self.assertEquals(4.5, stats.percentile('duration', 50, count=2))
+        self.assertEquals(None, LayerStats().percentile('duration', 50))
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 import os
 import sys
 import logging
-from mock import patch
+from mock import patch, MagicMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
@@ -10,6 +10,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'sr
 import peachyprinter.infrastructure
 from peachyprinter.infrastructure.machine import *
 from peachyprinter.domain.commands import *
+from peachyprinter.infrastructure.event_bus import *
+from peachyprinter.infrastructure.drip_history import DripHistory
 
 
 class MachineStatusTests(unittest.TestCase):
@@ -60,6 +62,25 @@ class MachineStatusTests(unittest.TestCase):
 
         self.assertEqual(1, status.status()['skipped_layers'])
 
+    def test_add_scheduling_error_records_error_per_layer(self):
+        status = MachineStatus()
+        status.add_scheduling_error(0.0)
+        status.add_scheduling_error(0.25)
+
+        self.assertEqual([0.0, 0.25], status.status()['scheduling_errors'])
+
+    def test_only_newest_scheduling_errors_are_kept(self):
+        status = MachineStatus()
+        for layer in range(SCHEDULING_ERRORS_KEPT + 10):
+            status.add_scheduling_error(float(layer))
+        sequence = status.status_since()['sequence']
+        status.add_scheduling_error(-1.0)
+
+        errors = status.status()['scheduling_errors']
+        self.assertEqual(SCHEDULING_ERRORS_KEPT, len(errors))
+        self.assertEqual(11.0, errors[0])
+        self.assertEqual([-1.0], status.status_since(sequence)['scheduling_errors'])
+
     def test_status_is_starting_before_first_drip(self):
         status = MachineStatus()
         self.assertEqual('Starting', status.status()['status'])
@@ -74,6 +95,15 @@ class MachineStatusTests(unittest.TestCase):
         status.add_layer()
         self.assertEqual('Running', status.status()['status'])
 
+    def test_status_is_paused_until_unpaused(self):
+        status = MachineStatus()
+        status.add_layer()
+
+        status.set_paused(True)
+        self.assertEqual('Paused', status.status()['status'])
+        status.set_paused(False)
+        self.assertEqual('Running', status.status()['status'])
+
     def test_set_complete_makes_status_complete(self):
         status = MachineStatus()
         status.set_complete()
@@ -106,6 +136,16 @@ class MachineStatusTests(unittest.TestCase):
 
         self.assertEqual([[[0.0, 1.0], [-1.0, 1.0], 2.0]], status.status()['axis'])
 
+    def test_status_axis_includes_every_layer(self):
+        status = MachineStatus()
+        for layer in range(1500):
+            status.add_axis_data([[0.0, 1.0], [0.0, 1.0], layer / 10.0])
+
+        axis = status.status()['axis']
+
+        self.assertEqual(1500, len(axis))
+        self.assertEqual(0.0, axis[0][2])
+
     def test_set_model_height_update_height_of_layer(self):
         status = MachineStatus()
         status.set_model_height(7.12213)
@@ -169,6 +209,122 @@ class MachineStatusTests(unittest.TestCase):
         status.drip_call_back(67, 12, 12.2, [12, 13])
         self.assertEqual([12, 13], status.status()['drip_history'])
 
+    def test_status_copies_drip_history_view_when_read(self):
+        status = MachineStatus()
+        history = DripHistory(3)
+        for drip_time in [1.0, 2.0, 3.0]:
+            history.append(drip_time)
+        status.drip_call_back(3, 0.3, 1.0, history.view())
+
+        actual = status.status()['drip_history']
+        history.append(4.0)
+        history.append(5.0)
+
+        self.assertEqual([1.0, 2.0, 3.0], actual)
+        self.assertEqual(list, type(actual))
+
+    def test_status_since_without_sequence_returns_everything(self):
+        status = MachineStatus()
+        status.add_layer()
+
+        actual = status.status_since()
+
+        expected = status.status()
+        del expected['elapsed_time']
+        del actual['elapsed_time']
+        self.assertEqual(1, actual.pop('sequence'))
+        self.assertEqual(expected, actual)
+
+    def test_status_since_returns_only_changed_fields(self):
+        status = MachineStatus()
+        sequence = status.status_since()['sequence']
+        status.set_model_height(1.5)
+
+        actual = status.status_since(sequence)
+
+        self.assertEqual(['elapsed_time', 'model_height', 'sequence'], sorted(actual.keys()))
+        self.assertEqual(1.5, actual['model_height'])
+        self.assertTrue(actual['sequence'] > sequence)
+
+    def test_status_since_returns_nothing_new_when_unchanged(self):
+        status = MachineStatus()
+        status.add_layer()
+        sequence = status.status_since()['sequence']
+        status.set_waiting_for_drips()
+
+        self.assertEqual(['elapsed_time', 'sequence'], sorted(status.status_since(sequence).keys()))
+
+    def test_status_since_returns_only_new_list_entries(self):
+        status = MachineStatus()
+        status.add_axis_data([[0.0, 1.0], [0.0, 1.0], 0.1])
+        status.add_error(MachineError('error1'))
+        sequence = status.status_since()['sequence']
+        status.add_axis_data([[0.0, 2.0], [0.0, 1.0], 0.2])
+        status.add_scheduling_error(0.5)
+
+        actual = status.status_since(sequence)
+
+        self.assertEqual([[[0.0, 2.0], [0.0, 1.0], 0.2]], actual['axis'])
+        self.assertEqual([0.5], actual['scheduling_errors'])
+        self.assertFalse('errors' in actual)
+
+    def test_status_since_returns_only_new_drips(self):
+        status = MachineStatus()
+        status.drip_call_back(2, 0.2, 1.0, [1.0, 2.0])
+        sequence = status.status_since()['sequence']
+        status.drip_call_back(4, 0.4, 1.0, [1.0, 2.0, 3.0, 4.0])
+
+        actual = status.status_since(sequence)
+
+        self.assertEqual([3.0, 4.0], actual['drip_history'])
+        self.assertEqual(4, actual['drips'])
+        self.assertEqual('Running', actual['status'])
+
+    def published(self, events):
+        return [call[0][0] for call in events.publish.call_args_list]
+
+    def test_layers_publish_events(self):
+        events = MagicMock()
+        status = MachineStatus(events)
+        status.set_model_height(0.1)
+        status.add_layer()
+        status.add_axis_data([[0.0, 1.0], [0.0, 1.0], 0.1], duration=0.5, samples=100)
+        status.set_model_height(0.2)
+        status.add_layer()
+        status.skipped_layer()
+
+        published = [event for event in self.published(events) if not isinstance(event, StateChanged)]
+
+        self.assertEqual([LayerStarted, LayerCompleted, LayerStarted, LayerSkipped], [type(event) for event in published])
+        self.assertEqual((1, 0.1), (published[0].layer, published[0].z))
+        self.assertEqual((1, 0.1, 0.5, 100), (published[1].layer, published[1].z, published[1].duration, published[1].samples))
+        self.assertEqual((2, 0.2), (published[3].layer, published[3].z))
+
+    def test_state_changed_published_only_when_status_changes(self):
+        events = MagicMock()
+        status = MachineStatus(events)
+        status.add_layer()
+        status.drip_call_back(1, 0.1, 1.0, [1.0])
+        status.add_layer()
+        status.set_paused(True)
+        status.set_paused(False)
+        status.set_complete()
+
+        states = [event.status for event in self.published(events) if isinstance(event, StateChanged)]
+
+        self.assertEqual(['Running', 'Paused', 'Running', 'Complete'], states)
+
+    def test_drips_and_errors_publish_events(self):
+        events = MagicMock()
+        status = MachineStatus(events)
+        status.drip_call_back(3, 0.3, 2.0, [1.0, 2.0, 3.0])
+        status.add_error(MachineError('broken', 4))
+
+        drip, error = [event for event in self.published(events) if not isinstance(event, StateChanged)]
+
+        self.assertEqual((3, 0.3, 2.0), (drip.drips, drip.height, drip.drips_per_second))
+        self.assertEqual(('broken', 4), (error.message, error.layer))
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='DEBUG')
     unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import time
+import logging
+from mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.message_dispatcher import MessageDispatcher
+from peachyprinter.infrastructure.messages import DripRecordedMessage, PrinterStatusMessage, MoveMessage
+
+
+class MessageDispatcherTests(unittest.TestCase):
+    dispatcher = None
+
+    def tearDown(self):
+        if self.dispatcher:
+            self.dispatcher.close()
+
+    def wait_for(self, condition, timeout=2.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+
+    def test_dispatches_decoded_messages_to_handlers(self):
+        handler = MagicMock()
+        self.dispatcher = MessageDispatcher()
+        self.dispatcher.start()
+
+        self.dispatcher.submit(DripRecordedMessage, DripRecordedMessage(5).get_bytes(), (handler,))
+        self.wait_for(lambda: handler.call_count == 1)
+
+        handler.assert_called_once_with(DripRecordedMessage(5))
+
+    def test_submit_drops_messages_when_queue_full(self):
+        self.dispatcher = MessageDispatcher(queue_size=2)
+        payload = MoveMessage(1, 2, 3).get_bytes()
+
+        for i in range(5):
+            self.dispatcher.submit(MoveMessage, payload, ())
+
+        stats = self.dispatcher.stats()
+        self.assertEqual(5, stats['received'])
+        self.assertEqual(3, stats['dropped'])
+        self.assertEqual(2, stats['queue_depth'])
+
+    def test_submit_never_drops_drip_or_status_messages(self):
+        handler = MagicMock()
+        self.dispatcher = MessageDispatcher(queue_size=2)
+        for drips in range(1, 6):
+            self.dispatcher.submit(DripRecordedMessage, DripRecordedMessage(drips).get_bytes(), (handler,))
+        status = PrinterStatusMessage(True, False, True, False, 10)
+        self.dispatcher.submit(PrinterStatusMessage, status.get_bytes(), (handler,))
+        self.dispatcher.submit(MoveMessage, MoveMessage(1, 2, 3).get_bytes(), (handler,))
+
+        self.assertEqual(1, self.dispatcher.stats()['dropped'])
+        self.dispatcher.start()
+        self.wait_for(lambda: handler.call_count == 6)
+
+        expected = [DripRecordedMessage(drips) for drips in range(1, 6)] + [status]
+        self.assertEqual(expected, [args[0][0] for args in handler.call_args_list])
+
+    def test_handler_errors_are_counted_and_do_not_stop_dispatch(self):
+        failing_handler = MagicMock(side_effect=Exception('Boom'))
+        handler = MagicMock()
+        self.dispatcher = MessageDispatcher()
+        self.dispatcher.start()
+        payload = DripRecordedMessage(5).get_bytes()
+
+        self.dispatcher.submit(DripRecordedMessage, payload, (failing_handler,))
+        self.dispatcher.submit(DripRecordedMessage, payload, (handler,))
+        self.wait_for(lambda: handler.call_count == 1)
+
+        self.assertEqual(1, self.dispatcher.stats()['errors'])
+        self.assertEqual(2, self.dispatcher.stats()['dispatched'])
+
+    def test_stats_reports_latency(self):
+        self.dispatcher = MessageDispatcher()
+        self.dispatcher.submit(DripRecordedMessage, DripRecordedMessage(5).get_bytes(), ())
+        time.sleep(0.05)
+        self.dispatcher.start()
+        self.wait_for(lambda: self.dispatcher.stats()['dispatched'] == 1)
+
+        stats = self.dispatcher.stats()
+        self.assertTrue(stats['latency_max'] >= 0.05)
+        self.assertEqual(stats['latency_max'], stats['latency_average'])
+
+    def test_close_stops_thread(self):
+        self.dispatcher = MessageDispatcher()
+        self.dispatcher.start()
+        self.dispatcher.close()
+        self.assertFalse(self.dispatcher.is_alive())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='DEBUG')
+    unittest.main()
@@ -6,7 +6,7 @@ import logging
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
 
-from peachyprinter.infrastructure.messages import MoveMessage, DripRecordedMessage, SetDripCountMessage, MoveToDripCountMessage, IAmMessage, EnterBootloaderMessage, GetAdcValMessage, ReturnAdcValMessage, PrinterStatusMessage
+from peachyprinter.infrastructure.messages import MoveMessage, DripRecordedMessage, SetDripCountMessage, MoveToDripCountMessage, IAmMessage, EnterBootloaderMessage, GetAdcValMessage, ReturnAdcValMessage, PrinterStatusMessage, HoldMessage, DwellMessage
 
 
 class MoveMesssageTests(unittest.TestCase):
@@ -101,6 +101,32 @@ class PrinterStatusMesssageTests(unittest.TestCase):
         self.assertEqual(inital_message, decoded_message)
 
 
+class HoldMesssageTests(unittest.TestCase):
+
+    def test_hold_message_encodes_and_decodes(self):
+        inital_message = HoldMessage(77, 88, 55, 1000)
+        proto_bytes = inital_message.get_bytes()
+        self.assertTrue(len(proto_bytes) > 0)
+        decoded_message = HoldMessage.from_bytes(proto_bytes)
+        self.assertEqual(inital_message, decoded_message)
+
+    def test_move_message_is_the_held_sample(self):
+        self.assertEqual(MoveMessage(77, 88, 55), HoldMessage(77, 88, 55, 1000).move_message())
+
+
+class DwellMesssageTests(unittest.TestCase):
+
+    def test_dwell_message_encodes_and_decodes(self):
+        inital_message = DwellMessage(77, 88, 2500)
+        proto_bytes = inital_message.get_bytes()
+        self.assertTrue(len(proto_bytes) > 0)
+        decoded_message = DwellMessage.from_bytes(proto_bytes)
+        self.assertEqual(inital_message, decoded_message)
+
+    def test_hold_message_is_the_dwell_at_a_data_rate_with_laser_off(self):
+        self.assertEqual(HoldMessage(77, 88, 0, 20000), DwellMessage(77, 88, 2500).hold_message(8000))
+
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='DEBUG')
     unittest.main()
@@ -11,7 +11,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'sr
 from test_helpers import TestHelpers
 from peachyprinter.infrastructure.micro_disseminator import MicroDisseminator
 from peachyprinter.domain.laser_control import LaserControl
-from peachyprinter.infrastructure.messages import MoveMessage
+from peachyprinter.infrastructure.messages import MoveMessage, HoldMessage, DwellMessage
 
 
 class MicroDisseminatorTests(unittest.TestCase, TestHelpers):
@@ -76,6 +76,43 @@ class MicroDisseminatorTests(unittest.TestCase, TestHelpers):
             call(MoveMessage(self.max_value, self.max_value / 2, 255)),
             ])
 
+    def test_process_should_collapse_identical_consecutive_samples_into_a_hold(self):
+        self.laser_control.set_laser_on()
+        sample_data_chunk = numpy.array([(0.0, 1.0), (0.5, 0.0), (0.5, 0.0), (0.5, 0.0), (1.0, 0.5)])
+        micro_disseminator = MicroDisseminator(self.laser_control, self.mock_comm, 8000)
+        micro_disseminator.process(sample_data_chunk)
+        self.assertEqual([
+            call(MoveMessage(0, self.max_value, 255)),
+            call(HoldMessage(self.max_value / 2, 0, 255, 3)),
+            call(MoveMessage(self.max_value, self.max_value / 2, 255)),
+            ], self.mock_comm.send.call_args_list)
+
+    def test_process_should_send_a_single_hold_for_a_dwell(self):
+        self.laser_control.set_laser_off()
+        sample_data_chunk = numpy.array([(0.5, 0.5)] * 8000)
+        micro_disseminator = MicroDisseminator(self.laser_control, self.mock_comm, 8000)
+        micro_disseminator.process(sample_data_chunk)
+        self.mock_comm.send.assert_called_once_with(HoldMessage(self.max_value / 2, self.max_value / 2, 0, 8000))
+
+    def test_hold_sends_a_single_hold_without_a_path(self):
+        self.laser_control.set_laser_off()
+        micro_disseminator = MicroDisseminator(self.laser_control, self.mock_comm, 8000)
+        micro_disseminator.hold((0.5, 0.5), 160)
+        self.mock_comm.send.assert_called_once_with(HoldMessage(self.max_value / 2, self.max_value / 2, 0, 160))
+
+    def test_dwell_sends_a_single_dwell_when_supported(self):
+        self.mock_comm.dwell_supported = True
+        micro_disseminator = MicroDisseminator(self.laser_control, self.mock_comm, 8000)
+        micro_disseminator.dwell((0.5, 0.5), 2.5)
+        self.mock_comm.send.assert_called_once_with(DwellMessage(self.max_value / 2, self.max_value / 2, 2500))
+
+    def test_dwell_sends_a_hold_when_not_supported(self):
+        self.mock_comm.dwell_supported = False
+        self.laser_control.set_laser_off()
+        micro_disseminator = MicroDisseminator(self.laser_control, self.mock_comm, 8000)
+        micro_disseminator.dwell((0.5, 0.5), 0.02)
+        self.mock_comm.send.assert_called_once_with(HoldMessage(self.max_value / 2, self.max_value / 2, 0, 160))
+
     def test_close_calls_close_on_communicator(self):
         micro_disseminator = MicroDisseminator(self.laser_control, self.mock_comm, 8000)
         micro_disseminator.close()
@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+import time
+import threading
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.pipeline import PipelineStage, StageStats, take_upstream_wait
+
+
+class PipelineStageTests(unittest.TestCase):
+
+    def wait_for(self, condition, timeout=2.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.005)
+
+    def test_yields_processed_items_in_order_then_stops(self):
+        stage = PipelineStage('double', iter([1, 2, 3]), lambda item: item * 2)
+
+        self.assertEquals([2, 4, 6], list(stage))
+        with self.assertRaises(StopIteration):
+            stage.next()
+
+    def test_stages_chain(self):
+        first = PipelineStage('first', iter([1, 2, 3]), lambda item: item + 1)
+        second = PipelineStage('second', first, lambda item: item * 10)
+
+        self.assertEquals([20, 30, 40], list(second))
+
+    def test_errors_are_raised_after_earlier_items(self):
+        def source():
+            yield 1
+            raise Exception("Broken")
+        stage = PipelineStage('broken', source())
+
+        self.assertEquals(1, stage.next())
+        with self.assertRaises(Exception):
+            stage.next()
+        with self.assertRaises(Exception):
+            stage.next()
+
+    def test_queue_is_bounded(self):
+        produced = []
+
+        def process(item):
+            produced.append(item)
+            return item
+        stage = PipelineStage('bounded', iter(range(10)), process, queue_size=2)
+        self.wait_for(lambda: len(produced) >= 3)
+        time.sleep(0.05)
+
+        self.assertEquals(3, len(produced))
+        self.assertEquals(2, stage.stats()['queue_depth'])
+        self.assertEquals(range(10), list(stage))
+
+    def test_close_ends_a_waiting_consumer(self):
+        blocker = threading.Event()
+
+        def source():
+            blocker.wait(2.0)
+            yield 1
+        stage = PipelineStage('stalled', source())
+        result = []
+        consumer = threading.Thread(target=lambda: result.append(list(stage)))
+        consumer.start()
+
+        stage.close()
+        consumer.join(1.0)
+        blocker.set()
+
+        self.assertFalse(consumer.is_alive())
+        self.assertEquals([[]], result)
+
+    def test_stats_report_busy_time_without_time_waiting_upstream(self):
+        def slow_source():
+            for item in range(3):
+                time.sleep(0.05)
+                yield item
+
+        def slow_process(item):
+            time.sleep(0.02)
+            return item
+        first = PipelineStage('slow', slow_source())
+        second = PipelineStage('fast', first, slow_process)
+
+        self.assertEquals([0, 1, 2], list(second))
+        first_stats = first.stats()
+        second_stats = second.stats()
+
+        self.assertEquals('slow', first_stats['name'])
+        self.assertEquals(3, first_stats['items'])
+        self.assertTrue(first_stats['busy_time'] >= 0.14, first_stats)
+        self.assertTrue(0.05 <= second_stats['busy_time'] < 0.1, second_stats)
+        self.assertTrue(second_stats['waiting_time'] >= 0.05, second_stats)
+        self.assertTrue(0.0 < second_stats['utilization'] < first_stats['utilization'])
+
+    def test_consumers_can_take_time_waited_on_stages(self):
+        stage = PipelineStage('slow', iter([1]), lambda item: time.sleep(0.05) or item)
+        take_upstream_wait()
+
+        stage.next()
+
+        self.assertTrue(take_upstream_wait() >= 0.04)
+        self.assertEquals(0.0, take_upstream_wait())
+
+
+class StageStatsTests(unittest.TestCase):
+
+    def test_records_totals(self):
+        stats = StageStats('print')
+
+        stats.record(0.5, 0.25, 0.125)
+        stats.record(0.5)
+
+        result = stats.stats(1, 4)
+        self.assertEquals('print', result['name'])
+        self.assertEquals(2, result['items'])
+        self.assertEquals(1.0, result['busy_time'])
+        self.assertEquals(0.25, result['waiting_time'])
+        self.assertEquals(0.125, result['blocked_time'])
+        self.assertEquals(1.0, result['utilization'])
+        self.assertEquals(1, result['queue_depth'])
+        self.assertEquals(4, result['queue_size'])
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import sys
+import os
+import logging
+from mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.process_renderer import SharedRing, ProcessRenderingLayerGenerator, ProcessRenderedLayer
+from peachyprinter.infrastructure.compiled_print import CompiledLayerWriter
+from peachyprinter.infrastructure.communicator import frame_message
+from peachyprinter.infrastructure.messages import MoveMessage
+from peachyprinter.domain.commands import Layer
+
+
+class FakeRendered(object):
+    def __init__(self, z, frames):
+        self.z = z
+        self.frames = frames
+        self.axis = None
+        self.end = [1.0, 2.0]
+
+
+class FakeRenderer(object):
+    def render(self, layer):
+        if layer.z < 0:
+            raise Exception("Bad layer")
+        return FakeRendered(layer.z, ['\x02AB', '\x01C' * int(layer.z)])
+
+
+class FakeRendererFactory(object):
+    def __call__(self):
+        return FakeRenderer()
+
+
+class SharedRingTests(unittest.TestCase):
+
+    def test_write_returns_position_that_can_be_read(self):
+        ring = SharedRing(16)
+
+        offset, end = ring.write('abcd')
+
+        self.assertEquals((0, 4), (offset, end))
+        self.assertEquals('abcd', ring.view(offset, 4)[:])
+
+    def test_records_do_not_wrap(self):
+        ring = SharedRing(10)
+        ring.write('abcdef')
+        ring.release(6)
+
+        offset, end = ring.write('ghijk')
+
+        self.assertEquals(0, offset)
+        self.assertEquals(15, end)
+        self.assertEquals('ghijk', ring.view(offset, 5)[:])
+
+    def test_record_longer_than_the_released_start_of_the_ring_fits_once_all_released(self):
+        ring = SharedRing(8)
+        ring.write('abcd')
+        ring.release(4)
+
+        offset, end = ring.write('efghijk')
+
+        self.assertEquals((0, 15), (offset, end))
+        self.assertEquals('efghijk', ring.view(offset, 7)[:])
+
+    def test_write_returns_none_when_stopped_while_full(self):
+        ring = SharedRing(8)
+        ring.write('abcdef')
+        ring.stop()
+
+        self.assertEquals(None, ring.write('ghi'))
+
+    def test_write_raises_when_data_larger_than_ring(self):
+        ring = SharedRing(4)
+
+        with self.assertRaises(Exception):
+            ring.write('abcde')
+
+
+    def test_frames_sent_from_the_ring_outlive_reuse_of_its_space(self):
+        ring = SharedRing(64)
+        frames = [frame_message(MoveMessage(1, 2, 3)), frame_message(MoveMessage(4, 5, 6))]
+        offset, end = ring.write(''.join(frames))
+        source = MagicMock()
+        source.read.side_effect = lambda layer: ring.view(layer.offset, layer.length)
+        communicator = MagicMock()
+        writer = CompiledLayerWriter(source, communicator, 8000)
+
+        writer.process_layer(ProcessRenderedLayer(0.1, offset, end - offset, end, None, None))
+        ring.release(end)
+        ring.write('\0' * 64)
+
+        self.assertEquals(frames, [args[0][0] for args in communicator.send_frame.call_args_list])
+
+
+class ProcessRenderingLayerGeneratorTests(unittest.TestCase):
+
+    def test_renders_layers_in_order_into_the_ring(self):
+        layers = [Layer(float(z)) for z in range(1, 20)]
+        generator = ProcessRenderingLayerGenerator(iter(layers), FakeRendererFactory(), ring_size=64, lookahead=2)
+        try:
+            for z in range(1, 20):
+                layer = generator.next()
+                self.assertEquals(float(z), layer.z)
+                self.assertEquals([1.0, 2.0], layer.end)
+                self.assertEquals('\x02AB' + '\x01C' * z, generator.read(layer)[:])
+            with self.assertRaises(StopIteration):
+                generator.next()
+        finally:
+            generator.close()
+
+    def test_render_errors_are_raised(self):
+        generator = ProcessRenderingLayerGenerator(iter([Layer(1.0), Layer(-1.0)]), FakeRendererFactory())
+        try:
+            generator.next()
+            with self.assertRaises(Exception):
+                generator.next()
+        finally:
+            generator.close()
+
+    def test_stats_count_rendered_layers(self):
+        generator = ProcessRenderingLayerGenerator(iter([Layer(1.0), Layer(2.0)]), FakeRendererFactory())
+        try:
+            list(generator)
+            stats = generator.stats()
+        finally:
+            generator.close()
+
+        self.assertEquals('render', stats['name'])
+        self.assertEquals(2, stats['items'])
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+import time
+import threading
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.scheduler import Scheduler, default_scheduler
+from peachyprinter.infrastructure.clock import monotonic
+
+
+class SchedulerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.calls = []
+        self.called = threading.Event()
+
+    def tearDown(self):
+        self.scheduler.close()
+
+    def call(self, name):
+        def function():
+            self.calls.append(name)
+            self.called.set()
+        return function
+
+    def wait_for_calls(self, count, timeout=2.0):
+        deadline = time.time() + timeout
+        while len(self.calls) < count and time.time() < deadline:
+            time.sleep(0.005)
+
+    def test_calls_run_in_due_order(self):
+        now = monotonic()
+        self.scheduler.call_at(now + 0.06, self.call('third'))
+        self.scheduler.call_at(now + 0.02, self.call('first'))
+        self.scheduler.call_at(now + 0.04, self.call('second'))
+
+        self.wait_for_calls(3)
+
+        self.assertEquals(['first', 'second', 'third'], self.calls)
+
+    def test_call_later_waits_for_delay(self):
+        start = monotonic()
+        self.scheduler.call_later(0.05, self.call('later'))
+
+        self.called.wait(2.0)
+
+        self.assertTrue(monotonic() - start >= 0.05)
+
+    def test_cancelled_calls_do_not_run(self):
+        timer = self.scheduler.call_later(0.02, self.call('cancelled'))
+        self.scheduler.call_later(0.04, self.call('kept'))
+        timer.cancel()
+
+        self.wait_for_calls(1)
+        time.sleep(0.02)
+
+        self.assertEquals(['kept'], self.calls)
+
+    def test_call_every_repeats_until_cancelled(self):
+        timer = self.scheduler.call_every(0.01, self.call('tick'))
+
+        self.wait_for_calls(3)
+        timer.cancel()
+        time.sleep(0.03)
+        count = len(self.calls)
+        time.sleep(0.03)
+
+        self.assertTrue(count >= 3)
+        self.assertEquals(count, len(self.calls))
+        self.assertEquals(0, self.scheduler.pending())
+
+    def test_failing_calls_do_not_stop_the_scheduler(self):
+        def fail():
+            raise Exception("Broken")
+        self.scheduler.call_later(0.0, fail)
+        self.scheduler.call_later(0.01, self.call('after'))
+
+        self.wait_for_calls(1)
+
+        self.assertEquals(['after'], self.calls)
+
+    def test_uses_a_single_thread_for_all_timers(self):
+        threads = []
+
+        def record():
+            threads.append(threading.current_thread())
+        for delay in range(5):
+            self.scheduler.call_later(delay * 0.001, record)
+        self.scheduler.call_later(0.01, self.call('done'))
+
+        self.wait_for_calls(1)
+
+        self.assertEquals(1, len(set(threads)))
+
+    def test_default_scheduler_is_shared(self):
+        self.assertTrue(default_scheduler() is default_scheduler())
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import struct
+import tempfile
+import shutil
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.shared_status import *
+from peachyprinter.infrastructure.machine import MachineStatus, MachineError
+
+
+class SharedStatusTests(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.status_file = os.path.join(self.folder, 'print.status')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_reader_reads_what_was_written(self):
+        writer = SharedStatusWriter(self.status_file)
+        writer.write(12, 3, 1, 40, 'Paused', True, 0.4, 0.35, 2.5, 1000.0, 2)
+
+        reader = SharedStatusReader(self.status_file)
+        actual = reader.read()
+        reader.close()
+        writer.close()
+
+        self.assertEquals(os.getpid(), reader.pid)
+        self.assertEquals(12, actual['sequence'])
+        self.assertEquals(3, actual['current_layer'])
+        self.assertEquals(1, actual['skipped_layers'])
+        self.assertEquals(40, actual['drips'])
+        self.assertEquals('Paused', actual['status'])
+        self.assertEquals(True, actual['waiting_for_drips'])
+        self.assertEquals(0.4, actual['height'])
+        self.assertEquals(0.35, actual['model_height'])
+        self.assertEquals(2.5, actual['drips_per_second'])
+        self.assertEquals(1000.0, actual['start_time'])
+        self.assertEquals(2, actual['errors'])
+
+    def test_reader_sees_later_writes(self):
+        writer = SharedStatusWriter(self.status_file)
+        reader = SharedStatusReader(self.status_file)
+
+        writer.write(1, 1, 0, 10, 'Running', False, 0.1, 0.1, 1.0, 1000.0, 0)
+        self.assertEquals(1, reader.read()['current_layer'])
+        writer.write(2, 2, 0, 20, 'Complete', False, 0.2, 0.2, 1.0, 1000.0, 0)
+        self.assertEquals('Complete', read_shared_status(self.status_file)['status'])
+        self.assertEquals(2, reader.read()['current_layer'])
+
+        reader.close()
+        writer.close()
+
+    def test_reader_raises_while_a_write_never_finishes(self):
+        writer = SharedStatusWriter(self.status_file)
+        writer.close()
+        with open(self.status_file, 'r+b') as status_file:
+            status_file.seek(struct.calcsize('<8sII'))
+            status_file.write(struct.pack('<Q', 1))
+
+        reader = SharedStatusReader(self.status_file, retries=10)
+        with self.assertRaises(Exception):
+            reader.read()
+        reader.close()
+
+    def test_reader_raises_when_not_a_shared_status(self):
+        with open(self.status_file, 'wb') as status_file:
+            status_file.write('\0' * SHARED_STATUS_SIZE)
+
+        with self.assertRaises(Exception):
+            SharedStatusReader(self.status_file)
+
+    def test_machine_status_keeps_shared_status_current(self):
+        writer = SharedStatusWriter(self.status_file)
+        status = MachineStatus(shared_status=writer)
+        self.assertEquals('Starting', read_shared_status(self.status_file)['status'])
+
+        status.set_model_height(0.1)
+        status.add_layer()
+        status.drip_call_back(5, 0.5, 2.0, [1.0])
+        status.add_error(MachineError('broken', 1))
+        actual = read_shared_status(self.status_file)
+        writer.close()
+
+        self.assertEquals(1, actual['current_layer'])
+        self.assertEquals('Running', actual['status'])
+        self.assertEquals(5, actual['drips'])
+        self.assertEquals(0.5, actual['height'])
+        self.assertEquals(0.1, actual['model_height'])
+        self.assertEquals(1, actual['errors'])
+        self.assertEquals(status.status_since()['sequence'], actual['sequence'])
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level='INFO')
+    unittest.main()
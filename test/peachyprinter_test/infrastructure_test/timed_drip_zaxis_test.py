@@ -2,11 +2,14 @@ import unittest
 import sys
 import os
 import time
+import threading
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
 
 from peachyprinter.infrastructure.timed_drip_zaxis import TimedDripZAxis, PhotoZAxis
+from peachyprinter.infrastructure.scheduler import Scheduler
+from peachyprinter.infrastructure.clock import monotonic
 
 
 class TimedDripZaxisTests(unittest.TestCase):
@@ -118,6 +121,18 @@ class TimedDripZaxisTests(unittest.TestCase):
 
         self.assertTrue(self.calls > 0)
 
+    def test_drip_history_passed_to_call_back_is_a_read_only_view(self):
+        self.tdza = TimedDripZAxis(1, 0.0, drips_per_second=100, call_back=self.call_back)
+        self.tdza.running = True
+        self.tdza.start_time = monotonic() - 6.0
+        self.tdza.update_data()
+        self.tdza.running = False
+        self.tdza = None
+
+        self.assertFalse(self.drip_history.flags.writeable)
+        self.assertFalse(self.drip_history.flags.owndata)
+        self.assertEquals(500, len(self.drip_history))
+
     def test_set_drips_per_second(self):
         expected_drips_per_second = 12
         self.tdza = TimedDripZAxis(
@@ -145,6 +160,43 @@ class TimedDripZaxisTests(unittest.TestCase):
         self.tdza.start()
         self.tdza.move_to(7.0)
 
+    def test_predicted_time_to_height_uses_drip_rate(self):
+        self.tdza = TimedDripZAxis(10.0, 0.0, drips_per_second=100)
+        self.tdza.start()
+
+        self.assertAlmostEquals(1.0, self.tdza.predicted_time_to_height(10.0), delta=0.2)
+        self.assertAlmostEquals(10.0, self.tdza.predicted_height(time.time() + 1.0), delta=2.0)
+        self.assertEquals(1.0, self.tdza.prediction_confidence)
+
+    def test_wait_for_height_returns_when_height_is_due(self):
+        self.tdza = TimedDripZAxis(10.0, 0.0, drips_per_second=100)
+        self.tdza.start()
+        start = time.time()
+
+        reached = self.tdza.wait_for_height(2.0, 5.0)
+
+        elapsed = time.time() - start
+        self.assertTrue(reached)
+        self.assertTrue(self.tdza.current_z_location_mm() >= 2.0)
+        self.assertTrue(elapsed < 0.5, elapsed)
+
+    def test_emulated_zaxes_share_the_scheduler_thread(self):
+        scheduler = Scheduler()
+        zaxes = [TimedDripZAxis(1, 0.0, calls_back_per_second=100, scheduler=scheduler) for index in range(5)]
+        threads_before = threading.active_count()
+
+        for zaxis in zaxes:
+            zaxis.set_call_back(self.call_back)
+            zaxis.start()
+        time.sleep(0.1)
+        threads_during = threading.active_count()
+        for zaxis in zaxes:
+            zaxis.close()
+        scheduler.close()
+
+        self.assertTrue(threads_during - threads_before <= 1)
+        self.assertTrue(self.calls >= 5)
+
 
 class PhotoZAxisTests(unittest.TestCase):
 
@@ -218,6 +270,25 @@ class PhotoZAxisTests(unittest.TestCase):
         test_zaxis.start()
         self.assertEquals(0.0, test_zaxis.current_z_location_mm())
 
+    def test_wait_for_height_returns_after_delay(self):
+        test_zaxis = PhotoZAxis(0.0, 0.1)
+        test_zaxis.move_to(1.0)
+        start = time.time()
+
+        reached = test_zaxis.wait_for_height(1.0, 5.0)
+
+        self.assertTrue(reached)
+        self.assertTrue(0.09 <= time.time() - start < 0.5)
+
+    def test_height_changes_without_polling_once_delay_passes(self):
+        test_zaxis = PhotoZAxis(0.0, 0.05, call_back=self.call_back)
+        test_zaxis.move_to(10.0)
+
+        time.sleep(0.2)
+
+        self.assertEquals(1, self.calls)
+        self.assertEquals(10.0, self.height)
+
     def test_close_can_be_called(self):
         test_zaxis = PhotoZAxis(0.0, )
         test_zaxis.start()
@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import shutil
+import logging
+from mock import MagicMock, call
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.trace import TraceWriter, TraceReader, TraceReplayer, OUTGOING, INCOMING
+from peachyprinter.infrastructure.clock import monotonic
+
+
+class TraceTests(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.trace_file = os.path.join(self.folder, 'test.trace')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_reader_returns_written_records_in_order(self):
+        writer = TraceWriter(self.trace_file)
+        writer.write(OUTGOING, '\x02\x02ab')
+        writer.write(INCOMING, '\x03\x08\x01')
+        writer.close()
+
+        records = list(TraceReader(self.trace_file))
+
+        self.assertEqual(2, len(records))
+        self.assertEqual((OUTGOING, '\x02\x02ab'), (records[0][0], records[0][2]))
+        self.assertEqual((INCOMING, '\x03\x08\x01'), (records[1][0], records[1][2]))
+        self.assertTrue(records[0][1] <= records[1][1])
+
+    def test_outgoing_filters_incoming_records(self):
+        writer = TraceWriter(self.trace_file)
+        writer.write(INCOMING, 'in')
+        writer.write(OUTGOING, 'out')
+        writer.close()
+
+        self.assertEqual(['out'], [data for (timestamp, data) in TraceReader(self.trace_file).outgoing()])
+
+    def test_reader_rejects_other_files(self):
+        with open(self.trace_file, 'wb') as afile:
+            afile.write('not a trace file')
+        with self.assertRaises(Exception):
+            list(TraceReader(self.trace_file))
+
+    def test_write_after_close_is_ignored(self):
+        writer = TraceWriter(self.trace_file)
+        writer.close()
+        writer.write(OUTGOING, 'late')
+        self.assertEqual([], list(TraceReader(self.trace_file)))
+
+    def test_replay_at_max_pace_writes_all_outgoing_frames(self):
+        writer = TraceWriter(self.trace_file)
+        writer.write(OUTGOING, 'one')
+        writer.write(INCOMING, 'ignored')
+        time.sleep(0.2)
+        writer.write(OUTGOING, 'two')
+        writer.close()
+        device = MagicMock()
+
+        stats = TraceReplayer(self.trace_file, device, original_pace=False).replay()
+
+        self.assertEqual([call('one'), call('two')], device.write.call_args_list)
+        self.assertEqual(2, stats['frames'])
+        self.assertEqual(6, stats['bytes'])
+        self.assertTrue(stats['elapsed'] < 0.2)
+
+    def test_replay_at_original_pace_keeps_recorded_timing(self):
+        writer = TraceWriter(self.trace_file)
+        writer.write(OUTGOING, 'one')
+        time.sleep(0.2)
+        writer.write(OUTGOING, 'two')
+        writer.close()
+
+        stats = TraceReplayer(self.trace_file, MagicMock(), original_pace=True).replay()
+
+        self.assertTrue(stats['elapsed'] >= 0.19)
+
+
+class ClockTests(unittest.TestCase):
+
+    def test_monotonic_never_goes_backwards(self):
+        readings = [monotonic() for i in range(1000)]
+        self.assertEqual(sorted(readings), readings)
+
+    def test_monotonic_measures_elapsed_seconds(self):
+        start = monotonic()
+        time.sleep(0.1)
+        self.assertAlmostEqual(0.1, monotonic() - start, delta=0.05)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='DEBUG')
+    unittest.main()
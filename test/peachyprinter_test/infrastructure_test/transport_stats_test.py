@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import logging
+from mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.transport_stats import TransportStats
+
+
+class TransportStatsTests(unittest.TestCase):
+
+    def test_stats_are_zero_before_writes(self):
+        stats = TransportStats().stats()
+        self.assertEqual(0, stats['total_bytes'])
+        self.assertEqual(0, stats['total_frames'])
+        self.assertEqual(0.0, stats['write_latency_p99'])
+        self.assertEqual(0.0, stats['bytes_per_second'])
+        self.assertEqual(0.0, stats['blocked_time'])
+
+    def test_record_write_accumulates_totals(self):
+        transport_stats = TransportStats()
+        transport_stats.record_write(100, 10, 0.001)
+        transport_stats.record_write(50, 5, 0.003)
+
+        stats = transport_stats.stats()
+
+        self.assertEqual(150, stats['total_bytes'])
+        self.assertEqual(15, stats['total_frames'])
+        self.assertAlmostEqual(0.004, stats['write_time'])
+
+    def test_latency_percentiles(self):
+        transport_stats = TransportStats()
+        for latency in range(1, 101):
+            transport_stats.record_write(1, 1, latency / 1000.0)
+
+        stats = transport_stats.stats()
+
+        self.assertAlmostEqual(0.0505, stats['write_latency_p50'])
+        self.assertAlmostEqual(0.0901, stats['write_latency_p90'])
+        self.assertAlmostEqual(0.0990, stats['write_latency_p99'], places=3)
+
+    @patch('peachyprinter.infrastructure.transport_stats.time')
+    def test_rates_are_measured_over_rate_period(self, mock_time):
+        mock_time.time.return_value = 0.0
+        transport_stats = TransportStats(rate_period=1.0)
+        mock_time.time.return_value = 0.5
+        transport_stats.record_write(1000, 100, 0.0)
+        mock_time.time.return_value = 0.9
+        transport_stats.record_write(1000, 100, 0.0)
+        mock_time.time.return_value = 1.0
+        transport_stats.record_write(10, 1, 0.0)
+
+        stats = transport_stats.stats()
+
+        self.assertEqual(2000.0, stats['bytes_per_second'])
+        self.assertEqual(200.0, stats['frames_per_second'])
+
+    def test_record_blocked_accumulates(self):
+        transport_stats = TransportStats()
+        transport_stats.record_blocked(0.25)
+        transport_stats.record_blocked(0.5)
+        self.assertEqual(0.75, transport_stats.stats()['blocked_time'])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='DEBUG')
+    unittest.main()
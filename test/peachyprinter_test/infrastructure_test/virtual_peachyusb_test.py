@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import time
+import ctypes
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
+
+from peachyprinter.infrastructure.virtual_peachyusb import VirtualPeachyUSB
+from peachyprinter.infrastructure.messages import MoveMessage, HoldMessage, DwellMessage, IdentifyMessage, IAmMessage, DripRecordedMessage, SetDripCountMessage
+
+
+class VirtualPeachyUSBTests(unittest.TestCase):
+    device = None
+
+    def setUp(self):
+        self.received = []
+
+    def tearDown(self):
+        if self.device:
+            self.device.close()
+
+    def call_back(self, data, length):
+        self.received.append(ctypes.string_at(data, length))
+
+    def frame(self, message):
+        data = chr(message.TYPE_ID) + message.get_bytes()
+        return chr(len(data)) + data
+
+    def wait_for(self, condition, timeout=2.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+
+    def test_identify_is_answered_with_i_am(self):
+        self.device = VirtualPeachyUSB(50, data_rate=8000, drips_per_second=0, serial_number='SN1')
+        self.device.set_read_callback(self.call_back)
+
+        self.device.write(self.frame(IdentifyMessage()))
+        self.wait_for(lambda: len(self.received) == 1)
+
+        self.assertEqual(IAmMessage.TYPE_ID, ord(self.received[0][0]))
+        i_am = IAmMessage.from_bytes(self.received[0][1:])
+        self.assertEqual('SN1', i_am.sn)
+        self.assertEqual(8000, i_am.dataRate)
+
+    def test_samples_are_consumed_at_data_rate(self):
+        self.device = VirtualPeachyUSB(50, data_rate=1000, drips_per_second=0)
+        start = time.time()
+
+        self.device.write(self.frame(HoldMessage(1, 2, 0, 200)))
+        self.device.write(self.frame(MoveMessage(3, 4, 255)))
+        self.wait_for(lambda: self.device.samples_consumed == 201)
+
+        self.assertTrue(self.device.hold_supported)
+        self.assertTrue(time.time() - start >= 0.19)
+        self.assertEqual(201, self.device.samples_consumed)
+        self.assertEqual((3, 4, 255), self.device.position)
+
+    def test_dwell_holds_position_with_laser_off_for_duration(self):
+        self.device = VirtualPeachyUSB(50, data_rate=1000, drips_per_second=0)
+        start = time.time()
+
+        self.device.write(self.frame(DwellMessage(1, 2, 200)))
+        self.wait_for(lambda: self.device.samples_consumed == 200)
+
+        self.assertTrue(self.device.dwell_supported)
+        self.assertTrue(time.time() - start >= 0.19)
+        self.assertEqual((1, 2, 0), self.device.position)
+
+    def test_write_blocks_when_queue_is_full(self):
+        self.device = VirtualPeachyUSB(1, data_rate=1000, drips_per_second=0)
+        start = time.time()
+
+        for i in range(3):
+            self.device.write(self.frame(HoldMessage(1, 2, 0, 100)))
+
+        self.assertTrue(time.time() - start >= 0.09)
+        self.assertEqual(1, self.device.max_queue_depth)
+
+    def test_drips_are_reported_at_drip_rate(self):
+        self.device = VirtualPeachyUSB(50, data_rate=1000, drips_per_second=50)
+        self.device.set_read_callback(self.call_back)
+
+        self.wait_for(lambda: len(self.received) >= 3)
+
+        drips = [DripRecordedMessage.from_bytes(data[1:]).drips for data in self.received[:3]]
+        self.assertEqual([1, 2, 3], drips)
+
+    def test_set_drip_count_resets_drips(self):
+        self.device = VirtualPeachyUSB(50, data_rate=1000, drips_per_second=20)
+        self.device.set_read_callback(self.call_back)
+        self.wait_for(lambda: len(self.received) >= 2)
+
+        self.device.write(self.frame(SetDripCountMessage(0)))
+        del self.received[:]
+        self.wait_for(lambda: len(self.received) >= 1)
+
+        self.assertEqual(1, DripRecordedMessage.from_bytes(self.received[0][1:]).drips)
+
+    def test_underrun_counted_when_queue_drains(self):
+        self.device = VirtualPeachyUSB(50, data_rate=1000, drips_per_second=0)
+
+        self.device.write(self.frame(MoveMessage(1, 1, 0)))
+        self.wait_for(lambda: self.device.underruns == 1)
+
+        self.assertEqual(1, self.device.underruns)
+
+    def test_close_stops_device(self):
+        self.device = VirtualPeachyUSB(50, data_rate=1000, drips_per_second=0)
+        self.device.close()
+        self.assertFalse(self.device._thread.is_alive())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='DEBUG')
+    unittest.main()
@@ -3,6 +3,7 @@ import os
 import sys
 import time
 import logging
+import threading
 from mock import MagicMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -102,6 +103,19 @@ class SerialDripZAxisTests(unittest.TestCase):
         sdza.drip_reported_handler(drip_message_2)
         self.assertEquals(10, len(mock_call_back.call_args_list[1][0][3]))
 
+    def test_drip_history_passed_to_call_back_is_a_view_kept_through_the_next_drip(self):
+        mock_call_back = MagicMock()
+        sdza = SerialDripZAxis(MagicMock(), 1.0, 0.0, mock_call_back)
+        sdza.drip_reported_handler(DripRecordedMessage(600))
+        history = mock_call_back.call_args[0][3]
+        expected = list(history)
+
+        sdza.drip_reported_handler(DripRecordedMessage(601))
+
+        self.assertFalse(history.flags.writeable)
+        self.assertFalse(history.flags.owndata)
+        self.assertEquals(expected, list(history))
+
     def test_move_to_sends_drips(self):
         mock_communicatior = MagicMock()
         starting_height = 0.0
@@ -133,7 +147,7 @@ class SerialDripZAxisTests(unittest.TestCase):
         history = sdza.drip_history
 
         self.assertEqual(0.0, actual_height)
-        self.assertEqual([], history)
+        self.assertEqual(0, len(history))
 
     def test_reset_removes_drips_count_accounting_for_hardware(self):
         mock_communicatior = MagicMock()
@@ -179,6 +193,66 @@ class SerialDripZAxisTests(unittest.TestCase):
         self.assertTrue(mock_call_back.call_args_list[0][0][3][0] >= start)
         self.assertTrue(mock_call_back.call_args_list[0][0][3][0] <= end)
 
+    def test_wait_for_height_wakes_when_drip_arrives(self):
+        sdza = SerialDripZAxis(MagicMock(), 1.0, 0.0)
+        timer = threading.Timer(0.05, sdza.drip_reported_handler, [DripRecordedMessage(2)])
+        start = time.time()
+        timer.start()
+
+        reached = sdza.wait_for_height(2.0, 5.0)
+
+        self.assertTrue(reached)
+        self.assertTrue(time.time() - start < 1.0)
+
+    def test_wait_for_height_wakes_soon_after_height_changes(self):
+        sdza = SerialDripZAxis(MagicMock(), 1.0, 0.0)
+        woke = []
+
+        def wait():
+            sdza.wait_for_height(2.0, 2.0)
+            woke.append(time.time())
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        time.sleep(0.3)
+        reached_at = time.time()
+        sdza.drip_reported_handler(DripRecordedMessage(2))
+        waiter.join(5)
+
+        self.assertTrue(woke[0] - reached_at < 0.1)
+
+    def test_wait_for_height_returns_false_on_timeout(self):
+        sdza = SerialDripZAxis(MagicMock(), 1.0, 0.0)
+        sdza.drip_reported_handler(DripRecordedMessage(1))
+        start = time.time()
+
+        reached = sdza.wait_for_height(2.0, 0.05)
+
+        self.assertFalse(reached)
+        self.assertTrue(time.time() - start >= 0.05)
+
+    def test_wait_for_height_returns_immediately_when_reached(self):
+        sdza = SerialDripZAxis(MagicMock(), 1.0, 0.0)
+        sdza.drip_reported_handler(DripRecordedMessage(3))
+
+        self.assertTrue(sdza.wait_for_height(2.0, 0.0))
+
+    def test_predictions_come_from_the_drip_rate_estimator(self):
+        estimator = MagicMock()
+        estimator.drips = 0
+        sdza = SerialDripZAxis(MagicMock(), 2.0, 1.0, drip_rate_estimator=estimator)
+        estimator.drips = 4
+        sdza.drip_reported_handler(DripRecordedMessage(4))
+        estimator.predicted_drips.return_value = 10.0
+        estimator.predicted_time_of_drips.return_value = time.time() + 5.0
+        estimator.confidence = 0.75
+
+        self.assertEqual(6.0, sdza.predicted_height(time.time() + 1.0))
+        self.assertAlmostEqual(5.0, sdza.predicted_time_to_height(4.0), places=1)
+        estimator.predicted_time_of_drips.assert_called_with(6.0)
+        self.assertEqual(0.0, sdza.predicted_time_to_height(2.0))
+        self.assertEqual(0.75, sdza.prediction_confidence)
+        estimator.add_drips.assert_called_with(sdza.drip_history[-1], 4)
+
 
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='DEBUG')